@@ -0,0 +1,184 @@
+"""
+Память клиента discord.py в профилях CLIENT_PROFILE=default и lean: в ConnectionState без сети
+грузятся N фейковых гильдий (GUILD_CREATE) и поток сообщений, после чего берётся снимок
+tracemalloc в установившемся режиме (и RSS процесса, где есть /proc).
+
+    python benchmarks/client_memory.py --guilds 100,1000,5000 --messages 20
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from discord.ext import commands  # noqa: E402
+
+from cronbot.bot import client_options  # noqa: E402
+
+SELF_ID = 1 << 40
+TEXT_CHANNELS = 15
+VOICE_CHANNELS = 3
+ROLES = 10
+EMOJIS = 30
+STICKERS = 5
+VOICE_MEMBERS = 5
+AUTHORS = 50
+
+
+def _user(uid: int) -> dict:
+    return {"id": str(uid), "username": f"user{uid}", "discriminator": "0", "global_name": None, "avatar": None}
+
+
+def _member(uid: int) -> dict:
+    return {"user": _user(uid), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False,
+            "flags": 0}
+
+
+def guild_payload(gid: int) -> dict:
+    """Похоже на GUILD_CREATE без привилегированных интентов: участники — только бот и те, кто в голосе."""
+    base = gid * 10_000
+    channels = [
+        {"id": str(base + c), "type": 0, "name": f"text-{c}", "position": c, "permission_overwrites": [],
+         "topic": None, "nsfw": False, "rate_limit_per_user": 0, "last_message_id": None}
+        for c in range(TEXT_CHANNELS)
+    ] + [
+        {"id": str(base + 100 + c), "type": 2, "name": f"voice-{c}", "position": c, "permission_overwrites": [],
+         "bitrate": 64000, "user_limit": 0, "rtc_region": None}
+        for c in range(VOICE_CHANNELS)
+    ]
+    voice_ids = [base + 1000 + m for m in range(VOICE_MEMBERS)]
+    return {
+        "id": str(gid),
+        "name": f"guild {gid}",
+        "owner_id": str(base + 1000),
+        "member_count": 500,
+        "roles": [
+            {"id": str(gid if r == 0 else base + 200 + r), "name": f"role-{r}", "color": 0, "hoist": False,
+             "position": r, "permissions": "0", "managed": False, "mentionable": False}
+            for r in range(ROLES)
+        ],
+        "emojis": [
+            {"id": str(base + 300 + e), "name": f"e{e}", "roles": [], "require_colons": True,
+             "managed": False, "animated": False, "available": True}
+            for e in range(EMOJIS)
+        ],
+        "stickers": [
+            {"id": str(base + 400 + s), "name": f"s{s}", "tags": "x", "type": 2, "format_type": 1,
+             "description": None, "available": True, "guild_id": str(gid)}
+            for s in range(STICKERS)
+        ],
+        "channels": channels,
+        "members": [_member(SELF_ID)] + [_member(uid) for uid in voice_ids],
+        "voice_states": [
+            {"user_id": str(uid), "channel_id": str(base + 100), "session_id": "s", "deaf": False, "mute": False,
+             "self_deaf": False, "self_mute": False, "self_video": False, "suppress": False}
+            for uid in voice_ids
+        ],
+        "features": [],
+        "threads": [],
+    }
+
+
+def message_payload(gid: int, n: int) -> dict:
+    base = gid * 10_000
+    author = base + 2000 + n % AUTHORS
+    return {
+        "id": str(base * 1000 + n),
+        "channel_id": str(base + n % TEXT_CHANNELS),
+        "guild_id": str(gid),
+        "author": _user(author),
+        "member": {k: v for k, v in _member(author).items() if k != "user"},
+        "content": "x" * 80,
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+def _rss() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def bench(profile: str, guilds: int, messages: int) -> dict:
+    gc.collect()
+    rss0 = _rss()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+
+    bot = commands.Bot(command_prefix="!", **client_options(profile))
+    state = bot._connection
+    # без сети: диспатч событий не нужен, важен только кэш состояния
+    state.dispatch = lambda *args, **kwargs: None  # type: ignore[method-assign]
+    state.user = None
+    for gid in range(1, guilds + 1):
+        state._add_guild_from_data(guild_payload(gid))  # type: ignore[arg-type]
+    for n in range(messages):
+        for gid in range(1, guilds + 1):
+            state.parse_message_create(message_payload(gid, n))  # type: ignore[arg-type]
+
+    gc.collect()
+    mem = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    rss1 = _rss()
+    assert len(state._guilds) == guilds and state._get_guild(1).get_channel(10_000) is not None
+    cached_messages = len(state._messages or ())
+    cached_members = sum(len(g._members) for g in state._guilds.values())
+    del bot, state
+    gc.collect()
+    return {
+        "profile": profile,
+        "guilds": guilds,
+        "messages_per_guild": messages,
+        "memory_bytes": mem,
+        "bytes_per_1000_guilds": round(mem * 1000 / guilds),
+        "rss_delta_bytes": rss1 - rss0 if rss0 is not None and rss1 is not None else None,
+        "cached_messages": cached_messages,
+        "cached_members": cached_members,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--guilds", default="100,1000")
+    ap.add_argument("--messages", type=int, default=20, help="сообщений на гильдию в потоке")
+    ap.add_argument("--profiles", default="default,lean")
+    ap.add_argument("--json", action="store_true", help="вывести результаты одной JSON-строкой")
+    args = ap.parse_args()
+
+    results = []
+    for n in (int(x) for x in args.guilds.split(",")):
+        by_profile = {}
+        for profile in args.profiles.split(","):
+            r = bench(profile, n, args.messages)
+            results.append(r)
+            by_profile[profile] = r
+            if not args.json:
+                print(f"{profile:>8} {n:>6} guilds: mem {r['memory_bytes'] / 2**20:7.1f} MiB "
+                      f"({r['bytes_per_1000_guilds'] / 2**20:.2f} MiB/1000 guilds)  "
+                      f"messages {r['cached_messages']:>5}  members {r['cached_members']:>6}")
+        if not args.json and {"default", "lean"} <= by_profile.keys():
+            saved = by_profile["default"]["bytes_per_1000_guilds"] - by_profile["lean"]["bytes_per_1000_guilds"]
+            print(f"{'':>8} {n:>6} guilds: lean saves {saved / 2**20:.2f} MiB per 1000 guilds")
+    if args.json:
+        print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
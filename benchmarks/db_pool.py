@@ -0,0 +1,81 @@
+"""
+Запросы в секунду: подключение на каждый вызов (как было) против пула Database.
+
+    python benchmarks/db_pool.py --queries 2000 --concurrency 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from cronbot.db import CREATE_SQL, Database  # noqa: E402
+
+QUERY = "SELECT text FROM phrases WHERE guild_id = ?"
+
+
+async def _legacy_query(path: str, gid: int) -> None:
+    # старый Database.connect(): новое соединение, PRAGMA и CREATE_SQL на каждый запрос
+    db = await aiosqlite.connect(path)
+    try:
+        await db.execute("PRAGMA journal_mode=WAL;")
+        await db.execute("PRAGMA foreign_keys=ON;")
+        await db.executescript(CREATE_SQL)
+        await db.commit()
+        cur = await db.execute(QUERY, (gid,))
+        await cur.fetchall()
+    finally:
+        await db.close()
+
+
+async def _pooled_query(db: Database, gid: int) -> None:
+    async with db.acquire() as conn:
+        cur = await conn.execute(QUERY, (gid,))
+        await cur.fetchall()
+
+
+async def _run(n: int, concurrency: int, fn) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with sem:
+            await fn(i % 10)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return n / (time.perf_counter() - t0)
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--pool-size", type=int, default=4)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        async with Database(path, pool_size=args.pool_size) as db:
+            async with db.acquire() as conn:
+                await conn.executemany(
+                    "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, 'now')",
+                    [(g, f"phrase {i}") for g in range(10) for i in range(20)],
+                )
+                await conn.commit()
+
+            before = await _run(args.queries, args.concurrency, lambda g: _legacy_query(path, g))
+            after = await _run(args.queries, args.concurrency, lambda g: _pooled_query(db, g))
+
+    print(f"connect-per-call: {before:8.0f} q/s")
+    print(f"pool ({args.pool_size} conns):  {after:8.0f} q/s  (x{after / before:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Всплеск записей: коммит на каждый вызов из пула (как было) против единственного писателя с групповым коммитом.
+
+    python benchmarks/group_commit.py --writes 2000 --concurrency 32
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from cronbot.db import Database  # noqa: E402
+from cronbot.metrics import DB_WRITE_BATCH  # noqa: E402
+
+INSERT = "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, 'now')"
+
+
+async def _per_call(db: Database, i: int) -> None:
+    async with db.acquire() as conn:
+        await conn.execute(INSERT, (i % 10, f"p{i}"))
+        await conn.commit()
+
+
+async def _grouped(db: Database, i: int) -> None:
+    await db.write(INSERT, (i % 10, f"p{i}"))
+
+
+async def _run(n: int, concurrency: int, fn) -> tuple[float, int]:
+    sem = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with sem:
+            try:
+                await fn(i)
+            except Exception:
+                errors += 1  # database is locked
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return n / (time.perf_counter() - t0), errors
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writes", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--pool-size", type=int, default=4)
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)  # коммит на вызов под нагрузкой сыплет в slow-query лог
+
+    with tempfile.TemporaryDirectory() as tmp:
+        async with Database(str(Path(tmp) / "a.db"), pool_size=args.pool_size) as db:
+            before, before_err = await _run(args.writes, args.concurrency, lambda i: _per_call(db, i))
+        async with Database(str(Path(tmp) / "b.db"), pool_size=args.pool_size) as db:
+            batches0 = DB_WRITE_BATCH.count()
+            after, after_err = await _run(args.writes, args.concurrency, lambda i: _grouped(db, i))
+            commits = DB_WRITE_BATCH.count() - batches0
+
+    print(f"commit-per-call: {before:8.0f} w/s  {args.writes} commits, {before_err} errors")
+    print(f"group commit:    {after:8.0f} w/s  {commits} commits, {after_err} errors  (x{after / before:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+APScheduler против нативного heap-движка: память на N cron-джоб и точность пробуждения.
+
+    python benchmarks/scheduler_engines.py --jobs 1000,10000,100000 --probes 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from cronbot.scheduler import make_scheduler  # noqa: E402
+from cronbot.services.reminders import PRESETS  # noqa: E402
+
+TZ = "Europe/Tallinn"
+PRESET_NAMES = list(PRESETS)
+
+
+async def _noop(**kwargs) -> None:
+    pass
+
+
+async def bench(engine: str, n: int, probes: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+
+    sch = make_scheduler(engine, TZ)
+    sch.start()
+    for i in range(n):
+        sch.add_cron(
+            f"cron:{i}", _noop,
+            hour=i % 24, minute=(i // 24) % 60,
+            expr=PRESETS[PRESET_NAMES[i % len(PRESET_NAMES)]],
+            payload={"channel_id": i, "text": "x", "guild_id": i % 1000},
+        )
+    add_s = time.perf_counter() - t0
+    mem = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    # точность: разовые джобы на ближайшие ~1-2 секунды поверх загруженного планировщика
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def probe(planned: float) -> None:
+        lags.append((time.time() - planned) * 1000)
+        if len(lags) == probes:
+            done.set()
+
+    start = time.time() + 1.0
+    for k in range(probes):
+        planned = start + k * (1.0 / probes)
+        sch.add_once(probe, datetime.fromtimestamp(planned).astimezone(sch.tz), {"planned": planned})
+    try:
+        await asyncio.wait_for(done.wait(), timeout=30)
+    finally:
+        sch.stop()
+
+    lags.sort()
+    return {
+        "engine": engine,
+        "jobs": n,
+        "add_seconds": round(add_s, 3),
+        "memory_bytes": mem,
+        "bytes_per_job": round(mem / n, 1),
+        "lag_ms_p50": round(statistics.median(lags), 2),
+        "lag_ms_p99": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 2),
+        "lag_ms_max": round(lags[-1], 2),
+    }
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", default="1000,10000,100000")
+    ap.add_argument("--probes", type=int, default=50)
+    ap.add_argument("--engines", default="apscheduler,heap")
+    ap.add_argument("--json", action="store_true", help="вывести результаты одной JSON-строкой")
+    args = ap.parse_args()
+
+    results = []
+    for n in (int(x) for x in args.jobs.split(",")):
+        for engine in args.engines.split(","):
+            results.append(await bench(engine, n, args.probes))
+            if not args.json:
+                r = results[-1]
+                print(f"{r['engine']:>11} {r['jobs']:>7} jobs: add {r['add_seconds']:7.2f}s  "
+                      f"mem {r['memory_bytes'] / 2**20:7.1f} MiB ({r['bytes_per_job']:.0f} B/job)  "
+                      f"lag p50 {r['lag_ms_p50']:.1f} ms  p99 {r['lag_ms_p99']:.1f} ms")
+    if args.json:
+        print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
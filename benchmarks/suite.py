@@ -0,0 +1,210 @@
+"""
+Оффлайн-бенчмарки сервисов, планировщика и обработчиков событий. Сеть не нужна:
+Discord-объекты заменены заглушками, БД — временный SQLite.
+
+    python benchmarks/suite.py --guilds 1,50 --rows 10,200 --out bench.json
+    python benchmarks/suite.py --guilds 50 --rows 200 --baseline bench.json
+
+Результат — JSON: метаданные (commit, python) и список кейсов с ops/s, p50/p99 в мс.
+С --baseline печатается сравнение с прошлым прогоном (>1.0 — стало медленнее).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Awaitable, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from cronbot.cogs.confronts import ConfrontsCog  # noqa: E402
+from cronbot.db import Database  # noqa: E402
+from cronbot.services.confronts import ConfrontService  # noqa: E402
+from cronbot.services.phrases import PhraseService  # noqa: E402
+from cronbot.services.reminders import PRESETS, ReminderService  # noqa: E402
+
+TZ = "Europe/Tallinn"
+
+
+async def measure(name: str, params: dict, fn: Callable[[int], Awaitable[object]], ops: int) -> dict:
+    """Последовательно вызвать fn(i) ops раз, вернуть пропускную способность и перцентили."""
+    lat: list[float] = []
+    t0 = time.perf_counter()
+    for i in range(ops):
+        s = time.perf_counter()
+        await fn(i)
+        lat.append(time.perf_counter() - s)
+    total = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "name": name,
+        **params,
+        "ops": ops,
+        "ops_per_s": round(ops / total, 1),
+        "p50_ms": round(statistics.median(lat) * 1000, 4),
+        "p99_ms": round(lat[min(ops - 1, int(ops * 0.99))] * 1000, 4),
+    }
+
+
+async def _fill(db: Database, guilds: int, rows: int) -> None:
+    now = "2024-01-01T00:00:00"
+    presets = list(PRESETS)
+    async with db.acquire() as conn:
+        await conn.executemany(
+            "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, ?)",
+            [(g, f"phrase {g}:{i}", now) for g in range(1, guilds + 1) for i in range(rows)],
+        )
+        await conn.executemany(
+            "INSERT INTO confronts (guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(g, 1000 + i, "👍" if i % 2 else None, "🔥", 1, now) for g in range(1, guilds + 1) for i in range(rows)],
+        )
+        await conn.executemany(
+            "INSERT INTO crons (guild_id, channel_id, user_id, preset, time_h, time_m, tz, text, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(g, g * 10, 1, presets[i % len(presets)], i % 24, i % 60, TZ, f"cron {i}", now)
+             for g in range(1, guilds + 1) for i in range(rows)],
+        )
+        await conn.commit()
+
+
+class _StubMessage:
+    __slots__ = ("id", "guild", "channel", "author", "reactions")
+
+    def __init__(self, mid: int, guild_id: int, author_id: int):
+        self.id = mid
+        self.guild = SimpleNamespace(id=guild_id)
+        self.channel = SimpleNamespace(id=guild_id)
+        self.author = SimpleNamespace(id=author_id, bot=False)
+        self.reactions: list[str] = []
+
+    async def add_reaction(self, emoji: str) -> None:
+        self.reactions.append(emoji)
+
+
+async def bench_services(path: str, guilds: int, rows: int, ops: int) -> list[dict]:
+    params = {"guilds": guilds, "rows": rows}
+    out = []
+    async with Database(path) as db:
+        await _fill(db, guilds, rows)
+        phrases = PhraseService(db)
+        confronts = ConfrontService(db)
+        await confronts.load()
+        reminders = ReminderService(db, TZ)
+        gid = lambda i: i % guilds + 1  # noqa: E731
+
+        out.append(await measure("phrase.get_random", params, lambda i: phrases.get_random(gid(i)), ops))
+        out.append(await measure("confront.get_for_guild", params, lambda i: confronts.get_for_guild(gid(i)), ops))
+        out.append(await measure(
+            "reminder.add_cron", params,
+            lambda i: reminders.add_cron(gid(i), 1, 1, "everyday", "10:30", f"bench {i}"), ops,
+        ))
+        out.append(await measure("reminder.list_crons", params, lambda i: reminders.list_crons(gid(i)), ops))
+
+        # on_message через ког, с заглушками Message/Guild; половина авторов — цели правил
+        cog = ConfrontsCog(SimpleNamespace(user=SimpleNamespace(id=0)), confronts)
+        rnd = random.Random(0)
+
+        async def on_message(i: int) -> None:
+            author = 1000 + rnd.randrange(rows * 2)
+            await cog.on_message(_StubMessage(i, gid(i), author))
+
+        out.append(await measure("cog.confronts.on_message", params, on_message, ops * 10))
+        await cog.events.drain()
+        await cog.events.close()
+        await cog.dispatcher.close()
+    return out
+
+
+async def bench_on_ready(path: str, guilds: int, rows: int) -> dict:
+    """Полный on_ready: restore guilds*rows кронов из БД в планировщик (без сети: tree.sync заглушён)."""
+    os.environ["DB_PATH"] = path
+    os.environ.setdefault("DISCORD_TOKEN", "offline")
+    os.environ["DEFAULT_PHRASE_ENABLED"] = "false"
+    from cronbot.bot import create_bot
+
+    async with Database(path) as db:
+        await _fill(db, guilds, rows)
+
+    async def one(_: int) -> None:
+        bot = await create_bot()
+
+        async def no_sync(*args, **kwargs):
+            return []
+
+        bot.tree.sync = no_sync  # type: ignore[method-assign]
+        try:
+            await bot.on_ready()  # type: ignore[attr-defined]
+        finally:
+            bot._scheduler.stop()  # type: ignore[attr-defined]
+            await bot._db.close()  # type: ignore[attr-defined]
+
+    return await measure("bot.on_ready", {"guilds": guilds, "rows": rows, "crons": guilds * rows}, one, 3)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def _compare(results: list[dict], baseline_path: str) -> None:
+    base = {(r["name"], r["guilds"], r["rows"]): r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    print(f"{'case':<28} {'guilds':>6} {'rows':>6} {'p50 x':>7} {'p99 x':>7}")
+    for r in results:
+        b = base.get((r["name"], r["guilds"], r["rows"]))
+        if b is None:
+            continue
+        p50 = r["p50_ms"] / b["p50_ms"] if b["p50_ms"] else float("nan")
+        p99 = r["p99_ms"] / b["p99_ms"] if b["p99_ms"] else float("nan")
+        print(f"{r['name']:<28} {r['guilds']:>6} {r['rows']:>6} {p50:>7.2f} {p99:>7.2f}")
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--guilds", default="1,50")
+    ap.add_argument("--rows", default="10,200")
+    ap.add_argument("--ops", type=int, default=500)
+    ap.add_argument("--out", help="куда записать JSON (по умолчанию stdout)")
+    ap.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    args = ap.parse_args()
+    logging.disable(logging.INFO)
+
+    results: list[dict] = []
+    for g in (int(x) for x in args.guilds.split(",")):
+        for r in (int(x) for x in args.rows.split(",")):
+            with tempfile.TemporaryDirectory() as tmp:
+                results += await bench_services(str(Path(tmp) / "svc.db"), g, r, args.ops)
+            with tempfile.TemporaryDirectory() as tmp:
+                results.append(await bench_on_ready(str(Path(tmp) / "ready.db"), g, r))
+
+    doc = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "timestamp": int(time.time()),
+        "results": results,
+    }
+    text = json.dumps(doc, ensure_ascii=False, indent=1)
+    if args.out:
+        Path(args.out).write_text(text)
+    else:
+        print(text)
+    if args.baseline:
+        _compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -20,4 +20,5 @@ sudo systemctl restart cronbot
 echo "===> Git reset и зависимости обновлены"
 systemctl status cronbot --no-pager -l | head -n 20
 
-# curl -fsS https://cronbot.example.com/healthz || echo "healthcheck failed"
+# при заданном HEALTH_PORT в .env:
+# sleep 5 && curl -fsS http://127.0.0.1:8080/healthz || echo "healthcheck failed"
@@ -1,18 +1,29 @@
 # src/cronbot/bot.py
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Optional, Callable, Awaitable
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional, Callable, Awaitable
 
 import aiosqlite
-from discord import Intents, Object, TextChannel
+from discord import Intents, MemberCacheFlags, TextChannel
 from discord.ext import commands
 
+from .command_sync import sync_commands
 from .config import Settings
+from .cron_send import RANDOM_MARKER, CronSender
 from .logging_setup import setup_logging
 from .db import Database
-from .scheduler import Scheduler
+from .delivery import DeliveryQueue
+from .health import HealthServer
+from .leader import LeaderLease
+from .reactions import ReactionDispatcher
+from .events import EventPool
+from .metrics import SCHEDULER_JOBS, DELIVERY_QUEUE_DEPTH, GATEWAY_LATENCY, REACTION_QUEUE_DEPTH, EVENT_QUEUE_DEPTH
+from .scheduler import BaseScheduler, CronSpec, make_scheduler
+from .sharding import ALL_SHARDS, ShardFilter
 from .services.reminders import ReminderService, PRESETS, parse_hhmm
 from .services.phrases import PhraseService
 from .cogs.cron import CronCog
@@ -21,47 +32,20 @@ from .cogs.phrases import PhrasesCog
 from .services.confronts import ConfrontService
 from .cogs.confronts import ConfrontsCog
 
-RANDOM_MARKER = "__RANDOM_PHRASE__"
-
-
-def _make_send_fn(bot: commands.Bot, phrase_svc: PhraseService) -> Callable[..., Awaitable[None]]:
-    """
-    Возвращает async-функцию для APScheduler:
-      _send(channel_id:int, text:str, guild_id:int|None=None)
-    Заменяет маркер на случайную фразу.
-    """
-    async def _send(channel_id: int, text: str, guild_id: Optional[int] = None) -> None:
+def _text_channel(bot: commands.Bot) -> Callable[[int], Optional[TextChannel]]:
+    def resolve(channel_id: int) -> Optional[TextChannel]:
         ch = bot.get_channel(channel_id)
-        if not isinstance(ch, TextChannel):
-            return
-
-        if text == RANDOM_MARKER:
-            gid = guild_id or (ch.guild.id if ch and ch.guild else None)
-            phrase = await phrase_svc.get_random(gid) if gid else None
-            await ch.send(phrase or "Добавь фразы через /phrase_add")
-        else:
-            await ch.send(text)
-
-    return _send
+        return ch if isinstance(ch, TextChannel) else None
+    return resolve
 
 
-async def _resolve_default_channel_id(bot: commands.Bot, guild) -> Optional[int]:
+async def _resolve_default_channel_id(bot: commands.Bot, guild, configured: Optional[int] = None) -> Optional[int]:
     """
     Основной канал: guild_settings.default_channel_id → system_channel → первый доступный текстовый.
+    configured — уже прочитанный default_channel_id (бутстрап читает настройки всех гильдий одним запросом).
     """
-    db: Database = bot._db  # type: ignore[attr-defined]
-    conn = await db.connect()
-    try:
-        conn.row_factory = aiosqlite.Row
-        cur = await conn.execute(
-            "SELECT default_channel_id FROM guild_settings WHERE guild_id = ?",
-            (guild.id,)
-        )
-        row = await cur.fetchone()
-        if row and row["default_channel_id"]:
-            return int(row["default_channel_id"])
-    finally:
-        await conn.close()
+    if configured:
+        return int(configured)
 
     me = guild.me
     if guild.system_channel and guild.system_channel.permissions_for(me).send_messages:  # type: ignore[arg-type]
@@ -74,112 +58,166 @@ async def _resolve_default_channel_id(bot: commands.Bot, guild) -> Optional[int]
     return None
 
 
-async def _ensure_default_phrase_cron(
+def _chunks(seq: list, size: int = 500) -> list[list]:
+    # IN (...) режем на куски: у SQLite есть лимит на число параметров
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+
+async def _bootstrap_default_phrase_crons(
     bot: commands.Bot,
-    guild,
+    guilds: list,
     cfg: Settings,
     db: Database,
-    scheduler: Scheduler,
+    scheduler: BaseScheduler,
     phrase_svc: PhraseService,
     send_fn: Callable[..., Awaitable[None]],
 ) -> None:
     """
-    Гарантирует наличие дефолтного крона с рандомной фразой и синхронизирует его время из конфига.
+    Гарантирует наличие дефолтного крона с рандомной фразой во всех гильдиях и синхронизирует его время из конфига.
+    Всё за одну транзакцию писателя: сид фраз, поиск существующих кронов, вставка недостающих (executemany).
     """
     log = logging.getLogger("cronbot")
 
-    if not cfg.DEFAULT_PHRASE_ENABLED:
+    if not cfg.DEFAULT_PHRASE_ENABLED or not guilds:
         return
 
-    # сид фраз для гильдии, если пусто
-    try:
-        inserted = await phrase_svc.seed_if_empty(guild.id, cfg.DEFAULT_PHRASES)
-        if inserted:
-            log.info("Seeded %d phrases for guild %s", inserted, guild.id)
-    except Exception as e:
-        log.exception("Failed to seed phrases for guild %s: %s", guild.id, e)
-
-    # найти существующий дефолтный крон (по маркеру)
-    conn = await db.connect()
-    try:
-        conn.row_factory = aiosqlite.Row
-        cur = await conn.execute(
-            "SELECT * FROM crons WHERE guild_id = ? AND text = ? LIMIT 1",
-            (guild.id, RANDOM_MARKER),
-        )
-        row = await cur.fetchone()
-    finally:
-        await conn.close()
-
-    # парсим время из конфига
+    t0 = time.perf_counter()
     h, m = parse_hhmm(cfg.DEFAULT_PHRASE_TIME)
-    expr = PRESETS[cfg.DEFAULT_PHRASE_PRESET]
-
-    if row is None:
-        ch_id = await _resolve_default_channel_id(bot, guild)
-        if ch_id is None:
-            log.warning("No writable channel in guild %s; skipping default phrase cron", guild.id)
-            return
+    preset = cfg.DEFAULT_PHRASE_PRESET
+    expr = PRESETS[preset]
+    by_id = {g.id: g for g in guilds}
+    now = datetime.now(timezone.utc).isoformat()
+    phrases = [p for p in cfg.DEFAULT_PHRASES if p.strip()]
+
+    # чтение-затем-запись целиком в одной транзакции писателя
+    async def apply(conn) -> tuple[dict[int, aiosqlite.Row], list[int], list[tuple], list[int]]:
+        with_phrases: set[int] = set()
+        existing: dict[int, aiosqlite.Row] = {}
+        configured: dict[int, int] = {}
+        for chunk in _chunks(list(by_id)):
+            marks = ",".join("?" * len(chunk))
+            cur = await conn.execute(f"SELECT DISTINCT guild_id FROM phrases WHERE guild_id IN ({marks})", chunk)
+            with_phrases.update(r["guild_id"] for r in await cur.fetchall())
+            cur = await conn.execute(
+                f"SELECT id, guild_id, channel_id, preset, time_h, time_m FROM crons "
+                f"WHERE text = ? AND guild_id IN ({marks})",
+                (RANDOM_MARKER, *chunk),
+            )
+            for r in await cur.fetchall():
+                existing.setdefault(r["guild_id"], r)
+            cur = await conn.execute(
+                f"SELECT guild_id, default_channel_id FROM guild_settings WHERE guild_id IN ({marks})", chunk
+            )
+            configured.update((r["guild_id"], r["default_channel_id"]) for r in await cur.fetchall())
+
+        # сид фраз для пустых гильдий
+        to_seed = [gid for gid in by_id if gid not in with_phrases]
+        if phrases and to_seed:
+            await conn.executemany(
+                "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, ?)",
+                [(gid, p, now) for gid in to_seed for p in phrases],
+            )
 
-        conn = await db.connect()
-        try:
-            await conn.execute(
+        # каналы для новых кронов резолвим параллельно
+        missing = [gid for gid in by_id if gid not in existing]
+        channels = await asyncio.gather(
+            *(_resolve_default_channel_id(bot, by_id[gid], configured.get(gid)) for gid in missing)
+        )
+        new_rows = []
+        for gid, ch_id in zip(missing, channels):
+            if ch_id is None:
+                log.warning("No writable channel in guild %s; skipping default phrase cron", gid)
+                continue
+            new_rows.append((gid, ch_id, bot.user.id, preset, h, m, scheduler.tz.key, RANDOM_MARKER, None, now))
+        if new_rows:
+            await conn.executemany(
                 "INSERT INTO crons (guild_id, channel_id, user_id, preset, time_h, time_m, tz, text, targetUser, created_at) "
                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (
-                    guild.id,
-                    ch_id,
-                    bot.user.id,                        # creator — сам бот
-                    cfg.DEFAULT_PHRASE_PRESET,
-                    h,
-                    m,
-                    scheduler.tz.key,
-                    RANDOM_MARKER,
-                    None,
-                    datetime.utcnow().isoformat(),
-                ),
+                new_rows,
             )
-            await conn.commit()
-            cur = await conn.execute("SELECT last_insert_rowid()")
-            rid = (await cur.fetchone())[0]
-        finally:
-            await conn.close()
 
+        # есть запись — обновим время/пресет при расхождении
+        stale = [r["id"] for r in existing.values() if (r["time_h"], r["time_m"], r["preset"]) != (h, m, preset)]
+        if stale:
+            await conn.executemany(
+                "UPDATE crons SET preset = ?, time_h = ?, time_m = ? WHERE id = ?",
+                [(preset, h, m, rid) for rid in stale],
+            )
+
+        # id вставленных строк: executemany не отдаёт lastrowid для каждой; свои записи видны до коммита
+        created = [row[0] for row in new_rows]
+        for chunk in _chunks(created):
+            marks = ",".join("?" * len(chunk))
+            cur = await conn.execute(
+                f"SELECT id, guild_id, channel_id FROM crons WHERE text = ? AND guild_id IN ({marks})",
+                (RANDOM_MARKER, *chunk),
+            )
+            for r in await cur.fetchall():
+                existing.setdefault(r["guild_id"], r)
+        return existing, to_seed, new_rows, stale
+
+    existing, to_seed, new_rows, stale = await db.transaction(apply)
+
+    for gid in to_seed:
+        phrase_svc.invalidate(gid)
+
+    # add_cron идемпотентен — неизменённая джоба не пересоздаётся
+    for gid, row in existing.items():
         scheduler.add_cron(
-            job_id=f"cron:{rid}",
+            job_id=f"cron:{row['id']}",
             send_fn=send_fn,
             hour=h,
             minute=m,
             expr=expr,
-            payload={"channel_id": ch_id, "text": RANDOM_MARKER, "guild_id": guild.id},
+            payload={"channel_id": row["channel_id"], "text": RANDOM_MARKER, "guild_id": gid},
         )
-        log.info("Default phrase cron created for guild %s at %02d:%02d", guild.id, h, m)
-        return
 
-    # есть запись — обновим время/пресет при расхождении
-    need_update = (row["time_h"] != h) or (row["time_m"] != m) or (row["preset"] != cfg.DEFAULT_PHRASE_PRESET)
-    if need_update:
-        conn = await db.connect()
-        try:
-            await conn.execute(
-                "UPDATE crons SET preset = ?, time_h = ?, time_m = ? WHERE id = ?",
-                (cfg.DEFAULT_PHRASE_PRESET, h, m, row["id"]),
-            )
-            await conn.commit()
-        finally:
-            await conn.close()
-
-    # запланировать или пересоздать джобу (remove внутри add_cron уже делается)
-    scheduler.add_cron(
-        job_id=f"cron:{row['id']}",
-        send_fn=send_fn,
-        hour=h,
-        minute=m,
-        expr=expr,
-        payload={"channel_id": row["channel_id"], "text": RANDOM_MARKER, "guild_id": guild.id},
+    log.info(
+        "Default phrase crons bootstrapped for %d guilds in %.1f ms: seeded %d, created %d, updated %d",
+        len(by_id), (time.perf_counter() - t0) * 1000, len(to_seed) if phrases else 0, len(new_rows), len(stale),
     )
-    if need_update:
-        log.info("Default phrase cron updated for guild %s to %02d:%02d", guild.id, h, m)
+
+
+def client_options(profile: str = "default", max_messages: int | None = None) -> dict[str, Any]:
+    """
+    Аргументы клиента discord.py под профиль CLIENT_PROFILE.
+    default — Intents.default() и кэши discord.py как есть.
+    lean — только то, чем бот пользуется: гильдии и каналы (get_channel), сообщения гильдий
+    (id автора) и реакции. Без кэша сообщений (автора держит LRU ConfrontsCog), без кэша
+    участников, эмодзи, стикеров и голосовых состояний, без чанкинга на старте.
+    max_messages — переопределить размер кэша сообщений; 0 — выключить.
+    """
+    if profile == "default":
+        opts: dict[str, Any] = {"intents": Intents.default()}
+    elif profile == "lean":
+        opts = {
+            "intents": Intents(guilds=True, guild_messages=True, guild_reactions=True),
+            "max_messages": None,
+            "member_cache_flags": MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+        }
+    else:
+        raise ValueError(f"Unknown client profile: {profile!r}")
+    if max_messages is not None:
+        # у discord.py 0 значит «по умолчанию 1000», выключает кэш только None
+        opts["max_messages"] = max_messages or None
+    return opts
+
+
+def _make_client(cfg: Settings, options: dict[str, Any]) -> tuple[commands.Bot, ShardFilter]:
+    """
+    Клиент под режим шардинга и фильтр «своих» гильдий для БД.
+    AUTO_SHARD — все шарды в этом процессе, фильтровать нечего;
+    SHARD_ID/SHARD_COUNT — процесс держит один шард, грузим только его гильдии.
+    """
+    if cfg.AUTO_SHARD:
+        return commands.AutoShardedBot(command_prefix="!", shard_count=cfg.SHARD_COUNT, **options), ALL_SHARDS
+    if cfg.SHARD_ID is None and cfg.SHARD_COUNT is None:
+        return commands.Bot(command_prefix="!", **options), ALL_SHARDS
+    if cfg.SHARD_ID is None or not cfg.SHARD_COUNT or not 0 <= cfg.SHARD_ID < cfg.SHARD_COUNT:
+        raise ValueError("SHARD_ID and SHARD_COUNT must be set together, with 0 <= SHARD_ID < SHARD_COUNT")
+    bot = commands.Bot(command_prefix="!", shard_id=cfg.SHARD_ID, shard_count=cfg.SHARD_COUNT, **options)
+    return bot, ShardFilter(cfg.SHARD_ID, cfg.SHARD_COUNT)
 
 
 async def create_bot() -> commands.Bot:
@@ -190,16 +228,38 @@ async def create_bot() -> commands.Bot:
     log = logging.getLogger("cronbot")
     cfg = Settings()
 
-    intents = Intents.default()
-    bot = commands.Bot(command_prefix="!", intents=intents)
+    bot, shard = _make_client(cfg, client_options(cfg.CLIENT_PROFILE, cfg.CLIENT_MAX_MESSAGES))
 
     # инфраструктура
-    db = Database(cfg.DB_PATH)
-    scheduler = Scheduler(cfg.TZ)
+    db = Database(cfg.DB_PATH, pool_size=cfg.DB_POOL_SIZE, slow_query_ms=cfg.DB_SLOW_QUERY_MS,
+                  write_window_ms=cfg.DB_WRITE_WINDOW_MS)
+    scheduler = make_scheduler(cfg.SCHEDULER_ENGINE, cfg.TZ, jitter_window=cfg.SCHEDULER_JITTER_SECONDS,
+                               prefetch_lead=cfg.CRON_PREFETCH_SECONDS)
     reminder_service = ReminderService(db, cfg.TZ)
-    phrase_service = PhraseService(db)
-    send_fn = _make_send_fn(bot, phrase_service)
+    phrase_service = PhraseService(db, shuffle_bag=cfg.PHRASE_SHUFFLE_BAG)
+    delivery = DeliveryQueue(
+        _text_channel(bot),
+        rate=cfg.DELIVERY_RATE,
+        burst=cfg.DELIVERY_BURST,
+        concurrency=cfg.DELIVERY_CONCURRENCY,
+        max_retries=cfg.DELIVERY_MAX_RETRIES,
+    )
+    send_fn = CronSender(_text_channel(bot), phrase_service, delivery)
     confront_service = ConfrontService(db)
+    reactions = ReactionDispatcher(
+        debounce=cfg.REACTION_DEBOUNCE_SECONDS,
+        user_cooldown=cfg.REACTION_USER_COOLDOWN_SECONDS,
+        channel_cooldown=cfg.REACTION_CHANNEL_COOLDOWN_SECONDS,
+        concurrency=cfg.REACTION_CONCURRENCY,
+        workers=cfg.REACTION_WORKERS,
+        max_queue=cfg.REACTION_QUEUE_SIZE,
+    )
+    events = EventPool(
+        "confronts",
+        workers=cfg.EVENT_WORKERS,
+        max_queue=cfg.EVENT_QUEUE_SIZE,
+        overflow=cfg.EVENT_OVERFLOW,
+    )
 
     # простой DI в объект бота
     bot._cfg = cfg                 # type: ignore[attr-defined]
@@ -208,22 +268,61 @@ async def create_bot() -> commands.Bot:
     bot._service = reminder_service# type: ignore[attr-defined]
     bot._phrases = phrase_service  # type: ignore[attr-defined]
     bot._send_fn = send_fn         # type: ignore[attr-defined]
+    bot._delivery = delivery       # type: ignore[attr-defined]
     bot._confronts = confront_service # type: ignore[attr-defined]
-
-    # коги
-    await bot.add_cog(CronCog(bot, reminder_service, scheduler))
-    await bot.add_cog(MiscCog(bot, cfg.TZ))
-    await bot.add_cog(PhrasesCog(bot, phrase_service))
-    await bot.add_cog(ConfrontsCog(bot, confront_service))
-
-    @bot.event
-    async def on_ready():
-        log.info("Logged in as %s", bot.user)
-
-        # восстановить все задачи из БД
-        async for row in db.iter_crons():
-            scheduler.add_cron(
-                job_id=f"cron:{row['id']}",
+    bot._reactions = reactions     # type: ignore[attr-defined]
+    bot._events = events           # type: ignore[attr-defined]
+    bot._shard = shard             # type: ignore[attr-defined]
+
+    # hot-standby: планировщик и ответы на команды — только у держателя аренды
+    lease = LeaderLease(db, holder=cfg.LEADER_ID, ttl=cfg.LEADER_LEASE_TTL) if cfg.LEADER_LEASE else None
+    bot._lease = lease             # type: ignore[attr-defined]
+    if lease is not None:
+        scheduler.fence = lease.is_leader
+
+        async def leader_only(interaction) -> bool:
+            return lease.is_leader()
+        bot.tree.interaction_check = leader_only  # type: ignore[method-assign]
+
+    # метрики, которые дешевле считать в момент скрейпа
+    SCHEDULER_JOBS.set_function(scheduler.cron_count, kind="crons")
+    SCHEDULER_JOBS.set_function(scheduler.group_count, kind="groups")
+    DELIVERY_QUEUE_DEPTH.set_function(lambda: delivery.queue_depth)
+    REACTION_QUEUE_DEPTH.set_function(lambda: reactions.queue_depth)
+    EVENT_QUEUE_DEPTH.set_function(lambda: events.queue_depth, cog=events.name)
+    GATEWAY_LATENCY.set_function(lambda: bot.latency)
+
+    health = (HealthServer(bot, db, scheduler, cfg.HEALTH_HOST, cfg.HEALTH_PORT, lease=lease)
+              if cfg.HEALTH_PORT else None)
+    bot._health = health           # type: ignore[attr-defined]
+    if health is not None:
+        async def setup_hook() -> None:
+            await health.start()
+        bot.setup_hook = setup_hook  # type: ignore[method-assign]
+
+    # пул открываем здесь; если сборка упадёт — закрываем, иначе потоки aiosqlite не дадут выйти
+    await db.open()
+    try:
+        await confront_service.load(shard)
+        # коги
+        await bot.add_cog(CronCog(bot, reminder_service, scheduler, send_fn))
+        await bot.add_cog(MiscCog(bot, cfg.TZ, reminder_service, scheduler, delivery))
+        await bot.add_cog(PhrasesCog(bot, phrase_service))
+        await bot.add_cog(ConfrontsCog(
+            bot, confront_service, cfg.CONFRONT_AUTHOR_CACHE_SIZE,
+            is_active=lease.is_leader if lease is not None else None,
+            dispatcher=reactions,
+            events=events,
+        ))
+    except BaseException:
+        await db.close()
+        raise
+
+    async def restore(bootstrap: bool = True) -> None:
+        # восстановить задачи из БД: diff против живых джоб, трогаем только отличающиеся
+        desired = {}
+        async for row in db.iter_crons(shard=shard):
+            desired[f"cron:{row['id']}"] = CronSpec(
                 send_fn=send_fn,
                 hour=row["time_h"],
                 minute=row["time_m"],
@@ -234,12 +333,15 @@ async def create_bot() -> commands.Bot:
                     "guild_id": row["guild_id"],
                 },
             )
+        added, updated, removed = scheduler.reconcile(desired)
+        log.info("Cron jobs reconciled: +%d ~%d -%d", added, updated, removed)
 
-        # дефолтный крон с фразами на основе конфига (создать/обновить)
-        for guild in bot.guilds:
-            await _ensure_default_phrase_cron(
+        # дефолтный крон с фразами на основе конфига (создать/обновить) — пачкой для всех гильдий.
+        # Пишет в БД, поэтому standby его не делает: выполнит при захвате аренды
+        if bootstrap:
+            await _bootstrap_default_phrase_crons(
                 bot=bot,
-                guild=guild,
+                guilds=[g for g in bot.guilds if shard.owns(g.id)],
                 cfg=cfg,
                 db=db,
                 scheduler=scheduler,
@@ -247,15 +349,57 @@ async def create_bot() -> commands.Bot:
                 send_fn=send_fn,
             )
 
-        scheduler.start()
+        # разовые напоминания, пережившие рестарт
+        misc = bot.get_cog("MiscCog")
+        if isinstance(misc, MiscCog):
+            await misc.restore_reminders(
+                cfg.REMIND_CATCHUP, cfg.REMIND_CATCHUP_MAX_MINUTES, cfg.REMIND_GC_BATCH, shard
+            )
+
+    if lease is not None:
+        async def on_acquire() -> None:
+            # пока были standby, лидер мог добавить кроны/правила/напоминания — досинхронизируемся
+            await confront_service.load(shard)
+            await restore()
+            scheduler.resume()
+
+        async def on_lose() -> None:
+            scheduler.pause()
+
+        lease.on_acquire = on_acquire
+        lease.on_lose = on_lose
+
+    restored = False
+
+    @bot.event
+    async def on_ready():
+        nonlocal restored
+        log.info("Logged in as %s", bot.user)
+
+        # on_ready прилетает на каждый реконнект гейтвея; джобы живут в процессе,
+        # поэтому полное восстановление и sync команд — ровно один раз
+        if restored:
+            log.info("Gateway reconnected; scheduler state kept (%d crons)", scheduler.cron_count())
+            return
+        restored = True
+
+        await restore(bootstrap=lease is None)
+        if lease is None:
+            scheduler.start()
+        else:
+            # standby держит джобы на паузе; аренда запустит их, когда достанется нам
+            scheduler.pause()
+            lease.start()
 
-        # sync команд: для разработки можно указать GUILD_IDS в .env
+        # sync команд: для разработки можно указать GUILD_IDS в .env.
+        # Гильдию синкает её шард, глобальные команды — только шард 0; дерево не менялось — sync не зовём
+        scopes: list[int | None]
         if cfg.GUILD_IDS:
-            for gid in cfg.GUILD_IDS:
-                await bot.tree.sync(guild=Object(id=gid))
-                log.info("Slash commands synced for guild %s", gid)
+            scopes = [gid for gid in cfg.GUILD_IDS if shard.owns(gid)]
         else:
-            await bot.tree.sync(guild=None)
-            log.info("Slash commands synced globally")
+            scopes = [None] if shard.owns(None) else []
+        if scopes:
+            await sync_commands(bot.tree, db, scopes, force=cfg.COMMAND_SYNC_FORCE,
+                                concurrency=cfg.COMMAND_SYNC_CONCURRENCY)
 
     return bot
@@ -0,0 +1,163 @@
+"""
+Потоковый импорт/экспорт для /..._import и /..._export: txt (строка — запись), JSONL и CSV.
+Вложение читаем построчно по HTTP, записи отдаём пачками — в памяти одна пачка,
+а не весь файл. Экспорт пишется в SpooledTemporaryFile: большой файл уйдёт на диск.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import tempfile
+from dataclasses import dataclass
+from typing import IO, AsyncIterable, AsyncIterator, Awaitable, Callable, Literal
+
+import aiohttp
+import discord
+
+Format = Literal["txt", "jsonl", "csv"]
+FORMATS: tuple[str, ...] = ("txt", "jsonl", "csv")
+CHUNK = 500
+# больше не читаем: на вложения Discord и так есть лимит, а импорт не должен жить вечно
+MAX_IMPORT_BYTES = 8 * 1024 * 1024
+
+
+class BulkFormatError(ValueError):
+    """Файл целиком не годится: неизвестный формат или слишком большой."""
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    skipped: int = 0  # дубликаты: уже были в БД или повторились в файле
+    invalid: int = 0
+
+    def __str__(self) -> str:
+        return f"добавлено {self.inserted}, дубликатов {self.skipped}, битых строк {self.invalid}"
+
+
+def detect_format(filename: str) -> Format:
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else "txt"
+    if ext in ("txt", "text"):
+        return "txt"
+    if ext in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    if ext == "csv":
+        return "csv"
+    raise BulkFormatError(f"Неизвестный формат файла: .{ext} (нужен .txt, .jsonl или .csv)")
+
+
+async def iter_url_lines(url: str, max_bytes: int = MAX_IMPORT_BYTES) -> AsyncIterator[str]:
+    """Строки вложения по мере скачивания."""
+    read = 0
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            async for raw in resp.content:
+                read += len(raw)
+                if read > max_bytes:
+                    raise BulkFormatError(f"Файл больше {max_bytes // (1024 * 1024)} МБ")
+                yield raw.decode("utf-8-sig").rstrip("\r\n")
+
+
+async def iter_records(lines: AsyncIterable[str], fmt: Format, text_field: str = "text") -> AsyncIterator[dict | None]:
+    """
+    Строки -> словари. txt: вся строка — поле text_field. csv: первая строка — заголовок,
+    поля с переводом строки не поддерживаются (их и не бывает: опции slash-команд однострочные).
+    Битая строка отдаётся как None, чтобы вызывающий посчитал её.
+    """
+    header: list[str] | None = None
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "txt":
+            yield {text_field: line.strip()}
+        elif fmt == "jsonl":
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            yield obj if isinstance(obj, dict) else None
+        else:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            yield dict(zip(header, values)) if len(values) == len(header) else None
+
+
+def records_from_attachment(url: str, filename: str, size: int, text_field: str = "text") -> AsyncIterator[dict | None]:
+    """Записи вложения; формат — по расширению. Ошибку формата/размера бросаем до скачивания."""
+    fmt = detect_format(filename)
+    if size > MAX_IMPORT_BYTES:
+        raise BulkFormatError(f"Файл больше {MAX_IMPORT_BYTES // (1024 * 1024)} МБ")
+    return iter_records(iter_url_lines(url), fmt, text_field)
+
+
+async def chunks(records: AsyncIterable[dict | None], size: int = CHUNK) -> AsyncIterator[list[dict | None]]:
+    batch: list[dict | None] = []
+    async for r in records:
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def open_export() -> IO[bytes]:
+    return tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+
+
+async def export_to_file(rows: AsyncIterable[dict], fmt: Format, fields: list[str]) -> tuple[IO[bytes], int]:
+    out = open_export()
+    n = await write_records(out, rows, fmt, fields)
+    return out, n
+
+
+async def write_records(out: IO[bytes], rows: AsyncIterable[dict], fmt: Format, fields: list[str]) -> int:
+    """Записать строки в out в нужном формате. txt — только первое поле. Вернёт число записей."""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.DictWriter(text, fieldnames=fields, extrasaction="ignore") if fmt == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+    n = 0
+    async for row in rows:
+        if fmt == "txt":
+            text.write(str(row[fields[0]]).replace("\n", " ") + "\n")
+        elif fmt == "jsonl":
+            text.write(json.dumps({f: row.get(f) for f in fields}, ensure_ascii=False) + "\n")
+        else:
+            assert writer is not None
+            writer.writerow(row)
+        n += 1
+    text.flush()
+    text.detach()
+    out.seek(0)
+    return n
+
+
+
+async def run_import(itx: discord.Interaction, attachment: discord.Attachment,
+                     do_import: Callable[[AsyncIterator[dict | None]], Awaitable[ImportResult]],
+                     text_field: str = "text") -> None:
+    """Общий ход /..._import: ответ уже defer'нут, ошибки формата — сообщением пользователю."""
+    try:
+        records = records_from_attachment(attachment.url, attachment.filename, attachment.size, text_field)
+        result = await do_import(records)
+    except (BulkFormatError, aiohttp.ClientError) as e:
+        await itx.followup.send(f"Не получилось прочитать файл: {e}")
+        return
+    await itx.followup.send(f"Импорт: {result}.")
+
+
+async def send_export(itx: discord.Interaction, rows: AsyncIterable[dict], fmt: Format,
+                      fields: list[str], name: str) -> None:
+    out, n = await export_to_file(rows, fmt, fields)
+    if not n:
+        out.close()
+        await itx.followup.send("Нечего выгружать.")
+        return
+    with out:
+        await itx.followup.send(f"Записей: {n}.", file=discord.File(out, filename=f"{name}.{fmt}"))
@@ -1,18 +1,32 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Callable, Optional
 
 from discord.ext import commands
-from discord import app_commands, Interaction, RawReactionActionEvent, PartialEmoji, Message, Member
+from discord import app_commands, Attachment, Interaction, RawReactionActionEvent, PartialEmoji, Message, Member
 
+from ..bulk import FORMATS, run_import, send_export
+from ..cache import LRUCache
+from ..events import EventPool
+from ..pagination import send_paged
+from ..reactions import ReactionDispatcher
 from ..services.confronts import ConfrontService
 
 def _as_str_emoji(emoji: PartialEmoji | str) -> str:
     return str(emoji)
 
 class ConfrontsCog(commands.Cog):
-    def __init__(self, bot: commands.Bot, svc: ConfrontService):
+    def __init__(self, bot: commands.Bot, svc: ConfrontService, author_cache_size: int = 10_000,
+                 is_active: Callable[[], bool] | None = None, dispatcher: ReactionDispatcher | None = None,
+                 events: EventPool | None = None):
         self.bot = bot
         self.svc = svc
+        self.dispatcher = dispatcher or ReactionDispatcher()
+        # листенеры только ставят событие в очередь; БД и REST — в воркерах пула
+        self.events = events or EventPool("confronts")
+        # hot-standby: реакции ставит только лидер, кэш авторов standby наполняет всё равно
+        self._is_active = is_active
+        # message_id -> author_id, наполняется из on_message: чтобы не делать fetch_message на реакции
+        self._authors: LRUCache[int, int] = LRUCache(author_cache_size)
 
 
     @app_commands.command(name="confront", description="Создать правило: user [+ reaction] -> counterReaction")
@@ -42,16 +56,19 @@ class ConfrontsCog(commands.Cog):
 
     @app_commands.command(name="confront_list", description="Показать все правила для этого сервера")
     async def confront_list(self, itx: Interaction):
-        rows = await self.svc.list(itx.guild_id)
-        if not rows:
-            await itx.response.send_message("Пусто. Ни одной пассивно-агрессивной автоматики.", ephemeral=True)
-            return
-        lines = []
-        for r in rows:
-            who = f"<@{r['target_user_id']}>"
-            trig = f"`{r['trigger_reaction']}`" if r['trigger_reaction'] else "все сообщения"
-            lines.append(f"#{r['id']}: {who} — {trig} → `{r['counter_reaction']}` (by <@{r['created_by']}>)")
-        await itx.response.send_message("\n".join(lines), ephemeral=True)
+        await itx.response.defer(ephemeral=True)
+        gid = itx.guild_id
+
+        def render(rows) -> list[str]:
+            lines = []
+            for r in rows:
+                who = f"<@{r['target_user_id']}>"
+                trig = f"`{r['trigger_reaction']}`" if r['trigger_reaction'] else "все сообщения"
+                lines.append(f"#{r['id']}: {who} — {trig} → `{r['counter_reaction']}` (by <@{r['created_by']}>)")
+            return lines
+
+        await send_paged(itx, lambda **kw: self.svc.page(gid, **kw), render,
+                         "Пусто. Ни одной пассивно-агрессивной автоматики.")
 
     @app_commands.command(name="confront_remove", description="Удалить правило по id")
     @app_commands.describe(id="ID правила из /confront_list")
@@ -62,8 +79,25 @@ class ConfrontsCog(commands.Cog):
         else:
             await itx.response.send_message("Не нашёл такое правило. Проверяй id.", ephemeral=True)
 
+    @app_commands.command(name="confront_import", description="Импорт правил из файла (.jsonl или .csv)")
+    @app_commands.describe(file="Поля: target_user_id, counter_reaction, trigger_reaction (необязательно)")
+    @app_commands.default_permissions(manage_guild=True)
+    async def confront_import(self, itx: Interaction, file: Attachment):
+        await itx.response.defer(ephemeral=True)
+        await run_import(itx, file, lambda records: self.svc.import_rules(itx.guild_id, itx.user.id, records))
+
+    @app_commands.command(name="confront_export", description="Выгрузить правила файлом")
+    @app_commands.choices(format=[app_commands.Choice(name=f, value=f) for f in FORMATS if f != "txt"])
+    async def confront_export(self, itx: Interaction, format: app_commands.Choice[str]):
+        await itx.response.defer(ephemeral=True)
+        await send_export(itx, self.svc.export_rules(itx.guild_id), format.value,  # type: ignore[arg-type]
+                          ["target_user_id", "trigger_reaction", "counter_reaction"], "confronts")
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: RawReactionActionEvent):
+        await self.events.submit("on_raw_reaction_add", self._handle_reaction, payload)
+
+    async def _handle_reaction(self, payload: RawReactionActionEvent):
         if not payload.guild_id:
             return
 
@@ -71,52 +105,52 @@ class ConfrontsCog(commands.Cog):
         if payload.user_id == self.bot.user.id:
             return
 
-        # достаём сообщение и автора
-        channel = self.bot.get_channel(payload.channel_id) or await self.bot.fetch_channel(payload.channel_id)
-        try:
-            msg = await channel.fetch_message(payload.message_id)
-        except Exception:
+        if self._is_active is not None and not self._is_active():
             return
 
-        if not msg.author:
+        # пред-фильтр: нет правил с таким эмодзи в гильдии — никаких сетевых вызовов
+        emoji = _as_str_emoji(payload.emoji)
+        if not self.svc.is_watched(payload.guild_id, emoji):
             return
 
-        # берём все конронфты гильдии и фильтруем по автору и триггеру
-        rows = await self.svc.get_for_guild(payload.guild_id)
-        if not rows:
-            return
+        # автор: из события (discord.py 2.4+), из LRU-кэша, и только в крайнем случае fetch_message
+        author_id = payload.message_author_id or self._authors.get(payload.message_id)
+        if author_id is not None:
+            rules = self.svc.reaction_rules(payload.guild_id, author_id, emoji)
+            if not rules:
+                return
 
-        trig_emoji = _as_str_emoji(payload.emoji)
-        for r in rows:
-            if r["target_user_id"] != msg.author.id:
-                continue
-            if not r["trigger_reaction"]:
-                # это правило не про реакции, оно про любые сообщения
-                continue
-            if r["trigger_reaction"] != trig_emoji:
-                continue
+        channel = self.bot.get_channel(payload.channel_id) or await self.bot.fetch_channel(payload.channel_id)
+        if author_id is not None:
+            msg = channel.get_partial_message(payload.message_id)
+        else:
             try:
-                await msg.add_reaction(r["counter_reaction"])
+                msg = await channel.fetch_message(payload.message_id)
             except Exception:
-                pass
+                return
+            if not msg.author:
+                return
+            author_id = msg.author.id
+            self._authors.put(msg.id, author_id)
+            rules = self.svc.reaction_rules(payload.guild_id, author_id, emoji)
+
+        self.dispatcher.submit(payload.guild_id, payload.channel_id, author_id, msg,
+                               [r.counter_reaction for r in rules])
 
     @commands.Cog.listener()
     async def on_message(self, message: Message):
+        await self.events.submit("on_message", self._handle_message, message)
+
+    async def _handle_message(self, message: Message):
         # DM не трогаем, самого бота не трогаем
         if message.guild is None or message.author.bot:
             return
 
-        rows = await self.svc.get_for_guild(message.guild.id)
-        if not rows:
-            return
+        self._authors.put(message.id, message.author.id)
 
-        for r in rows:
-            if r["target_user_id"] != message.author.id:
-                continue
-            # для правил без триггер-реакции: срабатывает на каждое сообщение
-            if r["trigger_reaction"] is not None:
-                continue
-            try:
-                await message.add_reaction(r["counter_reaction"])
-            except Exception:
-                pass
+        # частый случай — правил для автора нет: один lookup в dict, без I/O
+        rules = self.svc.message_rules(message.guild.id, message.author.id)
+        if not rules or (self._is_active is not None and not self._is_active()):
+            return
+        self.dispatcher.submit(message.guild.id, message.channel.id, message.author.id, message,
+                               [r.counter_reaction for r in rules])
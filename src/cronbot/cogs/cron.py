@@ -1,26 +1,18 @@
-from discord import app_commands, Interaction, TextChannel, User
+from discord import app_commands, Attachment, Interaction, TextChannel, User
 from discord.ext import commands
 from ..services.reminders import ReminderService, PRESETS
-from ..scheduler import Scheduler
+from ..scheduler import BaseScheduler, CronSpec
+from ..cron_send import CronSender
+from ..bulk import FORMATS, run_import, send_export
+from ..pagination import send_paged
 
 class CronCog(commands.Cog):
-    def __init__(self, bot: commands.Bot, service: ReminderService, scheduler: Scheduler):
+    def __init__(self, bot: commands.Bot, service: ReminderService, scheduler: BaseScheduler, sender: CronSender):
         self.bot = bot
         self.service = service
         self.scheduler = scheduler
-
-    async def _send(self, channel_id:int, text:str, guild_id:int|None=None):
-        from ..services.phrases import PhraseService
-        channel = self.bot.get_channel(channel_id)
-        if not isinstance(channel, TextChannel):
-            return
-        if text == "__RANDOM_PHRASE__":
-            phrase = await PhraseService(self.bot._db).get_random(guild_id or channel.guild.id)  # type: ignore[attr-defined]
-            if phrase is None:
-                phrase = "Добавь фразы через /phrase_add"
-            await channel.send(phrase)
-        else:
-            await channel.send(text)
+        # тот же send_fn, что у восстановленных и дефолтных кронов: один путь доставки
+        self.sender = sender
 
     @app_commands.command(name="addcron", description="Добавить повторяющееся сообщение")
     @app_commands.describe(preset="everyday, weekdays, weekend, mon..sun", time="HH:MM", text="Текст", channel="Канал",  target_user="Кого тегать (по умолчанию — создателя)")
@@ -45,29 +37,39 @@ class CronCog(commands.Cog):
             await itx.followup.send(str(e)); return
 
         # запланировать
-        expr = PRESETS[preset.value]
         h, m = map(int, time.split(":"))
-        mention_text = f"<@{target_user.id}> {text}" if target_user else f"<@{itx.user.id}> {text}"
-        self.scheduler.add_cron(
-            job_id=f"cron:{rowid}",
-            send_fn=self._send,
-            hour=h, minute=m, expr=expr,
-            payload={"channel_id": ch.id, "text": mention_text, "guild_id": itx.guild_id},
-        )
+        spec = self._spec(ch.id, preset.value, h, m, text, target_user.id if target_user else itx.user.id, itx.guild_id)
+        self.scheduler.add_cron(f"cron:{rowid}", spec.send_fn, hour=spec.hour, minute=spec.minute,
+                                expr=spec.expr, payload=spec.payload)
         await itx.followup.send(
             f"Создано: ID `{rowid}`, {preset.value} {time}, канал <#{ch.id}>, "
             f"тег: {target_user.mention if target_user else itx.user.mention}"
         )
 
+    def _spec(self, channel_id:int, preset:str, h:int, m:int, text:str, mention_id:int, guild_id:int|None) -> CronSpec:
+        return CronSpec(
+            send_fn=self.sender, hour=h, minute=m, expr=PRESETS[preset],
+            payload={"channel_id": channel_id, "text": f"<@{mention_id}> {text}", "guild_id": guild_id},
+        )
+
+    def _fire_time(self, r) -> str:
+        """Заданное время и, если планировщик разнёс джобу, фактическое."""
+        base = f"{r['time_h']:02d}:{r['time_m']:02d}"
+        eff = self.scheduler.fire_time(f"cron:{r['id']}")
+        if eff is None or eff == (r['time_h'], r['time_m'], 0):
+            return base
+        return f"{base} (→ {eff[0]:02d}:{eff[1]:02d}:{eff[2]:02d})"
+
     @app_commands.command(name="listcrons", description="Список кронов")
     async def listcrons(self, itx: Interaction):
         await itx.response.defer(ephemeral=True)
-        rows = await self.service.list_crons(itx.guild_id)
-        if not rows:
-            await itx.followup.send("Пусто.")
-            return
-        lines = [f"ID `{r['id']}` | {r['preset']} {r['time_h']:02d}:{r['time_m']:02d} [{r['tz']}] | <#{r['channel_id']}> | {r['text']}" for r in rows]
-        await itx.followup.send("\n".join(lines))
+        gid = itx.guild_id
+
+        def render(rows) -> list[str]:
+            return [f"ID `{r['id']}` | {r['preset']} {self._fire_time(r)} [{r['tz']}] | <#{r['channel_id']}> | {r['text']}"
+                    for r in rows]
+
+        await send_paged(itx, lambda **kw: self.service.page_crons(gid, **kw), render, "Пусто.")
 
     @app_commands.command(name="delcron", description="Удалить по ID")
     @app_commands.describe(id="ID из /listcrons")
@@ -76,3 +78,32 @@ class CronCog(commands.Cog):
         ok = await self.service.delete_cron(itx.guild_id, id)
         self.scheduler.remove(f"cron:{id}")
         await itx.followup.send("Удалено." if ok else "Не нашёл такой ID.")
+
+    @app_commands.command(name="cron_import", description="Импорт кронов из файла (.jsonl или .csv)")
+    @app_commands.describe(file="Поля: preset, time (HH:MM), channel_id, text, target_user (необязательно)")
+    @app_commands.default_permissions(manage_guild=True)
+    async def cron_import(self, itx: Interaction, file: Attachment):
+        await itx.response.defer(ephemeral=True)
+        guild = itx.guild
+        channels = {c.id for c in guild.text_channels} if guild else None
+        created = []
+
+        async def do_import(records):
+            result, rows = await self.service.import_crons(itx.guild_id, itx.user.id, records, channels)
+            created.extend(rows)
+            return result
+
+        await run_import(itx, file, do_import)
+        # в планировщик — одной пачкой после записи в БД
+        self.scheduler.add_crons({
+            f"cron:{r['id']}": self._spec(r["channel_id"], r["preset"], r["time_h"], r["time_m"], r["text"],
+                                          r["targetUser"] or r["user_id"], r["guild_id"])
+            for r in created
+        })
+
+    @app_commands.command(name="cron_export", description="Выгрузить кроны файлом")
+    @app_commands.choices(format=[app_commands.Choice(name=f, value=f) for f in FORMATS if f != "txt"])
+    async def cron_export(self, itx: Interaction, format: app_commands.Choice[str]):
+        await itx.response.defer(ephemeral=True)
+        await send_export(itx, self.service.export_crons(itx.guild_id), format.value,  # type: ignore[arg-type]
+                          ["preset", "time", "channel_id", "text", "target_user"], "crons")
@@ -1,17 +1,66 @@
+import logging
 from discord import app_commands, Interaction, TextChannel, User
 from discord.ext import commands
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+from ..services.reminders import ReminderService, PRESETS, plan_catchup
+from ..scheduler import BaseScheduler
+from ..sharding import ALL_SHARDS, ShardFilter
+from ..delivery import DeliveryQueue
+
+log = logging.getLogger("cronbot")
 
 class MiscCog(commands.Cog):
-    def __init__(self, bot: commands.Bot, tz: str):
+    def __init__(self, bot: commands.Bot, tz: str, service: ReminderService, scheduler: BaseScheduler, delivery: DeliveryQueue):
         self.bot = bot
         self.tz = ZoneInfo(tz)
+        self.service = service
+        self.scheduler = scheduler
+        self.delivery = delivery
+
+    async def _send(self, channel_id:int, text:str, reminder_id:int|None=None):
+        # после смены лидера в планировщике могут остаться джобы уже доставленных напоминаний
+        if reminder_id is not None and not await self.service.is_pending(reminder_id):
+            return
+        await self.delivery.send(channel_id, text)
+        if reminder_id is not None:
+            await self.service.mark_delivered([reminder_id])
+
+    def _schedule_reminder(self, reminder_id:int, channel_id:int, text:str, run_at:datetime) -> None:
+        self.scheduler.add_once(
+            self._send,
+            run_at,
+            {"channel_id": channel_id, "text": text, "reminder_id": reminder_id},
+            job_id=f"once:{reminder_id}",
+        )
+
+    async def restore_reminders(self, policy:str, max_late_minutes:int, gc_batch:int,
+                                shard: ShardFilter = ALL_SHARDS) -> None:
+        """
+        Поднять недоставленные напоминания после рестарта одним запросом.
+        Просроченные — по catch-up политике; доставленные чистим пачками (сразу и раз в сутки).
+        """
+        rows = await self.service.pending_reminders(shard)
+        now = datetime.now(timezone.utc)
+        future, due, skipped = plan_catchup(rows, now, policy, max_late_minutes)
+        for r in future:
+            self._schedule_reminder(r["id"], r["channel_id"], r["text"], datetime.fromisoformat(r["run_at"]))
+        # просроченные — чуть позже старта, чтобы не упереться в misfire и не блокировать on_ready
+        soon = now + timedelta(seconds=1)
+        for r in due:
+            self._schedule_reminder(r["id"], r["channel_id"], r["text"], soon)
+        await self.service.mark_delivered([r["id"] for r in skipped])
+        log.info("Reminders restored: %d scheduled, %d catch-up, %d skipped", len(future), len(due), len(skipped))
 
-    async def _send(self, channel_id:int, text:str):
-        ch = self.bot.get_channel(channel_id)
-        if isinstance(ch, TextChannel):
-            await ch.send(text)
+        removed = await self.service.gc_delivered(gc_batch)
+        if removed:
+            log.info("Reminders GC: removed %d delivered", removed)
+        self.scheduler.add_cron(
+            job_id="maintenance:reminders_gc",
+            send_fn=self.service.gc_delivered,
+            hour=4, minute=0, expr=PRESETS["everyday"],
+            payload={"batch": gc_batch}, jitter=False,
+        )
 
     @app_commands.command(name="remind", description="Разовое напоминание через N минут")
     @app_commands.describe(minutes="Через сколько минут", text="Текст напоминания", target_user="Кого тегать (по умолчанию — себя)")
@@ -23,27 +72,29 @@ class MiscCog(commands.Cog):
         if not isinstance(ch, TextChannel):
             await itx.followup.send("Нужен текстовый канал."); return
         when = datetime.now(self.tz) + timedelta(minutes=minutes)
-        from ..scheduler import Scheduler  # доступ к инстансу получим через bot
-        scheduler: Scheduler = self.bot._scheduler  # да, осознанный хак: присваиваем в bot
         mention = target_user.mention if target_user else itx.user.mention
-        scheduler.add_once(
-            self._send,
-            when,
-            {"channel_id": ch.id, "text": f"{mention} напоминаю: {text}"}
-        )
+        body = f"{mention} напоминаю: {text}"
+        # сначала в БД, потом в планировщик: деплой посреди ожидания не теряет напоминание
+        rid = await self.service.add_reminder(itx.guild_id, ch.id, body, when)
+        self._schedule_reminder(rid, ch.id, body, when)
         await itx.followup.send(f"Ок, напомню {mention} в {when.strftime('%Y-%m-%d %H:%M')}.")
 
     @app_commands.command(name="set_default_channel", description="Указать основной канал для дефолтных сообщений")
     async def set_default_channel(self, itx: Interaction, channel: TextChannel):
         await itx.response.defer(ephemeral=True)
-        db = await self.bot._db.connect()  # type: ignore[attr-defined]
-        try:
-            await db.execute(
-                "INSERT INTO guild_settings (guild_id, default_channel_id) VALUES (?, ?) "
-                "ON CONFLICT(guild_id) DO UPDATE SET default_channel_id=excluded.default_channel_id",
-                (itx.guild_id, channel.id)
-            )
-            await db.commit()
-        finally:
-            await db.close()
+        await self.bot._db.write(  # type: ignore[attr-defined]
+            "INSERT INTO guild_settings (guild_id, default_channel_id) VALUES (?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET default_channel_id=excluded.default_channel_id",
+            (itx.guild_id, channel.id)
+        )
         await itx.followup.send(f"Ок, основной канал: <#{channel.id}>")
+
+    @app_commands.command(name="dbstats", description="Самые тяжёлые SQL-запросы с момента старта")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(limit="Сколько запросов показать")
+    async def dbstats(self, itx: Interaction, limit: app_commands.Range[int, 1, 25] = 10):
+        await itx.response.defer(ephemeral=True)
+        text = self.bot._db.profiler.dump(limit)  # type: ignore[attr-defined]
+        if len(text) > 1900:
+            text = text[:1900] + "\n…"
+        await itx.followup.send(f"```\n{text}\n```")
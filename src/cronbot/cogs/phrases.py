@@ -1,5 +1,7 @@
 from discord.ext import commands
-from discord import app_commands, Interaction
+from discord import app_commands, Attachment, Interaction
+from ..bulk import FORMATS, run_import, send_export
+from ..pagination import send_paged
 from ..services.phrases import PhraseService
 
 class PhrasesCog(commands.Cog):
@@ -16,12 +18,13 @@ class PhrasesCog(commands.Cog):
     @app_commands.command(name="phrase_list", description="Показать фразы")
     async def phrase_list(self, itx: Interaction):
         await itx.response.defer(ephemeral=True)
-        rows = await self.svc.list_phrases(itx.guild_id)
-        if not rows:
-            await itx.followup.send("Список пуст. Добавь через /phrase_add.")
-            return
-        lines = [f"`{r['id']}`: {r['text']}" for r in rows]
-        await itx.followup.send("\n".join(lines))
+        gid = itx.guild_id
+        await send_paged(
+            itx,
+            lambda **kw: self.svc.page_phrases(gid, **kw),
+            lambda rows: [f"`{r['id']}`: {r['text']}" for r in rows],
+            "Список пуст. Добавь через /phrase_add.",
+        )
 
     @app_commands.command(name="phrase_del", description="Удалить фразу по ID")
     async def phrase_del(self, itx: Interaction, id: int):
@@ -40,3 +43,16 @@ class PhrasesCog(commands.Cog):
             await itx.followup.send("Список фраз пуст.")
         else:
             await itx.followup.send(text)
+
+    @app_commands.command(name="phrase_import", description="Импорт фраз из файла (.txt — по строке, .jsonl, .csv)")
+    @app_commands.default_permissions(manage_guild=True)
+    async def phrase_import(self, itx: Interaction, file: Attachment):
+        await itx.response.defer(ephemeral=True)
+        await run_import(itx, file, lambda records: self.svc.import_phrases(itx.guild_id, records))
+
+    @app_commands.command(name="phrase_export", description="Выгрузить фразы файлом")
+    @app_commands.choices(format=[app_commands.Choice(name=f, value=f) for f in FORMATS])
+    async def phrase_export(self, itx: Interaction, format: app_commands.Choice[str]):
+        await itx.response.defer(ephemeral=True)
+        await send_export(itx, self.svc.export_phrases(itx.guild_id), format.value,  # type: ignore[arg-type]
+                          ["text"], "phrases")
@@ -0,0 +1,88 @@
+"""
+Sync slash-команд только при изменении: хэш сериализованного дерева хранится в БД по области
+(глобально или гильдия). На рестарте и реконнекте дерево обычно то же — ни одного вызова
+bulk_upsert, а Discord их заметно ограничивает. Области гильдий синкаются параллельно.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+
+from discord import Object, app_commands
+
+from .db import Database
+
+log = logging.getLogger("cronbot.commands")
+
+
+def scope_key(guild_id: int | None) -> str:
+    return "global" if guild_id is None else f"guild:{guild_id}"
+
+
+def tree_payload(tree: app_commands.CommandTree, guild_id: int | None = None) -> list[dict]:
+    """То же, что tree.sync() отправит в Discord для области, в стабильном порядке."""
+    guild = None if guild_id is None else Object(id=guild_id)
+    payload = [cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)]
+    return sorted(payload, key=lambda c: (c.get("type", 1), c["name"]))
+
+
+def tree_hash(tree: app_commands.CommandTree, guild_id: int | None = None) -> str:
+    # application_id в хэше: та же БД с другим токеном бота — другое приложение, sync нужен
+    blob = json.dumps(
+        {"application_id": tree.client.application_id, "commands": tree_payload(tree, guild_id)},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+async def stored_hashes(db: Database) -> dict[str, str]:
+    async with db.acquire() as conn:
+        cur = await conn.execute("SELECT scope, hash FROM command_sync")
+        return {r["scope"]: r["hash"] for r in await cur.fetchall()}
+
+
+async def sync_commands(
+    tree: app_commands.CommandTree,
+    db: Database,
+    scopes: list[int | None],
+    *,
+    force: bool = False,
+    concurrency: int = 4,
+) -> dict[str, bool]:
+    """
+    scopes — id гильдий и/или None (глобальные команды). Вернёт {область: синкали ли}.
+    Хэш записываем только после успешного sync: упавшая область попробует снова на следующем старте.
+    """
+    known = {} if force else await stored_hashes(db)
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(guild_id: int | None) -> bool:
+        scope = scope_key(guild_id)
+        digest = tree_hash(tree, guild_id)
+        if known.get(scope) == digest:
+            log.info("Slash commands for %s unchanged; sync skipped", scope)
+            return False
+        async with sem:
+            await tree.sync(guild=None if guild_id is None else Object(id=guild_id))
+        await db.write(
+            "INSERT INTO command_sync (scope, hash, synced_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(scope) DO UPDATE SET hash = excluded.hash, synced_at = excluded.synced_at",
+            (scope, digest, datetime.now(timezone.utc).isoformat()),
+        )
+        log.info("Slash commands synced for %s", scope)
+        return True
+
+    results = await asyncio.gather(*(one(g) for g in scopes), return_exceptions=True)
+    out: dict[str, bool] = {}
+    for guild_id, res in zip(scopes, results):
+        if isinstance(res, BaseException):
+            if not isinstance(res, Exception):
+                raise res
+            log.error("Slash command sync for %s failed: %s", scope_key(guild_id), res)
+            out[scope_key(guild_id)] = False
+        else:
+            out[scope_key(guild_id)] = res
+    return out
@@ -1,16 +1,83 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Literal
 
 class Settings(BaseSettings):
     DISCORD_TOKEN: str
     DB_PATH: str = ".data/data.db"
+    DB_POOL_SIZE: int = 4
+    # запросы дольше порога пишутся в лог cronbot.db.slow
+    DB_SLOW_QUERY_MS: float = 100.0
+    # окно группового коммита: сколько писатель ждёт попутчиков после первой записи
+    DB_WRITE_WINDOW_MS: float = 2.0
     TZ: str = "Europe/Tallinn"
     GUILD_IDS: list[int] | None = None
+    # sync slash-команд идёт, только если хэш дерева изменился; FORCE — синкать всегда.
+    # Области гильдий синкаются параллельно, не больше CONCURRENCY сразу
+    COMMAND_SYNC_FORCE: bool = False
+    COMMAND_SYNC_CONCURRENCY: int = 4
+
+    # /remind: что делать с напоминаниями, просроченными пока бот лежал ("deliver" | "skip")
+    REMIND_CATCHUP: Literal["deliver", "skip"] = "deliver"
+    REMIND_CATCHUP_MAX_MINUTES: int = 24 * 60
+    REMIND_GC_BATCH: int = 500
+
+    # движок планировщика: "apscheduler" или "heap" (нативная куча на asyncio, для десятков тысяч кронов)
+    SCHEDULER_ENGINE: Literal["apscheduler", "heap"] = "apscheduler"
+    # разброс cron-джоб по окну (сек) от заданного времени, детерминированно по id; 0 — точно в срок
+    SCHEDULER_JITTER_SECONDS: int = 0
+    # за сколько секунд до срабатывания крона готовить текст (фраза, канал); 0 — собирать в момент срабатывания
+    CRON_PREFETCH_SECONDS: float = 5.0
+
+    # исходящие сообщения: глобальный лимит (msg/s), всплеск, параллельность, ретраи
+    DELIVERY_RATE: float = 40.0
+    DELIVERY_BURST: float = 40.0
+    DELIVERY_CONCURRENCY: int = 8
+    DELIVERY_MAX_RETRIES: int = 3
+
+    # кэши и интенты клиента: "default" — как у discord.py, "lean" — только гильдии, каналы,
+    # сообщения и реакции (см. benchmarks/client_memory.py); CLIENT_MAX_MESSAGES — размер
+    # кэша сообщений поверх профиля, 0 — выключить
+    CLIENT_PROFILE: Literal["default", "lean"] = "default"
+    CLIENT_MAX_MESSAGES: int | None = None
+
+    # шардинг: SHARD_COUNT > 1 и SHARD_ID — этот процесс держит только свои гильдии
+    # ((guild_id >> 22) % SHARD_COUNT == SHARD_ID); AUTO_SHARD — все шарды в одном процессе (AutoShardedBot)
+    SHARD_ID: int | None = None
+    SHARD_COUNT: int | None = None
+    AUTO_SHARD: bool = False
+
+    # hot-standby: экземпляры делят аренду в БД, планировщик крутит только её держатель
+    LEADER_LEASE: bool = False
+    LEADER_LEASE_TTL: float = 15.0
+    # имя экземпляра в таблице leases; по умолчанию host:pid:случайный суффикс
+    LEADER_ID: str | None = None
+
+    # /healthz и /metrics; порт не задан — сервер не поднимаем
+    HEALTH_HOST: str = "127.0.0.1"
+    HEALTH_PORT: int | None = None
+
+    # сколько message_id -> author_id держать для реакций-триггеров
+    CONFRONT_AUTHOR_CACHE_SIZE: int = 10_000
+    # обработчики гейтвей-событий: воркеров, размер очереди и что делать при переполнении
+    # ("drop_oldest" | "drop_new" | "block")
+    EVENT_WORKERS: int = 4
+    EVENT_QUEUE_SIZE: int = 1000
+    EVENT_OVERFLOW: Literal["drop_oldest", "drop_new", "block"] = "drop_oldest"
+    # контр-реакции: тишина перед реакцией, cooldown на автора и на канал (сек),
+    # параллельных add_reaction, воркеров и максимум ждущих работ
+    REACTION_DEBOUNCE_SECONDS: float = 0.5
+    REACTION_USER_COOLDOWN_SECONDS: float = 5.0
+    REACTION_CHANNEL_COOLDOWN_SECONDS: float = 1.0
+    REACTION_CONCURRENCY: int = 4
+    REACTION_WORKERS: int = 2
+    REACTION_QUEUE_SIZE: int = 1000
 
     # дефолтный ежедневный крон с фразами
     DEFAULT_PHRASE_ENABLED: bool = True
     DEFAULT_PHRASE_PRESET: str = "everyday"
     DEFAULT_PHRASE_TIME: str = "10:30"
+    # выдавать фразы «мешком»: без повторов, пока не переберём все
+    PHRASE_SHUFFLE_BAG: bool = False
 
     DEFAULT_PHRASES: List[str] = [
         "Меньше обещай — больше деплой.",
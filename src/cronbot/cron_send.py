@@ -0,0 +1,102 @@
+"""
+Единый путь срабатывания cron-джоб: CronSender — send_fn всех кронов (/addcron, импорт,
+восстановленные и дефолтные). За prefetch_lead секунд до срабатывания планировщик зовёт
+prepare(): канал проверен, маркер случайной фразы заменён фразой. В момент срабатывания
+остаётся отдать готовый текст в очередь доставки.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from .delivery import DeliveryQueue
+from .metrics import CRON_SEND_SECONDS
+from .services.phrases import PhraseService
+
+log = logging.getLogger("cronbot.cron")
+
+RANDOM_MARKER = "__RANDOM_PHRASE__"
+NO_PHRASES = "Добавь фразы через /phrase_add"
+
+Key = tuple[int, str, Optional[int]]  # (channel_id, text, guild_id) — как payload джобы
+
+
+class CronSender:
+    """
+    Вызывается как send_fn(channel_id, text, guild_id=None). Заготовки prepare() лежат по ключу
+    payload'а в очереди: два одинаковых крона в одной группе получат по своей фразе.
+    Заготовка старше ttl не используется — текст тогда собирается в момент срабатывания.
+    """
+
+    def __init__(
+        self,
+        resolve_channel: Callable[[int], Any],
+        phrases: PhraseService,
+        delivery: DeliveryQueue,
+        *,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._resolve = resolve_channel
+        self.phrases = phrases
+        self.delivery = delivery
+        self.ttl = ttl
+        self._clock = clock
+        self._ready: dict[Key, deque[tuple[float, str | None]]] = {}
+        self._pruned_at = clock()
+
+    @property
+    def prepared(self) -> int:
+        return sum(len(q) for q in self._ready.values())
+
+    async def render(self, channel_id: int, text: str, guild_id: int | None = None) -> str | None:
+        """Готовый текст сообщения; None — канала нет (удалён или не текстовый), слать некуда."""
+        ch = self._resolve(channel_id)
+        if ch is None:
+            return None
+        if text != RANDOM_MARKER:
+            return text
+        gid = guild_id or (ch.guild.id if ch.guild else None)
+        phrase = await self.phrases.get_random(gid) if gid else None
+        return phrase or NO_PHRASES
+
+    async def prepare(self, channel_id: int, text: str, guild_id: int | None = None) -> None:
+        content = await self.render(channel_id, text, guild_id)
+        now = self._clock()
+        self._ready.setdefault((channel_id, text, guild_id), deque()).append((now, content))
+        if now - self._pruned_at > self.ttl:
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Заготовки удалённых за время ожидания кронов не должны копиться."""
+        self._pruned_at = now
+        for key in [k for k, q in self._ready.items() if now - q[-1][0] > self.ttl]:
+            del self._ready[key]
+
+    def _take(self, key: Key) -> tuple[bool, str | None]:
+        q = self._ready.get(key)
+        if not q:
+            return False, None
+        now = self._clock()
+        hit: tuple[bool, str | None] = (False, None)
+        while q:
+            ts, content = q.popleft()
+            if now - ts <= self.ttl:
+                hit = (True, content)
+                break
+        if not q:
+            del self._ready[key]
+        return hit
+
+    async def __call__(self, channel_id: int, text: str, guild_id: int | None = None) -> None:
+        t0 = time.perf_counter()
+        hit, content = self._take((channel_id, text, guild_id))
+        if not hit:
+            content = await self.render(channel_id, text, guild_id)
+        if content is None:
+            log.debug("Cron target channel %s is gone; skipping", channel_id)
+            return
+        await self.delivery.send(channel_id, content)
+        CRON_SEND_SECONDS.observe(time.perf_counter() - t0, source="prefetched" if hit else "inline")
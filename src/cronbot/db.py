@@ -1,64 +1,164 @@
+import asyncio
+import time
 import aiosqlite, os
-from typing import AsyncIterator
-
-CREATE_SQL = """
-CREATE TABLE IF NOT EXISTS crons (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  guild_id INTEGER NOT NULL,
-  channel_id INTEGER NOT NULL,
-  user_id INTEGER NOT NULL,
-  preset TEXT NOT NULL,
-  time_h INTEGER NOT NULL,
-  time_m INTEGER NOT NULL,
-  tz TEXT NOT NULL,
-  text TEXT NOT NULL,
-  targetUser INTEGER,
-  created_at TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS phrases (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  guild_id INTEGER NOT NULL,
-  text TEXT NOT NULL,
-  created_at TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS guild_settings (
-  guild_id INTEGER PRIMARY KEY,
-  default_channel_id INTEGER
-);
-
-CREATE TABLE IF NOT EXISTS confronts (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  guild_id INTEGER NOT NULL,
-  target_user_id INTEGER NOT NULL,
-  trigger_reaction TEXT,
-  counter_reaction TEXT NOT NULL,
-  created_by INTEGER NOT NULL,
-  created_at TEXT NOT NULL
-);
-"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from .metrics import DB_QUERY_SECONDS
+from .migrations import CREATE_SQL, migrate  # noqa: F401  (CREATE_SQL — для обратной совместимости)
+from .profiler import QueryProfiler
+from .sharding import ALL_SHARDS, ShardFilter
+from .writer import GroupCommitWriter, WriteResult
+
+T = TypeVar("T")
+
+
+class ProfiledConnection:
+    """
+    Обёртка соединения из пула: execute/executemany идут через профилировщик и гистограмму,
+    всё остальное (commit, rollback, in_transaction, ...) — напрямую в aiosqlite.
+    """
+
+    __slots__ = ("_conn", "_profiler")
+
+    def __init__(self, conn: aiosqlite.Connection, profiler: QueryProfiler):
+        self._conn = conn
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    async def execute(self, sql: str, parameters=()) -> aiosqlite.Cursor:
+        t0 = time.perf_counter()
+        try:
+            return await self._conn.execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - t0
+            DB_QUERY_SECONDS.observe(elapsed)
+            self._profiler.record(sql, elapsed)
+
+    async def executemany(self, sql: str, parameters) -> aiosqlite.Cursor:
+        t0 = time.perf_counter()
+        try:
+            return await self._conn.executemany(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - t0
+            DB_QUERY_SECONDS.observe(elapsed)
+            self._profiler.record(sql, elapsed)
 
 
 class Database:
-    def __init__(self, path: str):
+    """
+    Пул долгоживущих соединений к SQLite.
+    Схема мигрируется один раз при open(), сервисы читают через acquire(),
+    а пишут через write()/write_many()/transaction() — единственным писателем с групповым коммитом.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, slow_query_ms: float = 100.0, write_window_ms: float = 2.0):
         self.path = path
+        self.pool_size = max(1, pool_size)
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.profiler = QueryProfiler(slow_query_ms)
+        self._pool: asyncio.Queue[ProfiledConnection] | None = None
+        self._conns: list[ProfiledConnection] = []
+        self._open_lock = asyncio.Lock()
+        self._writer = GroupCommitWriter(self._new_connection, window=write_window_ms / 1000)
 
-    async def connect(self) -> aiosqlite.Connection:
+    async def _new_connection(self) -> ProfiledConnection:
         db = await aiosqlite.connect(self.path)
+        db.row_factory = aiosqlite.Row
         await db.execute("PRAGMA journal_mode=WAL;")
         await db.execute("PRAGMA foreign_keys=ON;")
-        await db.executescript(CREATE_SQL)
-        await db.commit()
-        return db
+        return ProfiledConnection(db, self.profiler)
 
-    async def iter_crons(self, guild_id: int | None = None) -> AsyncIterator[aiosqlite.Row]:
-        db = await self.connect()
-        db.row_factory = aiosqlite.Row
-        query = "SELECT * FROM crons" + (" WHERE guild_id = ?" if guild_id else "")
-        params = (guild_id,) if guild_id else ()
-        async with db.execute(query, params) as cur:
-            async for row in cur:
-                yield row
-        await db.close()
+    async def open(self) -> None:
+        """Прогревает пул и создаёт схему. Повторный вызов — no-op."""
+        async with self._open_lock:
+            if self._pool is not None:
+                return
+            first = await self._new_connection()
+            await migrate(first._conn)
+            conns = [first]
+            for _ in range(self.pool_size - 1):
+                conns.append(await self._new_connection())
+            pool: asyncio.Queue[ProfiledConnection] = asyncio.Queue()
+            for c in conns:
+                pool.put_nowait(c)
+            self._conns = conns
+            self._pool = pool
+            await self._writer.start()
+
+    async def close(self) -> None:
+        async with self._open_lock:
+            await self._writer.close()
+            conns, self._conns, self._pool = self._conns, [], None
+            for c in conns:
+                await c.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[ProfiledConnection]:
+        """
+        Одолжить соединение из пула на время блока.
+        Незакоммиченные изменения при выходе откатываются, чтобы не протекали к следующему владельцу.
+        """
+        if self._pool is None:
+            await self.open()
+        pool = self._pool
+        assert pool is not None
+        db = await pool.get()
+        try:
+            yield db
+        finally:
+            try:
+                if db.in_transaction:
+                    await db.rollback()
+            finally:
+                pool.put_nowait(db)
+
+    async def _ensure_open(self) -> None:
+        if self._pool is None:
+            await self.open()
+
+    async def write(self, sql: str, params: tuple = ()) -> WriteResult:
+        """Один пишущий запрос; вернёт lastrowid/rowcount после коммита пачки."""
+        await self._ensure_open()
+        return await self._writer.execute(sql, params)
+
+    async def write_many(self, sql: str, seq: list) -> WriteResult:
+        await self._ensure_open()
+        return await self._writer.executemany(sql, seq)
+
+    async def transaction(self, fn: Callable[[ProfiledConnection], Awaitable[T]]) -> T:
+        """
+        fn(conn) целиком выполняется атомарно внутри группового коммита.
+        Для чтение-затем-запись; commit() внутри fn не вызывать.
+        """
+        await self._ensure_open()
+        return await self._writer.submit(fn)
+
+    async def __aenter__(self) -> "Database":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    async def iter_crons(self, guild_id: int | None = None,
+                         shard: ShardFilter = ALL_SHARDS) -> AsyncIterator[aiosqlite.Row]:
+        # строки забираем целиком и отдаём соединение в пул до первого yield:
+        # потребитель может сам брать соединения в теле цикла или прервать его.
+        where: list[str] = []
+        params: tuple = ()
+        if guild_id:
+            where.append("guild_id = ?")
+            params += (guild_id,)
+        cond, shard_params = shard.sql()
+        if cond:
+            where.append(cond)
+            params += shard_params
+        query = "SELECT * FROM crons" + (" WHERE " + " AND ".join(where) if where else "")
+        async with self.acquire() as db:
+            cur = await db.execute(query, params)
+            rows = await cur.fetchall()
+        for row in rows:
+            yield row
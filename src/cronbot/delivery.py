@@ -0,0 +1,195 @@
+"""
+Единый путь исходящих сообщений: очередь на канал, глобальный token bucket,
+ограниченная параллельность и ретраи с экспоненциальным backoff.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import discord
+
+from .metrics import DELIVERY_MESSAGES, DELIVERY_SECONDS
+
+log = logging.getLogger("cronbot.delivery")
+
+
+class TokenBucket:
+    """Глобальный лимит: rate токенов в секунду, не больше capacity подряд."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._ts = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+        self._ts = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class DeliveryStats:
+    queued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    dropped: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def observe(self, latency: float) -> None:
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+
+@dataclass
+class _Item:
+    content: str
+    enqueued_at: float
+    future: asyncio.Future
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Сколько ждать перед повтором; None — ошибка не ретраибельная."""
+    if isinstance(exc, discord.RateLimited):
+        return exc.retry_after
+    if isinstance(exc, discord.HTTPException):
+        if exc.status == 429 or exc.status >= 500:
+            return 0.0
+        return None
+    if isinstance(exc, (OSError, asyncio.TimeoutError)):
+        return 0.0
+    return None
+
+
+class DeliveryQueue:
+    """
+    submit()/send() ставят сообщение в очередь канала. На каждый канал — свой воркер
+    (порядок сохраняется, канал не забивается), общий TokenBucket и семафор ограничивают
+    суммарный поток, чтобы 10:30 во всех гильдиях не превращалось в пачку 429.
+    """
+
+    def __init__(
+        self,
+        resolve_channel: Callable[[int], Any],
+        *,
+        rate: float = 40.0,
+        burst: float = 40.0,
+        concurrency: int = 8,
+        max_retries: int = 3,
+        base_backoff: float = 1.0,
+        max_queue_per_channel: int = 100,
+    ):
+        self._resolve = resolve_channel
+        self._bucket = TokenBucket(rate, burst)
+        self._sem = asyncio.Semaphore(concurrency)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_queue_per_channel = max_queue_per_channel
+        self._queues: dict[int, deque[_Item]] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self.stats = DeliveryStats()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def snapshot(self) -> dict[str, float]:
+        st = self.stats
+        done = st.sent + st.failed
+        return {
+            "queue_depth": self.queue_depth,
+            "queued": st.queued,
+            "sent": st.sent,
+            "failed": st.failed,
+            "retried": st.retried,
+            "dropped": st.dropped,
+            "latency_avg": st.latency_total / done if done else 0.0,
+            "latency_max": st.latency_max,
+        }
+
+    def submit(self, channel_id: int, content: str) -> asyncio.Future:
+        """Поставить в очередь; future резолвится в True/False по итогам доставки."""
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        q = self._queues.setdefault(channel_id, deque())
+        if len(q) >= self.max_queue_per_channel:
+            self.stats.dropped += 1
+            DELIVERY_MESSAGES.inc(result="dropped")
+            log.warning("Delivery queue for channel %s is full; dropping message", channel_id)
+            fut.set_result(False)
+            return fut
+        q.append(_Item(content, time.monotonic(), fut))
+        self.stats.queued += 1
+        if channel_id not in self._workers:
+            self._workers[channel_id] = asyncio.create_task(self._worker(channel_id))
+        return fut
+
+    async def send(self, channel_id: int, content: str) -> bool:
+        return await self.submit(channel_id, content)
+
+    async def _worker(self, channel_id: int) -> None:
+        q = self._queues[channel_id]
+        try:
+            while q:
+                item = q.popleft()
+                ok = await self._deliver(channel_id, item.content)
+                latency = time.monotonic() - item.enqueued_at
+                self.stats.observe(latency)
+                DELIVERY_SECONDS.observe(latency)
+                if ok:
+                    self.stats.sent += 1
+                    DELIVERY_MESSAGES.inc(result="sent")
+                else:
+                    self.stats.failed += 1
+                    DELIVERY_MESSAGES.inc(result="failed")
+                if not item.future.done():
+                    item.future.set_result(ok)
+        finally:
+            self._workers.pop(channel_id, None)
+            if not q:
+                self._queues.pop(channel_id, None)
+
+    async def _deliver(self, channel_id: int, content: str) -> bool:
+        ch = self._resolve(channel_id)
+        if ch is None:
+            log.warning("Channel %s not found; message dropped", channel_id)
+            return False
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            try:
+                async with self._sem:
+                    await ch.send(content)
+                return True
+            except Exception as e:
+                wait = _retry_after(e)
+                if wait is None or attempt == self.max_retries:
+                    log.warning("Delivery to channel %s failed: %s", channel_id, e)
+                    return False
+                self.stats.retried += 1
+                DELIVERY_MESSAGES.inc(result="retried")
+                backoff = self.base_backoff * (2 ** attempt) * (1 + random.random() * 0.1)
+                await asyncio.sleep(max(wait, backoff))
+        return False
+
+    async def close(self) -> None:
+        """Дождаться уже поставленных сообщений."""
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
@@ -0,0 +1,117 @@
+"""
+Пул воркеров для обработчиков гейтвей-событий: листенер только ставит событие в ограниченную
+очередь, а SQLite и REST делают N воркеров. Медленный fetch_message или запрос к БД держит
+один воркер, а не цикл событий — планировщик и остальные события не ждут.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Literal
+
+from .metrics import EVENT_HANDLER_SECONDS, EVENT_QUEUE_WAIT_SECONDS, EVENTS
+
+log = logging.getLogger("cronbot.events")
+
+# что делать, когда очередь полна: выкинуть самое старое событие, новое или ждать места
+Overflow = Literal["drop_oldest", "drop_new", "block"]
+OVERFLOW_POLICIES: tuple[str, ...] = ("drop_oldest", "drop_new", "block")
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+@dataclass
+class _Event:
+    name: str
+    handler: Handler
+    args: tuple
+    enqueued_at: float
+
+
+class EventPool:
+    """
+    submit(event, handler, *args) кладёт handler(*args) в очередь на max_queue событий;
+    workers задач разбирают её по порядку. name — метка cog в метриках.
+    Ошибка обработчика логируется и не роняет воркер.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        workers: int = 4,
+        max_queue: int = 1000,
+        overflow: Overflow = "drop_oldest",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow!r}")
+        self.name = name
+        self.overflow = overflow
+        self._n_workers = max(1, workers)
+        self._clock = clock
+        self._queue: asyncio.Queue[_Event] = asyncio.Queue(maxsize=max(1, max_queue))
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, event: str, handler: Handler, *args: Any) -> bool:
+        """Вернёт False, если событие отброшено (или вытеснило из очереди более старое)."""
+        self._ensure_workers()
+        item = _Event(event, handler, args, self._clock())
+        if self.overflow == "block":
+            await self._queue.put(item)
+            return True
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.overflow == "drop_new":
+            self._drop(item)
+            return False
+        old = self._queue.get_nowait()
+        self._queue.task_done()
+        self._drop(old)
+        self._queue.put_nowait(item)
+        return False
+
+    def _drop(self, item: _Event) -> None:
+        EVENTS.inc(cog=self.name, event=item.name, result="dropped")
+        log.debug("Event queue %s is full; dropped %s", self.name, item.name)
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self._n_workers)]
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                EVENT_QUEUE_WAIT_SECONDS.observe(self._clock() - item.enqueued_at, cog=self.name, event=item.name)
+                with EVENT_HANDLER_SECONDS.time(cog=self.name, event=item.name):
+                    await item.handler(*item.args)
+            except Exception:
+                EVENTS.inc(cog=self.name, event=item.name, result="failed")
+                log.exception("Handler for %s failed", item.name)
+            else:
+                EVENTS.inc(cog=self.name, event=item.name, result="handled")
+            finally:
+                self._queue.task_done()
+
+    async def drain(self) -> None:
+        """Дождаться, пока очередь разберут (для тестов и остановки)."""
+        if self._workers:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
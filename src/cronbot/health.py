@@ -0,0 +1,74 @@
+"""
+Опциональный HTTP-сервер в том же event loop, что и бот:
+  /healthz — гейтвей подключён, планировщик запущен, БД отвечает (200 / 503, JSON; с арендой — ещё role);
+  /metrics — метрики в текстовом формате Prometheus.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from aiohttp import web
+from discord.ext import commands
+
+from .db import Database
+from .leader import LeaderLease
+from .metrics import REGISTRY, Registry
+from .scheduler import BaseScheduler
+
+log = logging.getLogger("cronbot.health")
+
+
+class HealthServer:
+    def __init__(self, bot: commands.Bot, db: Database, scheduler: BaseScheduler,
+                 host: str, port: int, registry: Registry = REGISTRY, lease: LeaderLease | None = None):
+        self.bot = bot
+        self.lease = lease
+        self.db = db
+        self.scheduler = scheduler
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._runner: web.AppRunner | None = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/metrics", self.metrics)
+        return app
+
+    async def _db_ok(self) -> bool:
+        try:
+            async def ping() -> None:
+                async with self.db.acquire() as conn:
+                    await conn.execute("SELECT 1")
+            await asyncio.wait_for(ping(), timeout=2)
+            return True
+        except Exception:
+            return False
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        checks = {
+            "gateway": self.bot.is_ready() and not self.bot.is_closed(),
+            "scheduler": self.scheduler.running,
+            "db": await self._db_ok(),
+        }
+        body: dict[str, object] = dict(checks)
+        if self.lease is not None:
+            # standby здоров, просто не стреляет джобами
+            body["role"] = "leader" if self.lease.is_leader() else "standby"
+        return web.json_response(body, status=200 if all(checks.values()) else 503)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log.info("Health endpoint on http://%s:%d (/healthz, /metrics)", self.host, self.port)
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,203 @@
+"""
+Нативный asyncio-движок планировщика: одна корутина и min-heap ближайших срабатываний.
+Понимает только то, что нужно боту: время суток + day_of_week из PRESETS, и разовые джобы.
+На десятках тысяч кронов дешевле APScheduler по памяти и по пробуждениям:
+спим ровно до головы кучи, а не пересчитываем триггеры всех джоб.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from typing import Callable
+
+from .scheduler import BaseScheduler
+
+log = logging.getLogger("cronbot.scheduler")
+
+_DAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+def parse_day_of_week(value: str) -> frozenset[int]:
+    """'*', 'mon-fri', 'sat,sun', 'mon' -> множество weekday() (пн = 0)."""
+    value = value.strip().lower()
+    if value in ("*", ""):
+        return frozenset(range(7))
+    days: set[int] = set()
+    for part in value.split(","):
+        if "-" in part:
+            a, b = (_DAYS[x.strip()] for x in part.split("-", 1))
+            days.update(range(a, b + 1) if a <= b else [*range(a, 7), *range(0, b + 1)])
+        else:
+            days.add(_DAYS[part.strip()])
+    return frozenset(days)
+
+
+class _Job:
+    __slots__ = ("fn", "payload", "hour", "minute", "second", "days", "gen")
+
+    def __init__(self, fn: Callable, payload: dict, hour: int, minute: int, second: int,
+                 days: frozenset[int] | None, gen: int):
+        self.fn = fn
+        self.payload = payload
+        self.hour = hour
+        self.minute = minute
+        self.second = second
+        self.days = days  # None — разовая джоба
+        self.gen = gen
+
+
+class HeapScheduler(BaseScheduler):
+    def __init__(self, tz: str, jitter_window: int = 0, prefetch_lead: float = 0.0):
+        super().__init__(tz, jitter_window, prefetch_lead)
+        self._jobs: dict[str, _Job] = {}
+        # (unix ts, seq, job_id, gen); устаревшие записи отбрасываются лениво по gen
+        self._heap: list[tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._gen = itertools.count()
+        self._anon = itertools.count()
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._paused = False
+
+    # --- жизненный цикл ---
+
+    @property
+    def running(self) -> bool:
+        # на паузе (standby) движок считается живым, как и APScheduler в STATE_PAUSED
+        return self._paused or self._loop_alive()
+
+    def _loop_alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._paused = False
+        if self._loop_alive():
+            return
+        self._rebase()
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        self._paused = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # куча переживает остановку цикла, так что пауза — это остановленный цикл
+    def pause(self) -> None:
+        self.stop()
+        self._paused = True
+
+    def resume(self) -> None:
+        self.start()
+
+    def _rebase(self) -> None:
+        """Перед (пере)запуском: кроны, чьё время прошло, пока цикл стоял, переносим на следующее срабатывание."""
+        now = datetime.now(self.tz)
+        live = [e for e in self._heap if (j := self._jobs.get(e[2])) is not None and j.gen == e[3]]
+        self._heap = []
+        for when, seq, job_id, gen in live:
+            job = self._jobs[job_id]
+            if job.days is not None and when < now.timestamp():
+                when = self.next_fire(job, now).timestamp()
+            self._heap.append((when, seq, job_id, gen))
+        heapq.heapify(self._heap)
+
+    def job_count(self) -> int:
+        return len(self._jobs)
+
+    # --- расчёт срабатываний ---
+
+    def next_fire(self, job: _Job, after: datetime) -> datetime:
+        """Ближайшее срабатывание cron-джобы строго после after (в tz планировщика)."""
+        local = after.astimezone(self.tz)
+        at = dtime(job.hour, job.minute, job.second)
+        assert job.days is not None
+        for i in range(8):
+            d: date = local.date() + timedelta(days=i)
+            if d.weekday() not in job.days:
+                continue
+            cand = datetime.combine(d, at, tzinfo=self.tz)
+            if cand > local:
+                return cand
+        raise ValueError("day_of_week is empty")
+
+    def _push(self, job_id: str, job: _Job, when: float) -> None:
+        head = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (when, next(self._seq), job_id, job.gen))
+        if self._wake is not None and (head is None or when < head):
+            self._wake.set()
+
+    # --- интерфейс движка ---
+
+    def _schedule_cron(self, job_id: str, send_fn: Callable, hour: int, minute: int, second: int,
+                       expr: dict, payload: dict) -> None:
+        days = parse_day_of_week(str(expr.get("day_of_week", "*")))
+        job = _Job(send_fn, payload, hour, minute, second, days, next(self._gen))
+        self._jobs[job_id] = job
+        self._push(job_id, job, self.next_fire(job, datetime.now(self.tz)).timestamp())
+
+    def _unschedule(self, job_id: str) -> None:
+        # запись в куче останется, но по gen будет признана устаревшей
+        self._jobs.pop(job_id, None)
+
+    def _has_job(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    def add_once(self, send_fn: Callable, run_at, payload: dict, job_id: str | None = None):
+        if job_id is not None:
+            self.remove(job_id)
+        else:
+            job_id = f"__once:{next(self._anon)}"
+        if isinstance(run_at, str):
+            run_at = datetime.fromisoformat(run_at)
+        if run_at.tzinfo is None:
+            run_at = run_at.replace(tzinfo=self.tz)
+        job = _Job(self._guard(send_fn), payload, 0, 0, 0, None, next(self._gen))
+        self._jobs[job_id] = job
+        self._push(job_id, job, run_at.timestamp())
+
+    # --- цикл ---
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            if not self._heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            when, _, job_id, gen = self._heap[0]
+            job = self._jobs.get(job_id)
+            if job is None or job.gen != gen:
+                heapq.heappop(self._heap)
+                continue
+            delay = when - time.time()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            self._fire(job_id, job, when)
+
+    def _fire(self, job_id: str, job: _Job, when: float) -> None:
+        asyncio.get_running_loop().create_task(self._call(job_id, job))
+        if job.days is None:
+            self._jobs.pop(job_id, None)
+            return
+        # следующее срабатывание считаем от max(план, сейчас): пропущенные за время простоя не догоняем
+        after = datetime.fromtimestamp(max(when, time.time()), self.tz)
+        self._push(job_id, job, self.next_fire(job, after).timestamp())
+
+    async def _call(self, job_id: str, job: _Job) -> None:
+        try:
+            await job.fn(**job.payload)
+        except Exception:
+            log.exception("Job %s failed", job_id)
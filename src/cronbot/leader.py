@@ -0,0 +1,139 @@
+"""
+Лидерство через аренду в SQLite: таблица leases, продлеваемый heartbeat.
+Планировщик крутит только держатель аренды; standby держит гейтвей и кэши тёплыми
+и забирает аренду, когда она истекла. Фенсинг — локальный дедлайн по monotonic:
+лидер, не сумевший продлиться вовремя (завис, потерял БД), сам перестаёт стрелять джобами
+раньше, чем аренда истечёт в БД и её заберёт другой экземпляр.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from .db import Database
+
+log = logging.getLogger("cronbot.leader")
+
+
+def default_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """
+    try_acquire() берёт или продлевает аренду одним UPSERT: чужую — только если она истекла.
+    token растёт при каждой смене держателя (эпоха лидерства).
+    run() — цикл heartbeat; on_acquire/on_lose вызываются при смене роли.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        name: str = "scheduler",
+        holder: str | None = None,
+        *,
+        ttl: float = 15.0,
+        renew_every: float | None = None,
+        skew: float | None = None,
+        on_acquire: Callable[[], Awaitable[None]] | None = None,
+        on_lose: Callable[[], Awaitable[None]] | None = None,
+        clock: Callable[[], float] = time.time,
+        monotonic: Callable[[], float] = time.monotonic,
+    ):
+        self.db = db
+        self.name = name
+        self.holder = holder or default_holder()
+        self.ttl = ttl
+        self.renew_every = renew_every if renew_every is not None else ttl / 3
+        # запас на расхождение часов и задержку записи: локально считаем аренду истёкшей раньше
+        self.skew = skew if skew is not None else ttl / 5
+        self.on_acquire = on_acquire
+        self.on_lose = on_lose
+        self._clock = clock
+        self._monotonic = monotonic
+        self.token: int | None = None
+        self._valid_until = 0.0
+        self._leader = False
+        self._task: asyncio.Task | None = None
+
+    def is_leader(self) -> bool:
+        """Фенсинг: держим аренду и локальный дедлайн ещё не прошёл."""
+        return self._leader and self._monotonic() < self._valid_until
+
+    async def try_acquire(self) -> bool:
+        """Взять или продлить аренду. Вернёт True, если после вызова держатель — мы."""
+        started = self._monotonic()
+        now = self._clock()
+
+        async def upsert(db):
+            await db.execute(
+                "INSERT INTO leases (name, holder, token, expires_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(name) DO UPDATE SET "
+                "  token = CASE WHEN leases.holder = excluded.holder THEN leases.token ELSE leases.token + 1 END, "
+                "  holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+                (self.name, self.holder, now + self.ttl, now),
+            )
+            cur = await db.execute("SELECT holder, token FROM leases WHERE name = ?", (self.name,))
+            return await cur.fetchone()
+
+        row = await self.db.transaction(upsert)
+        if row is None or row["holder"] != self.holder:
+            self._leader = False
+            return False
+        self.token = int(row["token"])
+        # дедлайн считаем от начала попытки: запись могла висеть на блокировке
+        self._valid_until = started + self.ttl - self.skew
+        self._leader = True
+        return True
+
+    async def release(self) -> None:
+        """Отдать аренду при штатной остановке, чтобы standby не ждал TTL."""
+        was = self._leader
+        self._leader = False
+        if not was:
+            return
+        await self.db.write("UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ?", (self.name, self.holder))
+
+    async def tick(self) -> None:
+        """Один шаг heartbeat: продлить/захватить и сообщить о смене роли."""
+        was = self._leader
+        try:
+            ok = await self.try_acquire()
+        except Exception:
+            log.exception("Lease %s heartbeat failed", self.name)
+            # без записи в БД продлиться не можем; роль держим до локального дедлайна
+            ok = self.is_leader()
+            self._leader = ok
+        if ok and not was:
+            log.info("Lease %s acquired by %s (token %s)", self.name, self.holder, self.token)
+            if self.on_acquire is not None:
+                await self.on_acquire()
+        elif was and not ok:
+            log.warning("Lease %s lost by %s", self.name, self.holder)
+            if self.on_lose is not None:
+                await self.on_lose()
+
+    async def run(self) -> None:
+        while True:
+            await self.tick()
+            await asyncio.sleep(self.renew_every)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        await self.release()
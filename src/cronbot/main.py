@@ -1,14 +1,25 @@
 import asyncio
+import logging
 from .config import Settings
 from .bot import create_bot
 
 async def main():
     bot = await create_bot()
-    token = Settings().DISCORD_TOKEN
     try:
+        token = Settings().DISCORD_TOKEN
         await bot.start(token)
     finally:
+        if bot._health is not None:  # type: ignore[attr-defined]
+            await bot._health.close()  # type: ignore[attr-defined]
         bot._scheduler.stop()  # type: ignore[attr-defined]
+        await bot._events.close()  # type: ignore[attr-defined]
+        await bot._reactions.close()  # type: ignore[attr-defined]
+        if bot._lease is not None:  # type: ignore[attr-defined]
+            await bot._lease.close()  # type: ignore[attr-defined]
+        await bot._delivery.close()  # type: ignore[attr-defined]
+        # топ запросов за жизнь процесса — в лог, чтобы было с чем идти за индексами
+        logging.getLogger("cronbot").info("DB stats:\n%s", bot._db.profiler.dump())  # type: ignore[attr-defined]
+        await bot._db.close()  # type: ignore[attr-defined]
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,194 @@
+"""
+Минимальные метрики в формате Prometheus без внешних зависимостей.
+На горячем пути — только инкремент числа в dict и bisect по бакетам;
+значения, которые дёшево прочитать в момент скрейпа (число джоб, latency гейтвея), — через колбэки.
+"""
+from __future__ import annotations
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+LabelValues = tuple[str, ...]
+
+
+def _fmt_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_fmt_labels(self.label_names, k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Значение задаётся set() или считается колбэком в момент скрейпа."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+        self._callbacks: dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float], **labels: str) -> None:
+        self._callbacks[self._key(labels)] = fn
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        fn = self._callbacks.get(key)
+        return fn() if fn else self._values.get(key, 0.0)
+
+    def _samples(self) -> list[str]:
+        out = [f"{self.name}{_fmt_labels(self.label_names, k)} {v}" for k, v in self._values.items()]
+        for k, fn in self._callbacks.items():
+            try:
+                v = float(fn())
+            except Exception:
+                continue
+            out.append(f"{self.name}{_fmt_labels(self.label_names, k)} {v}")
+        return out
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # на набор меток: [счётчики по бакетам..., +Inf], сумма
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def _samples(self) -> list[str]:
+        out = []
+        for key, counts in self._counts.items():
+            acc = 0
+            for bound, c in zip(self.buckets, counts):
+                acc += c
+                le = 'le="%s"' % bound
+                out.append(f"{self.name}_bucket{_fmt_labels(self.label_names, key, le)} {acc}")
+            acc += counts[-1]
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_fmt_labels(self.label_names, key, le)} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.label_names, key)} {self._sums[key]}")
+            out.append(f"{self.name}_count{_fmt_labels(self.label_names, key)} {acc}")
+        return out
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in self._metrics.values():
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _reg(metric):  # type: ignore[no-untyped-def]
+    return REGISTRY.register(metric)
+
+
+DB_QUERY_SECONDS: Histogram = _reg(Histogram(
+    "cronbot_db_query_seconds", "SQL statement execution latency"))
+DB_WRITE_BATCH: Histogram = _reg(Histogram(
+    "cronbot_db_write_batch_size", "Writes per group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)))
+SCHEDULER_JOBS: Gauge = _reg(Gauge(
+    "cronbot_scheduler_jobs", "Scheduled cron rows and engine jobs", ("kind",)))
+SCHEDULER_FIRE_LAG: Histogram = _reg(Histogram(
+    "cronbot_scheduler_fire_lag_seconds", "Delay between planned and actual cron fire time"))
+EVENT_HANDLER_SECONDS: Histogram = _reg(Histogram(
+    "cronbot_event_handler_seconds", "Gateway event handler latency", ("cog", "event")))
+EVENT_QUEUE_WAIT_SECONDS: Histogram = _reg(Histogram(
+    "cronbot_event_queue_wait_seconds", "Time a gateway event waits for a worker", ("cog", "event")))
+EVENT_QUEUE_DEPTH: Gauge = _reg(Gauge(
+    "cronbot_event_queue_depth", "Gateway events waiting for a worker", ("cog",)))
+EVENTS: Counter = _reg(Counter(
+    "cronbot_events_total", "Gateway events by result (handled, failed, dropped)", ("cog", "event", "result")))
+DELIVERY_MESSAGES: Counter = _reg(Counter(
+    "cronbot_delivery_messages_total", "Outbound messages by result", ("result",)))
+DELIVERY_SECONDS: Histogram = _reg(Histogram(
+    "cronbot_delivery_seconds", "Enqueue-to-send latency of outbound messages"))
+CRON_SEND_SECONDS: Histogram = _reg(Histogram(
+    "cronbot_cron_send_seconds", "Cron fire-to-send latency by content source (prefetched, inline)",
+    ("source",)))
+DELIVERY_QUEUE_DEPTH: Gauge = _reg(Gauge(
+    "cronbot_delivery_queue_depth", "Messages waiting in delivery queues"))
+REACTIONS: Counter = _reg(Counter(
+    "cronbot_reactions_total", "Counter-reactions by result (sent, failed, suppressed, coalesced, dropped)",
+    ("result",)))
+REACTION_QUEUE_DEPTH: Gauge = _reg(Gauge(
+    "cronbot_reaction_queue_depth", "Counter-reaction jobs waiting for debounce or a worker"))
+GATEWAY_LATENCY: Gauge = _reg(Gauge(
+    "cronbot_gateway_latency_seconds", "Discord gateway heartbeat latency"))
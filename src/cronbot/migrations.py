@@ -0,0 +1,135 @@
+"""
+Версионированные миграции схемы. Текущая версия хранится в schema_version;
+новая миграция — новый элемент в конце MIGRATIONS, старые не редактируем.
+"""
+import logging
+
+import aiosqlite
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS crons (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  guild_id INTEGER NOT NULL,
+  channel_id INTEGER NOT NULL,
+  user_id INTEGER NOT NULL,
+  preset TEXT NOT NULL,
+  time_h INTEGER NOT NULL,
+  time_m INTEGER NOT NULL,
+  tz TEXT NOT NULL,
+  text TEXT NOT NULL,
+  targetUser INTEGER,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS phrases (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  guild_id INTEGER NOT NULL,
+  text TEXT NOT NULL,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS phrase_bags (
+  guild_id INTEGER PRIMARY KEY,
+  seed INTEGER NOT NULL,
+  size INTEGER NOT NULL,
+  position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS guild_settings (
+  guild_id INTEGER PRIMARY KEY,
+  default_channel_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS confronts (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  guild_id INTEGER NOT NULL,
+  target_user_id INTEGER NOT NULL,
+  trigger_reaction TEXT,
+  counter_reaction TEXT NOT NULL,
+  created_by INTEGER NOT NULL,
+  created_at TEXT NOT NULL
+);
+"""
+
+INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_crons_guild_text ON crons (guild_id, text);
+CREATE INDEX IF NOT EXISTS idx_phrases_guild_id_text ON phrases (guild_id, id, text);
+CREATE INDEX IF NOT EXISTS idx_confronts_guild ON confronts (guild_id);
+"""
+
+REMINDERS_SQL = """
+CREATE TABLE IF NOT EXISTS reminders (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  guild_id INTEGER,
+  channel_id INTEGER NOT NULL,
+  text TEXT NOT NULL,
+  run_at TEXT NOT NULL,
+  delivered_at TEXT,
+  created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders (delivered_at, run_at);
+"""
+
+# аренда лидерства (LeaderLease): кто крутит планировщик и до какого unix-времени
+LEASES_SQL = """
+CREATE TABLE IF NOT EXISTS leases (
+  name TEXT PRIMARY KEY,
+  holder TEXT NOT NULL,
+  token INTEGER NOT NULL,
+  expires_at REAL NOT NULL
+);
+"""
+
+# keyset-пагинация /listcrons: WHERE guild_id = ? AND id > ? ORDER BY id
+CRONS_PAGE_SQL = """
+CREATE INDEX IF NOT EXISTS idx_crons_guild_id ON crons (guild_id, id);
+"""
+
+# хэш дерева slash-команд по области sync ("global" или "guild:<id>"): sync только при изменении
+COMMAND_SYNC_SQL = """
+CREATE TABLE IF NOT EXISTS command_sync (
+  scope TEXT PRIMARY KEY,
+  hash TEXT NOT NULL,
+  synced_at TEXT NOT NULL
+);
+"""
+
+# (версия, SQL). Миграция 1 — исходная схема на CREATE ... IF NOT EXISTS,
+# поэтому базы, созданные до появления schema_version, проходят её без изменений.
+MIGRATIONS: list[tuple[int, str]] = [
+    (1, CREATE_SQL),
+    (2, INDEXES_SQL),
+    (3, REMINDERS_SQL),
+    (4, LEASES_SQL),
+    (5, CRONS_PAGE_SQL),
+    (6, COMMAND_SYNC_SQL),
+]
+
+log = logging.getLogger("cronbot.migrations")
+
+
+async def current_version(db: aiosqlite.Connection) -> int:
+    cur = await db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    (version,) = await cur.fetchone()
+    return int(version)
+
+
+async def migrate(db: aiosqlite.Connection) -> int:
+    """Применить недостающие миграции. Вернёт итоговую версию схемы."""
+    await db.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, applied_at TEXT NOT NULL)"
+    )
+    await db.commit()
+    version = await current_version(db)
+    for target, sql in MIGRATIONS:
+        if target <= version:
+            continue
+        # executescript коммитит сам; версию пишем сразу после — повтор миграции безопасен (IF NOT EXISTS)
+        await db.executescript(sql)
+        await db.execute(
+            "INSERT INTO schema_version (version, applied_at) VALUES (?, datetime('now'))", (target,)
+        )
+        await db.commit()
+        log.info("Applied schema migration %d", target)
+        version = target
+    return version
@@ -11,3 +11,11 @@ class CronEntry:
     time_m: int
     tz: str
     text: str
+
+@dataclass(frozen=True)
+class ConfrontRule:
+    id: int
+    guild_id: int
+    target_user_id: int
+    trigger_reaction: str | None
+    counter_reaction: str
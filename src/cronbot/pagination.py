@@ -0,0 +1,144 @@
+"""
+Keyset-пагинация списков гильдии (WHERE id > ? ORDER BY id LIMIT ?) и кнопки ◀/▶ для неё.
+В памяти — одна страница строк; состояние вью — id первой и последней строки страницы.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import aiosqlite
+import discord
+
+from .db import Database
+
+PAGE_SIZE = 10
+# лимит сообщения Discord — 2000 символов; оставляем запас под заголовок страницы
+MESSAGE_BUDGET = 1900
+
+
+@dataclass(frozen=True)
+class Page:
+    rows: list[aiosqlite.Row]
+    has_prev: bool
+    has_next: bool
+
+    @property
+    def first_id(self) -> int | None:
+        return self.rows[0]["id"] if self.rows else None
+
+    @property
+    def last_id(self) -> int | None:
+        return self.rows[-1]["id"] if self.rows else None
+
+
+async def keyset_page(
+    db: Database,
+    select: str,
+    params: tuple,
+    *,
+    after: int | None = None,
+    before: int | None = None,
+    limit: int = PAGE_SIZE,
+) -> Page:
+    """
+    select — запрос с WHERE без сортировки, например "SELECT id, text FROM phrases WHERE guild_id = ?".
+    after — страница после id (вперёд), before — страница перед id (назад). Берём limit + 1,
+    лишняя строка говорит, есть ли ещё страница в ту же сторону.
+    """
+    if before is not None:
+        sql = f"{select} AND id < ? ORDER BY id DESC LIMIT ?"
+        args = (*params, before, limit + 1)
+    else:
+        sql = f"{select} AND id > ? ORDER BY id LIMIT ?"
+        args = (*params, after or 0, limit + 1)
+    async with db.acquire() as conn:
+        cur = await conn.execute(sql, args)
+        rows = list(await cur.fetchall())
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+        return Page(rows, has_prev=more, has_next=True)
+    return Page(rows, has_prev=bool(after), has_next=more)
+
+
+async def iter_all(fetch: Callable[..., Awaitable[Page]], limit: int = 500) -> AsyncIterator[dict]:
+    """Все строки по страницам (для экспорта): в памяти одна страница."""
+    after = None
+    while True:
+        page = await fetch(after=after, limit=limit)
+        for r in page.rows:
+            yield dict(r)
+        if not page.has_next:
+            return
+        after = page.last_id
+
+
+def render_lines(lines: list[str], budget: int = MESSAGE_BUDGET) -> str:
+    """Склеить строки страницы, обрезая длинные так, чтобы всё влезло в одно сообщение."""
+    if not lines:
+        return ""
+    per_line = max(20, budget // len(lines) - 1)
+    return "\n".join(line if len(line) <= per_line else line[: per_line - 1] + "…" for line in lines)
+
+
+PageFetcher = Callable[..., Awaitable[Page]]
+
+
+class PageView(discord.ui.View):
+    """
+    Кнопки ◀/▶ над страницей. fetch(after=..., before=...) -> Page, render(rows) -> list[str].
+    Листать может только тот, кто вызвал команду.
+    """
+
+    def __init__(self, owner_id: int, page: Page, fetch: PageFetcher,
+                 render: Callable[[list[aiosqlite.Row]], list[str]], *, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.fetch = fetch
+        self.render = render
+        self._first: Optional[int] = None
+        self._last: Optional[int] = None
+        self._apply(page)
+
+    def _apply(self, page: Page) -> None:
+        self._first, self._last = page.first_id, page.last_id
+        self.prev_page.disabled = not page.has_prev
+        self.next_page.disabled = not page.has_next
+
+    def content(self, page: Page) -> str:
+        return render_lines(self.render(page.rows))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def _show(self, interaction: discord.Interaction, page: Page) -> None:
+        if not page.rows:
+            # строки между нажатиями удалили — возвращаемся к началу
+            page = await self.fetch()
+        self._apply(page)
+        await interaction.response.edit_message(content=self.content(page) or "Пусто.", view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self._show(interaction, await self.fetch(before=self._first))
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self._show(interaction, await self.fetch(after=self._last))
+
+
+async def send_paged(itx: discord.Interaction, fetch: PageFetcher,
+                     render: Callable[[list[aiosqlite.Row]], list[str]], empty: str) -> None:
+    """Первая страница через followup (ответ уже defer'нут); кнопки — только если страниц больше одной."""
+    page = await fetch()
+    if not page.rows:
+        await itx.followup.send(empty)
+        return
+    content = render_lines(render(page.rows))
+    if not page.has_next:
+        await itx.followup.send(content)
+        return
+    view = PageView(itx.user.id, page, fetch, render)
+    await itx.followup.send(content, view=view)
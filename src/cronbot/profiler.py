@@ -0,0 +1,86 @@
+"""
+Профилировщик SQL: на каждый нормализованный statement — число вызовов, суммарное и максимальное время;
+запросы медленнее порога пишутся в лог вместе с вызывающим кодом.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass
+
+log = logging.getLogger("cronbot.db.slow")
+
+_WS = re.compile(r"\s+")
+_STR = re.compile(r"'(?:[^']|'')*'")
+_NUM = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"IN \((?:\?\s*,\s*)+\?\)", re.IGNORECASE)
+
+# кадры этих файлов пропускаем, когда ищем, кто выполнил запрос
+_SKIP_FILES = (os.sep + "db.py", os.sep + "profiler.py", os.sep + "contextlib.py", os.sep + "asyncio" + os.sep)
+
+
+def normalize_sql(sql: str) -> str:
+    """Схлопнуть пробелы, литералы -> ?, IN (?, ?, ...) -> IN (...): один ключ на форму запроса."""
+    s = _WS.sub(" ", sql).strip()
+    s = _STR.sub("?", s)
+    s = _NUM.sub("?", s)
+    return _IN_LIST.sub("IN (...)", s)
+
+
+def _caller() -> str:
+    f = sys._getframe(2)
+    while f is not None and f.f_code.co_filename.endswith(_SKIP_FILES):
+        f = f.f_back
+    if f is None:
+        return "?"
+    return f"{os.path.basename(f.f_code.co_filename)}:{f.f_lineno} {f.f_code.co_name}"
+
+
+@dataclass
+class StatementStats:
+    sql: str
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class QueryProfiler:
+    def __init__(self, slow_ms: float = 100.0):
+        self.slow_s = slow_ms / 1000
+        self._stats: dict[str, StatementStats] = {}
+        # сырой SQL -> нормализованный: регэкспы гоняем один раз на форму запроса
+        self._norm_cache: dict[str, str] = {}
+
+    def record(self, sql: str, elapsed: float) -> None:
+        key = self._norm_cache.get(sql)
+        if key is None:
+            key = normalize_sql(sql)
+            if len(self._norm_cache) < 4096:
+                self._norm_cache[sql] = key
+        st = self._stats.get(key)
+        if st is None:
+            st = self._stats[key] = StatementStats(key)
+        st.calls += 1
+        st.total += elapsed
+        if elapsed > st.max:
+            st.max = elapsed
+        if elapsed >= self.slow_s:
+            log.warning("Slow query %.1f ms from %s: %s", elapsed * 1000, _caller(), key)
+
+    def top(self, n: int = 10, by: str = "total") -> list[StatementStats]:
+        return sorted(self._stats.values(), key=lambda s: getattr(s, by), reverse=True)[:n]
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def dump(self, n: int = 10) -> str:
+        lines = [f"{'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8}  sql"]
+        for st in self.top(n):
+            lines.append(f"{st.calls:>7} {st.total * 1000:>10.1f} {st.avg * 1000:>8.2f} {st.max * 1000:>8.2f}  {st.sql}")
+        return "\n".join(lines)
@@ -0,0 +1,171 @@
+"""
+Диспетчер контр-реакций: вместо REST-вызова на каждое сообщение «разговорчивой» цели —
+debounce по (канал, автор), cooldown на автора и на канал, параллельная расстановка
+нескольких эмодзи под общим семафором и ограниченная очередь с коалесценцией.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .metrics import REACTIONS
+
+log = logging.getLogger("cronbot.reactions")
+
+Key = tuple[int, int]  # (channel_id, user_id)
+_PRUNE_AT = 10_000
+
+
+@dataclass
+class _Job:
+    guild_id: int
+    message: Any  # discord.Message / PartialMessage — нужен только add_reaction
+    emojis: list[str]
+
+
+class ReactionDispatcher:
+    """
+    submit() не блокирует и не делает I/O: решает, подавить событие, склеить с уже ждущим
+    или поставить в очередь. Ждущие работы хранятся по ключу (канал, автор), так что
+    под флудом в очереди не больше одной работы на ключ — новая заменяет старую.
+
+    debounce — ждём тишины столько секунд и реагируем на последнее сообщение пачки;
+    user_cooldown / channel_cooldown — после реакции на автора (в гильдии) / в канале
+    столько секунд новые события подавляются.
+    """
+
+    def __init__(
+        self,
+        *,
+        debounce: float = 0.5,
+        user_cooldown: float = 5.0,
+        channel_cooldown: float = 1.0,
+        concurrency: int = 4,
+        workers: int = 2,
+        max_queue: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.debounce = debounce
+        self.user_cooldown = user_cooldown
+        self.channel_cooldown = channel_cooldown
+        self.max_queue = max_queue
+        self._n_workers = max(1, workers)
+        self._clock = clock
+        self._sem = asyncio.Semaphore(concurrency)
+        self._pending: dict[Key, _Job] = {}   # ждут debounce или воркера
+        self._timers: dict[Key, asyncio.TimerHandle] = {}
+        self._queue: asyncio.Queue[Key] = asyncio.Queue()
+        self._user_last: dict[tuple[int, int], float] = {}
+        self._channel_last: dict[int, float] = {}
+        self._workers: list[asyncio.Task] = []
+        self._inflight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def _cooling(self, guild_id: int, channel_id: int, user_id: int) -> bool:
+        now = self._clock()
+        last_user = self._user_last.get((guild_id, user_id))
+        if last_user is not None and now - last_user < self.user_cooldown:
+            return True
+        last_channel = self._channel_last.get(channel_id)
+        return last_channel is not None and now - last_channel < self.channel_cooldown
+
+    def submit(self, guild_id: int, channel_id: int, user_id: int, message: Any, emojis: list[str]) -> bool:
+        """Вернёт False, если событие подавлено или отброшено."""
+        if not emojis:
+            return False
+        if self._cooling(guild_id, channel_id, user_id):
+            REACTIONS.inc(len(emojis), result="suppressed")
+            return False
+        key = (channel_id, user_id)
+        job = _Job(guild_id, message, list(dict.fromkeys(emojis)))
+        if key in self._pending:
+            # уже ждёт — реагируем на свежее сообщение, старое склеиваем
+            REACTIONS.inc(len(self._pending[key].emojis), result="coalesced")
+            self._pending[key] = job
+            if key in self._timers:
+                self._arm(key)
+            return True
+        if len(self._pending) >= self.max_queue:
+            REACTIONS.inc(len(emojis), result="dropped")
+            return False
+        self._pending[key] = job
+        self._ensure_workers()
+        if self.debounce > 0:
+            self._arm(key)
+        else:
+            self._queue.put_nowait(key)
+        return True
+
+    def _arm(self, key: Key) -> None:
+        old = self._timers.pop(key, None)
+        if old is not None:
+            old.cancel()
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(self.debounce, self._flush, key)
+
+    def _flush(self, key: Key) -> None:
+        self._timers.pop(key, None)
+        if key in self._pending:
+            self._queue.put_nowait(key)
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self._n_workers)]
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._queue.get()
+            job = self._pending.pop(key, None)
+            if job is None:
+                continue
+            channel_id, user_id = key
+            now = self._clock()
+            self._user_last[(job.guild_id, user_id)] = now
+            self._channel_last[channel_id] = now
+            if len(self._user_last) > _PRUNE_AT:
+                self._prune(now)
+            self._inflight += 1
+            try:
+                await asyncio.gather(*(self._react(job.message, e) for e in job.emojis))
+            finally:
+                self._inflight -= 1
+
+    def _prune(self, now: float) -> None:
+        """Забыть остывших: словари cooldown не должны расти с числом авторов."""
+        self._user_last = {k: t for k, t in self._user_last.items() if now - t < self.user_cooldown}
+        self._channel_last = {k: t for k, t in self._channel_last.items() if now - t < self.channel_cooldown}
+
+    async def _react(self, message: Any, emoji: str) -> None:
+        async with self._sem:
+            try:
+                await message.add_reaction(emoji)
+            except Exception as e:
+                REACTIONS.inc(result="failed")
+                log.debug("add_reaction %s failed: %s", emoji, e)
+            else:
+                REACTIONS.inc(result="sent")
+
+    async def drain(self) -> None:
+        """Дождаться, пока ждущие работы разойдутся (для тестов и остановки)."""
+        for key in list(self._timers):
+            self._timers.pop(key).cancel()
+            self._queue.put_nowait(key)
+        while self._pending or self._inflight:
+            await asyncio.sleep(0.01)
+
+    async def close(self) -> None:
+        for t in self._timers.values():
+            t.cancel()
+        self._timers.clear()
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
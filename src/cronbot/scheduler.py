@@ -1,14 +1,279 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
+from dataclasses import dataclass
+import asyncio
+import logging
+import zlib
+from datetime import datetime, time as dtime, timedelta
+
+from .metrics import SCHEDULER_FIRE_LAG
 from zoneinfo import ZoneInfo
 from typing import Callable
 
-class Scheduler:
-    def __init__(self, tz: str):
+
+log = logging.getLogger("cronbot.scheduler")
+
+# сигнатура триггера: эффективное (h, m, s) + day_of_week и прочие поля пресета
+TriggerSig = tuple[int, int, int, tuple]
+
+
+@dataclass(frozen=True)
+class CronSpec:
+    """Желаемое состояние cron-джобы; по нему решаем, трогать ли живую джобу."""
+    send_fn: Callable
+    hour: int
+    minute: int
+    expr: dict
+    payload: dict
+    jitter: bool = True
+
+
+def jitter_offset(job_id: str, window: int) -> int:
+    """Детерминированный сдвиг в секундах [0, window): хэш id джобы, одинаковый между рестартами."""
+    if window <= 0:
+        return 0
+    return zlib.crc32(job_id.encode()) % window
+
+
+def spread_time(job_id: str, hour: int, minute: int, window: int) -> tuple[int, int, int]:
+    """
+    Эффективное время срабатывания (h, m, s) с учётом сдвига.
+    Сдвиг не переносит джобу через полночь (иначе поехал бы day_of_week) — в конце суток сдвигаем назад.
+    """
+    base = hour * 3600 + minute * 60
+    off = jitter_offset(job_id, window)
+    t = base + off if base + off < 24 * 3600 else max(0, base - off)
+    return t // 3600, t % 3600 // 60, t % 60
+
+
+class BaseScheduler:
+    """
+    Общая часть движков: учёт CronSpec, разброс по времени, reconcile и коалесценция.
+    Кроны с одинаковой сигнатурой триггера живут в одной джобе движка (grp:...),
+    её колбэк раздаёт срабатывание всем участникам — джоб и пробуждений O(различных времён).
+    Движок реализует _schedule_cron/_unschedule/_has_job, add_once, start/stop, pause/resume.
+    fence — проверка «мы ещё лидер» перед каждым срабатыванием; False — джоба молча пропускается.
+    prefetch_lead — за сколько секунд до срабатывания группы звать prepare(**payload) у тех
+    send_fn, у которых он есть (pre:... джоба рядом с grp:...): контент готовится заранее.
+    """
+
+    def __init__(self, tz: str, jitter_window: int = 0, prefetch_lead: float = 0.0):
         self.tz = ZoneInfo(tz)
+        self.jitter_window = max(0, jitter_window)
+        self.prefetch_lead = max(0.0, prefetch_lead)
+        self._specs: dict[str, CronSpec] = {}
+        self._groups: dict[TriggerSig, dict[str, tuple[Callable, dict]]] = {}
+        self._member_sig: dict[str, TriggerSig] = {}
+        self.fence: Callable[[], bool] | None = None
+
+    # --- интерфейс движка ---
+
+    def start(self) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+    def pause(self) -> None:
+        """Не стрелять джобами, но держать их (standby)."""
+        raise NotImplementedError
+
+    def resume(self) -> None:
+        """Запустить или снять с паузы; пропущенные за паузу кроны не догоняем."""
+        raise NotImplementedError
+
+    def add_once(self, send_fn: Callable, run_at, payload: dict, job_id: str | None = None):
+        raise NotImplementedError
+
+    def _schedule_cron(self, job_id: str, send_fn: Callable, hour: int, minute: int, second: int,
+                       expr: dict, payload: dict) -> None:
+        raise NotImplementedError
+
+    def _unschedule(self, job_id: str) -> None:
+        raise NotImplementedError
+
+    def _has_job(self, job_id: str) -> bool:
+        raise NotImplementedError
+
+    # --- общая логика ---
+
+    @property
+    def running(self) -> bool:
+        raise NotImplementedError
+
+    def cron_count(self) -> int:
+        return len(self._specs)
+
+    def group_count(self) -> int:
+        """Сколько джоб движка держат кроны (различных сигнатур триггера)."""
+        return len(self._groups)
+
+    def _fenced(self) -> bool:
+        if self.fence is None or self.fence():
+            return False
+        log.warning("Scheduler is fenced (leadership lost); skipping fire")
+        return True
+
+    def _guard(self, fn: Callable) -> Callable:
+        """Обёртка разовой джобы фенсингом."""
+        async def guarded(**payload) -> None:
+            if not self._fenced():
+                await fn(**payload)
+        return guarded
+
+    @staticmethod
+    def _group_id(sig: TriggerSig) -> str:
+        h, m, sec, expr = sig
+        return f"grp:{h:02d}:{m:02d}:{sec:02d}:" + ",".join(f"{k}={v}" for k, v in expr)
+
+    @staticmethod
+    def _prefetch_id(sig: TriggerSig) -> str:
+        return "pre:" + BaseScheduler._group_id(sig)[4:]
+
+    def _prefetch_time(self, sig: TriggerSig) -> tuple[int, int, int] | None:
+        """Время pre-джобы; None — не влезает в те же сутки (сдвиг поменял бы day_of_week)."""
+        t = sig[0] * 3600 + sig[1] * 60 + sig[2] - int(round(self.prefetch_lead))
+        if t < 0:
+            return None
+        return t // 3600, t % 3600 // 60, t % 60
+
+    def _make_prefetch(self, sig: TriggerSig) -> Callable:
+        members = self._groups[sig]
+
+        async def prefetch() -> None:
+            if self._fenced():
+                return
+            batch = [(job_id, fn, payload) for job_id, (fn, payload) in members.items() if hasattr(fn, "prepare")]
+            results = await asyncio.gather(*(fn.prepare(**payload) for _, fn, payload in batch),
+                                           return_exceptions=True)
+            for (job_id, _, _), res in zip(batch, results):
+                if isinstance(res, BaseException):
+                    log.warning("Prefetch for cron job %s failed: %s", job_id, res)
+
+        return prefetch
+
+    def _make_fanout(self, sig: TriggerSig) -> Callable:
+        members = self._groups[sig]
+        at = dtime(sig[0], sig[1], sig[2])
+
+        async def fanout() -> None:
+            if self._fenced():
+                return
+            now = datetime.now(self.tz)
+            planned = datetime.combine(now.date(), at, tzinfo=self.tz)
+            if planned > now:
+                planned -= timedelta(days=1)
+            lag = (now - planned).total_seconds()
+            if lag < 3600:
+                SCHEDULER_FIRE_LAG.observe(lag)
+            batch = list(members.items())
+            results = await asyncio.gather(*(fn(**payload) for _, (fn, payload) in batch), return_exceptions=True)
+            for (job_id, _), res in zip(batch, results):
+                if isinstance(res, BaseException):
+                    log.error("Cron job %s failed", job_id, exc_info=res)
+
+        return fanout
+
+    def _join(self, job_id: str, spec: CronSpec) -> None:
+        h, m, sec = self._effective(job_id, spec)
+        sig: TriggerSig = (h, m, sec, tuple(sorted(spec.expr.items())))
+        group = self._groups.get(sig)
+        if group is None:
+            group = self._groups[sig] = {}
+        if not self._has_job(self._group_id(sig)):
+            self._schedule_cron(self._group_id(sig), self._make_fanout(sig), h, m, sec, spec.expr, {})
+        group[job_id] = (spec.send_fn, spec.payload)
+        self._member_sig[job_id] = sig
+        if self.prefetch_lead > 0 and hasattr(spec.send_fn, "prepare") and not self._has_job(self._prefetch_id(sig)):
+            at = self._prefetch_time(sig)
+            if at is not None:
+                self._schedule_cron(self._prefetch_id(sig), self._make_prefetch(sig), *at, spec.expr, {})
+
+    def _leave(self, job_id: str) -> None:
+        sig = self._member_sig.pop(job_id, None)
+        if sig is None:
+            return
+        group = self._groups[sig]
+        group.pop(job_id, None)
+        if not group:
+            del self._groups[sig]
+            self._unschedule(self._group_id(sig))
+            self._unschedule(self._prefetch_id(sig))
+
+    def fire_time(self, job_id: str) -> tuple[int, int, int] | None:
+        """Эффективное (h, m, s) cron-джобы с учётом разброса; None — джобы нет."""
+        spec = self._specs.get(job_id)
+        if spec is None:
+            return None
+        return self._effective(job_id, spec)
+
+    def _effective(self, job_id: str, spec: CronSpec) -> tuple[int, int, int]:
+        if not spec.jitter:
+            return spec.hour, spec.minute, 0
+        return spread_time(job_id, spec.hour, spec.minute, self.jitter_window)
+
+    def add_cron(self, job_id: str, send_fn: Callable, *, hour: int, minute: int, expr: dict, payload: dict,
+                 jitter: bool = True) -> bool:
+        """
+        Идемпотентно: если джоба с таким же расписанием и payload уже есть — ничего не делаем.
+        jitter=False — точное время, без разброса по окну jitter_window.
+        Вернёт True, если джоба создана или пересоздана.
+        """
+        spec = CronSpec(send_fn, hour, minute, dict(expr), dict(payload), jitter)
+        sig = self._member_sig.get(job_id)
+        if self._specs.get(job_id) == spec and sig is not None and self._has_job(self._group_id(sig)):
+            return False
+        self._leave(job_id)
+        self._join(job_id, spec)
+        self._specs[job_id] = spec
+        return True
+
+    def add_crons(self, specs: dict[str, CronSpec]) -> int:
+        """Пачка кронов за один заход (импорт). Вернёт сколько джоб создано или пересоздано."""
+        changed = 0
+        for job_id, spec in specs.items():
+            changed += self.add_cron(job_id, spec.send_fn, hour=spec.hour, minute=spec.minute,
+                                     expr=spec.expr, payload=spec.payload, jitter=spec.jitter)
+        return changed
+
+    def reconcile(self, desired: dict[str, CronSpec], prefix: str = "cron:") -> tuple[int, int, int]:
+        """
+        Привести живые cron-джобы с данным префиксом к desired.
+        Трогаем только отличающиеся. Вернёт (added, updated, removed).
+        """
+        added = updated = removed = 0
+        for job_id in [j for j in self._specs if j.startswith(prefix) and j not in desired]:
+            self.remove(job_id)
+            removed += 1
+        for job_id, spec in desired.items():
+            existed = job_id in self._specs
+            if self.add_cron(job_id, spec.send_fn, hour=spec.hour, minute=spec.minute,
+                             expr=spec.expr, payload=spec.payload, jitter=spec.jitter):
+                if existed:
+                    updated += 1
+                else:
+                    added += 1
+        return added, updated, removed
+
+    def remove(self, job_id: str):
+        if self._specs.pop(job_id, None) is not None:
+            self._leave(job_id)
+        else:
+            self._unschedule(job_id)
+
+
+class Scheduler(BaseScheduler):
+    """Движок на APScheduler (по умолчанию)."""
+
+    def __init__(self, tz: str, jitter_window: int = 0, prefetch_lead: float = 0.0):
+        super().__init__(tz, jitter_window, prefetch_lead)
         self._sch = AsyncIOScheduler(timezone=self.tz)
 
+    @property
+    def running(self) -> bool:
+        return bool(self._sch.running)
+
     def start(self) -> None:
         if not self._sch.running:
             self._sch.start()
@@ -17,19 +282,46 @@ class Scheduler:
         if self._sch.running:
             self._sch.shutdown(wait=False)
 
-    def add_cron(self, job_id: str, send_fn: Callable, *, hour: int, minute: int, expr: dict, payload: dict):
-        try:
-            self._sch.remove_job(job_id)
-        except Exception:
-            pass
-        trig = CronTrigger(hour=hour, minute=minute, timezone=self.tz, **expr)
-        self._sch.add_job(send_fn, trig, id=job_id, kwargs=payload)
+    # shutdown() у APScheduler теряет джобы, поэтому standby живёт на pause()/resume()
+    def pause(self) -> None:
+        if not self._sch.running:
+            self._sch.start(paused=True)
+        else:
+            self._sch.pause()
+
+    def resume(self) -> None:
+        if not self._sch.running:
+            self._sch.start()
+        else:
+            self._sch.resume()
 
-    def add_once(self, send_fn: Callable, run_at, payload: dict):
-        self._sch.add_job(send_fn, DateTrigger(run_date=run_at), kwargs=payload)
+    def _schedule_cron(self, job_id: str, send_fn: Callable, hour: int, minute: int, second: int,
+                       expr: dict, payload: dict) -> None:
+        trig = CronTrigger(hour=hour, minute=minute, second=second, timezone=self.tz, **expr)
+        self._sch.add_job(send_fn, trig, id=job_id, kwargs=payload)
 
-    def remove(self, job_id: str):
+    def _unschedule(self, job_id: str) -> None:
         try:
             self._sch.remove_job(job_id)
         except Exception:
             pass
+
+    def _has_job(self, job_id: str) -> bool:
+        return self._sch.get_job(job_id) is not None
+
+    def add_once(self, send_fn: Callable, run_at, payload: dict, job_id: str | None = None):
+        if job_id is not None:
+            self.remove(job_id)
+        # misfire_grace_time=None: если цикл был занят в момент срабатывания — всё равно доставим
+        self._sch.add_job(self._guard(send_fn), DateTrigger(run_date=run_at), id=job_id, kwargs=payload,
+                          misfire_grace_time=None)
+
+
+def make_scheduler(engine: str, tz: str, jitter_window: int = 0, prefetch_lead: float = 0.0) -> BaseScheduler:
+    """Выбор движка по конфигу: "apscheduler" или "heap"."""
+    if engine == "apscheduler":
+        return Scheduler(tz, jitter_window, prefetch_lead)
+    if engine == "heap":
+        from .heap_scheduler import HeapScheduler
+        return HeapScheduler(tz, jitter_window, prefetch_lead)
+    raise ValueError(f"Unknown scheduler engine: {engine}")
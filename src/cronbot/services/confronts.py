@@ -1,48 +1,180 @@
 from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterable, AsyncIterator, Optional, List, Dict, Tuple
 import aiosqlite
 
 from ..db import Database
+from ..sharding import ALL_SHARDS, ShardFilter
+from ..models import ConfrontRule
+from ..bulk import ImportResult, chunks
+from ..pagination import PAGE_SIZE, Page, iter_all, keyset_page
+
+
+@dataclass
+class _UserRules:
+    message: List[ConfrontRule] = field(default_factory=list)   # без триггера: на каждое сообщение
+    reaction: List[ConfrontRule] = field(default_factory=list)  # с триггер-реакцией
+
 
 class ConfrontService:
+    """
+    CRUD правил + in-memory индекс по (guild_id, target_user_id) для горячего пути.
+    Индекс грузится один раз через load() и обновляется write-through из add/remove.
+    """
+
     def __init__(self, db: Database):
         self.db = db
+        self._index: Dict[Tuple[int, int], _UserRules] = {}
+        self._by_id: Dict[int, ConfrontRule] = {}
+        # (guild_id, trigger_emoji) -> сколько правил его ждут; пред-фильтр для реакций
+        self._watched: Counter[Tuple[int, str]] = Counter()
 
-    async def add(self, guild_id: int, target_user_id: int, counter_reaction: str, created_by: int, trigger_reaction: Optional[str] = None) -> int:
-        db = await self.db.connect()
-        try:
+    async def load(self, shard: ShardFilter = ALL_SHARDS) -> int:
+        """(Пере)загрузить индекс из БД — только гильдии своего шарда. Вернёт число правил."""
+        cond, params = shard.sql()
+        async with self.db.acquire() as db:
             cur = await db.execute(
-                """INSERT INTO confronts (guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, created_at)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, datetime.now(timezone.utc).isoformat())
+                "SELECT id, guild_id, target_user_id, trigger_reaction, counter_reaction FROM confronts"
+                + (f" WHERE {cond}" if cond else "") + " ORDER BY id",
+                params,
             )
-            await db.commit()
-            return cur.lastrowid
-        finally:
-            await db.close()
+            rows = await cur.fetchall()
+        self._index.clear()
+        self._by_id.clear()
+        self._watched.clear()
+        for r in rows:
+            self._index_add(ConfrontRule(
+                id=r["id"],
+                guild_id=r["guild_id"],
+                target_user_id=r["target_user_id"],
+                trigger_reaction=r["trigger_reaction"],
+                counter_reaction=r["counter_reaction"],
+            ))
+        return len(rows)
+
+    def _index_add(self, rule: ConfrontRule) -> None:
+        rules = self._index.setdefault((rule.guild_id, rule.target_user_id), _UserRules())
+        (rules.reaction if rule.trigger_reaction else rules.message).append(rule)
+        self._by_id[rule.id] = rule
+        if rule.trigger_reaction:
+            self._watched[(rule.guild_id, rule.trigger_reaction)] += 1
+
+    def _index_remove(self, confront_id: int) -> None:
+        rule = self._by_id.pop(confront_id, None)
+        if rule is None:
+            return
+        if rule.trigger_reaction:
+            wkey = (rule.guild_id, rule.trigger_reaction)
+            self._watched[wkey] -= 1
+            if self._watched[wkey] <= 0:
+                del self._watched[wkey]
+        key = (rule.guild_id, rule.target_user_id)
+        rules = self._index.get(key)
+        if rules is None:
+            return
+        bucket = rules.reaction if rule.trigger_reaction else rules.message
+        bucket[:] = [r for r in bucket if r.id != confront_id]
+        if not rules.message and not rules.reaction:
+            del self._index[key]
+
+    def is_watched(self, guild_id: int, emoji: str) -> bool:
+        """Есть ли в гильдии хоть одно правило с таким триггер-эмодзи."""
+        return (guild_id, emoji) in self._watched
+
+    def message_rules(self, guild_id: int, user_id: int) -> List[ConfrontRule]:
+        """Правила «на каждое сообщение» автора. Без I/O."""
+        rules = self._index.get((guild_id, user_id))
+        return rules.message if rules else []
+
+    def reaction_rules(self, guild_id: int, user_id: int, emoji: str) -> List[ConfrontRule]:
+        """Правила автора сообщения с данным триггер-эмодзи. Без I/O."""
+        rules = self._index.get((guild_id, user_id))
+        if rules is None:
+            return []
+        return [r for r in rules.reaction if r.trigger_reaction == emoji]
+
+    async def add(self, guild_id: int, target_user_id: int, counter_reaction: str, created_by: int, trigger_reaction: Optional[str] = None) -> int:
+        res = await self.db.write(
+            """INSERT INTO confronts (guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, datetime.now(timezone.utc).isoformat())
+        )
+        rid = int(res.lastrowid)
+        self._index_add(ConfrontRule(rid, guild_id, target_user_id, trigger_reaction, counter_reaction))
+        return rid
 
     async def list(self, guild_id: int) -> List[aiosqlite.Row]:
-        db = await self.db.connect()
-        db.row_factory = aiosqlite.Row
-        try:
+        async with self.db.acquire() as db:
             cur = await db.execute(
                 "SELECT id, guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, created_at "
                 "FROM confronts WHERE guild_id = ? ORDER BY id ASC",
                 (guild_id,)
             )
             return await cur.fetchall()
-        finally:
-            await db.close()
+
+    async def page(self, guild_id: int, *, after: Optional[int] = None, before: Optional[int] = None,
+                   limit: int = PAGE_SIZE) -> Page:
+        return await keyset_page(
+            self.db,
+            "SELECT id, target_user_id, trigger_reaction, counter_reaction, created_by FROM confronts WHERE guild_id = ?",
+            (guild_id,), after=after, before=before, limit=limit,
+        )
+
+    async def import_rules(self, guild_id: int, created_by: int, records: AsyncIterable[Optional[dict]]) -> ImportResult:
+        """Записи {target_user_id, counter_reaction[, trigger_reaction]} пачками; индекс обновляется сразу."""
+        result = ImportResult()
+        now = datetime.now(timezone.utc).isoformat()
+        async for batch in chunks(records):
+            rows = []
+            for r in batch:
+                try:
+                    assert r is not None
+                    target = int(r["target_user_id"])
+                    counter = str(r["counter_reaction"]).strip()
+                    trigger = str(r.get("trigger_reaction") or "").strip() or None
+                    if not counter:
+                        raise ValueError("counter_reaction")
+                except (AssertionError, KeyError, TypeError, ValueError):
+                    result.invalid += 1
+                    continue
+                rows.append((guild_id, target, trigger, counter, created_by, now, guild_id, target, trigger, counter))
+            if not rows:
+                continue
+
+            async def insert(db, rows=rows):
+                cur = await db.execute("SELECT COALESCE(MAX(id), 0) FROM confronts")
+                (last,) = await cur.fetchone()
+                await db.executemany(
+                    "INSERT INTO confronts (guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, created_at) "
+                    "SELECT ?, ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM confronts "
+                    "WHERE guild_id = ? AND target_user_id = ? AND trigger_reaction IS ? AND counter_reaction = ?)",
+                    rows,
+                )
+                cur = await db.execute(
+                    "SELECT id, guild_id, target_user_id, trigger_reaction, counter_reaction FROM confronts "
+                    "WHERE id > ? ORDER BY id", (last,)
+                )
+                return await cur.fetchall()
+
+            new = await self.db.transaction(insert)
+            for r in new:
+                self._index_add(ConfrontRule(r["id"], r["guild_id"], r["target_user_id"],
+                                             r["trigger_reaction"], r["counter_reaction"]))
+            result.inserted += len(new)
+            result.skipped += len(rows) - len(new)
+        return result
+
+    def export_rules(self, guild_id: int) -> AsyncIterator[dict]:
+        return iter_all(lambda **kw: self.page(guild_id, **kw))
 
     async def remove(self, guild_id: int, confront_id: int) -> bool:
-        db = await self.db.connect()
-        try:
-            cur = await db.execute("DELETE FROM confronts WHERE guild_id = ? AND id = ?", (guild_id, confront_id))
-            await db.commit()
-            return cur.rowcount > 0
-        finally:
-            await db.close()
+        res = await self.db.write("DELETE FROM confronts WHERE guild_id = ? AND id = ?", (guild_id, confront_id))
+        ok = res.rowcount > 0
+        if ok:
+            self._index_remove(confront_id)
+        return ok
 
     async def get_for_guild(self, guild_id: int) -> List[aiosqlite.Row]:
         return await self.list(guild_id)
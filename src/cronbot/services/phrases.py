@@ -1,61 +1,148 @@
+from dataclasses import dataclass
 from datetime import datetime, timezone
 import aiosqlite
 from ..db import Database
+from typing import AsyncIterable, AsyncIterator
+from ..bulk import ImportResult, chunks
+from ..pagination import PAGE_SIZE, Page, iter_all, keyset_page
 import random
 
+
+@dataclass
+class _Bag:
+    """Позиция в перестановке фраз гильдии: перестановка восстанавливается из seed."""
+    seed: int
+    size: int
+    position: int
+    order: list[int]
+
+
+def _permutation(seed: int, size: int) -> list[int]:
+    order = list(range(size))
+    random.Random(seed).shuffle(order)
+    return order
+
+
 class PhraseService:
-    def __init__(self, db: Database):
+    """
+    Фразы гильдий с in-memory кэшем на гильдию (сбрасывается при add/delete/seed).
+    shuffle_bag=True — выдаём фразы без повторов до конца цикла, позиция мешка хранится в phrase_bags.
+    """
+
+    def __init__(self, db: Database, shuffle_bag: bool = False):
         self.db = db
+        self.shuffle_bag = shuffle_bag
+        self._cache: dict[int, list[str]] = {}
+        self._bags: dict[int, _Bag] = {}
+
+    def invalidate(self, guild_id: int) -> None:
+        self._cache.pop(guild_id, None)
+
+    async def _texts(self, guild_id: int) -> list[str]:
+        texts = self._cache.get(guild_id)
+        if texts is None:
+            async with self.db.acquire() as db:
+                cur = await db.execute("SELECT text FROM phrases WHERE guild_id = ? ORDER BY id", (guild_id,))
+                texts = [r["text"] for r in await cur.fetchall()]
+            self._cache[guild_id] = texts
+        return texts
 
     async def add_phrase(self, guild_id: int, text: str) -> int:
-        db = await self.db.connect()
-        try:
-            await db.execute(
-                "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, ?)",
-                (guild_id, text, datetime.now(timezone.utc).isoformat())
-            )
-            await db.commit()
-            cur = await db.execute("SELECT last_insert_rowid()")
-            rid = (await cur.fetchone())[0]
-            return int(rid)
-        finally:
-            await db.close()
+        res = await self.db.write(
+            "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, ?)",
+            (guild_id, text, datetime.now(timezone.utc).isoformat())
+        )
+        self.invalidate(guild_id)
+        return int(res.lastrowid)
 
     async def list_phrases(self, guild_id: int) -> list[aiosqlite.Row]:
-        db = await self.db.connect()
-        try:
-            db.row_factory = aiosqlite.Row
+        async with self.db.acquire() as db:
             cur = await db.execute("SELECT id, text FROM phrases WHERE guild_id = ? ORDER BY id", (guild_id,))
             return await cur.fetchall()
-        finally:
-            await db.close()
+
+    async def page_phrases(self, guild_id: int, *, after: int | None = None, before: int | None = None,
+                           limit: int = PAGE_SIZE) -> Page:
+        return await keyset_page(self.db, "SELECT id, text FROM phrases WHERE guild_id = ?", (guild_id,),
+                                 after=after, before=before, limit=limit)
+
+    async def import_phrases(self, guild_id: int, records: AsyncIterable[dict | None]) -> ImportResult:
+        """
+        Пачками по CHUNK через executemany; дубликаты (в БД и внутри файла) отсекает NOT EXISTS —
+        вставки одной пачки идут последовательно в одной транзакции и видят друг друга.
+        """
+        result = ImportResult()
+        now = datetime.now(timezone.utc).isoformat()
+        async for batch in chunks(records):
+            rows = []
+            for r in batch:
+                text = str(r.get("text") or "").strip() if r else ""
+                if not text:
+                    result.invalid += 1
+                    continue
+                rows.append((guild_id, text, now, guild_id, text))
+            if not rows:
+                continue
+            res = await self.db.write_many(
+                "INSERT INTO phrases (guild_id, text, created_at) SELECT ?, ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM phrases WHERE guild_id = ? AND text = ?)",
+                rows,
+            )
+            result.inserted += res.rowcount
+            result.skipped += len(rows) - res.rowcount
+        self.invalidate(guild_id)
+        return result
+
+    def export_phrases(self, guild_id: int) -> AsyncIterator[dict]:
+        return iter_all(lambda **kw: self.page_phrases(guild_id, **kw))
 
     async def delete_phrase(self, guild_id: int, pid: int) -> bool:
-        db = await self.db.connect()
-        try:
-            cur = await db.execute("DELETE FROM phrases WHERE id = ? AND guild_id = ?", (pid, guild_id))
-            await db.commit()
-            return cur.rowcount > 0
-        finally:
-            await db.close()
+        res = await self.db.write("DELETE FROM phrases WHERE id = ? AND guild_id = ?", (pid, guild_id))
+        self.invalidate(guild_id)
+        return res.rowcount > 0
 
     async def get_random(self, guild_id: int) -> str | None:
-        db = await self.db.connect()
-        try:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute("SELECT text FROM phrases WHERE guild_id = ?", (guild_id,))
-            rows = await cur.fetchall()
-            if not rows:
-                return None
-            import random
-            return random.choice(rows)["text"]
-        finally:
-            await db.close()
+        texts = await self._texts(guild_id)
+        if not texts:
+            return None
+        if not self.shuffle_bag:
+            return random.choice(texts)
+        return texts[await self._next_from_bag(guild_id, len(texts))]
+
+    async def _load_bag(self, guild_id: int) -> _Bag | None:
+        bag = self._bags.get(guild_id)
+        if bag is not None:
+            return bag
+        async with self.db.acquire() as db:
+            cur = await db.execute("SELECT seed, size, position FROM phrase_bags WHERE guild_id = ?", (guild_id,))
+            row = await cur.fetchone()
+        if row is None:
+            return None
+        bag = _Bag(row["seed"], row["size"], row["position"], _permutation(row["seed"], row["size"]))
+        self._bags[guild_id] = bag
+        return bag
+
+    async def _next_from_bag(self, guild_id: int, size: int) -> int:
+        bag = await self._load_bag(guild_id)
+        # новый цикл: мешок пуст или список фраз изменился
+        if bag is None or bag.size != size or bag.position >= bag.size:
+            seed = random.getrandbits(31)
+            bag = _Bag(seed, size, 0, _permutation(seed, size))
+            self._bags[guild_id] = bag
+        idx = bag.order[bag.position]
+        bag.position += 1
+        await self.db.write(
+            "INSERT INTO phrase_bags (guild_id, seed, size, position) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET seed=excluded.seed, size=excluded.size, position=excluded.position",
+            (guild_id, bag.seed, bag.size, bag.position)
+        )
+        return idx
 
     async def seed_if_empty(self, guild_id: int, phrases: list[str]) -> int:
         """Вернёт сколько вставили."""
-        db = await self.db.connect()
-        try:
+        rows = [p for p in phrases if p.strip()]
+
+        async def seed(db) -> int:
+            # проверка и вставка в одной транзакции писателя — без гонки между параллельными вызовами
             cur = await db.execute("SELECT COUNT(*) FROM phrases WHERE guild_id = ?", (guild_id,))
             (count,) = await cur.fetchone()
             if count:
@@ -63,9 +150,10 @@ class PhraseService:
             now = datetime.now(timezone.utc).isoformat()
             await db.executemany(
                 "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, ?)",
-                [(guild_id, p, now) for p in phrases if p.strip()]
+                [(guild_id, p, now) for p in rows]
             )
-            await db.commit()
-            return len([p for p in phrases if p.strip()])
-        finally:
-            await db.close()
+            return len(rows)
+
+        inserted = await self.db.transaction(seed)
+        self.invalidate(guild_id)
+        return inserted
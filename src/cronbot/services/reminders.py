@@ -1,8 +1,12 @@
 import re
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+from typing import AsyncIterable, AsyncIterator
 import aiosqlite
+from ..bulk import ImportResult, chunks
 from ..db import Database
+from ..pagination import PAGE_SIZE, Page, iter_all, keyset_page
+from ..sharding import ALL_SHARDS, ShardFilter
 
 PRESETS = {
     "everyday": {"day_of_week": "*"},
@@ -28,29 +32,17 @@ class ReminderService:
         if preset not in PRESETS:
             raise ValueError("Неизвестный preset")
         h, m = parse_hhmm(time)
-        db = await self.db.connect()
-        try:
-            await db.execute(
-                "INSERT INTO crons (guild_id, channel_id, user_id, preset, time_h, time_m, tz, text, targetUser, created_at)"
-                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (guild_id, channel_id, user_id, preset, h, m, self.tz.key, text, targetUser,
-                 datetime.now(timezone.utc).isoformat())
-            )
-            await db.commit()
-            cur = await db.execute("SELECT last_insert_rowid()")
-            rid = (await cur.fetchone())[0]
-        finally:
-            await db.close()
-        return int(rid)
+        res = await self.db.write(
+            "INSERT INTO crons (guild_id, channel_id, user_id, preset, time_h, time_m, tz, text, targetUser, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, channel_id, user_id, preset, h, m, self.tz.key, text, targetUser,
+             datetime.now(timezone.utc).isoformat())
+        )
+        return int(res.lastrowid)
 
     async def delete_cron(self, guild_id:int, id:int) -> bool:
-        db = await self.db.connect()
-        try:
-            cur = await db.execute("DELETE FROM crons WHERE id = ? AND guild_id = ?", (id, guild_id))
-            await db.commit()
-            return cur.rowcount > 0
-        finally:
-            await db.close()
+        res = await self.db.write("DELETE FROM crons WHERE id = ? AND guild_id = ?", (id, guild_id))
+        return res.rowcount > 0
 
     async def list_crons(self, guild_id:int) -> list[aiosqlite.Row]:
         rows = []
@@ -58,5 +50,137 @@ class ReminderService:
             rows.append(row)
         return rows
 
+    async def page_crons(self, guild_id:int, *, after:int|None=None, before:int|None=None,
+                         limit:int=PAGE_SIZE) -> Page:
+        return await keyset_page(
+            self.db, "SELECT id, preset, time_h, time_m, tz, channel_id, text, targetUser FROM crons WHERE guild_id = ?",
+            (guild_id,), after=after, before=before, limit=limit,
+        )
+
+    async def import_crons(self, guild_id:int, user_id:int, records:AsyncIterable[dict|None],
+                           allowed_channels:set[int]|None=None) -> tuple[ImportResult, list[aiosqlite.Row]]:
+        """
+        Записи {preset, time, channel_id, text[, target_user]} пачками по CHUNK.
+        Дубликат — тот же канал, пресет, время и текст. Вернёт итог и вставленные строки —
+        чтобы зарегистрировать их в планировщике одним заходом.
+        """
+        result = ImportResult()
+        created: list[aiosqlite.Row] = []
+        now = datetime.now(timezone.utc).isoformat()
+        async for batch in chunks(records):
+            rows = []
+            for r in batch:
+                try:
+                    assert r is not None
+                    preset = str(r["preset"]).strip()
+                    if preset not in PRESETS:
+                        raise ValueError(preset)
+                    h, m = parse_hhmm(str(r["time"]).strip())
+                    channel_id = int(r["channel_id"])
+                    if allowed_channels is not None and channel_id not in allowed_channels:
+                        raise ValueError(channel_id)
+                    text = str(r["text"]).strip()
+                    if not text:
+                        raise ValueError("text")
+                    target = int(r["target_user"]) if r.get("target_user") not in (None, "") else None
+                except (AssertionError, KeyError, TypeError, ValueError):
+                    result.invalid += 1
+                    continue
+                rows.append((guild_id, channel_id, user_id, preset, h, m, self.tz.key, text, target, now,
+                             guild_id, text, channel_id, preset, h, m))
+            if not rows:
+                continue
+
+            async def insert(db, rows=rows):
+                cur = await db.execute("SELECT COALESCE(MAX(id), 0) FROM crons")
+                (last,) = await cur.fetchone()
+                cur = await db.executemany(
+                    "INSERT INTO crons (guild_id, channel_id, user_id, preset, time_h, time_m, tz, text, targetUser, created_at) "
+                    "SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM crons "
+                    "WHERE guild_id = ? AND text = ? AND channel_id = ? AND preset = ? AND time_h = ? AND time_m = ?)",
+                    rows,
+                )
+                # писатель один, так что всё с id > last — наше
+                cur = await db.execute("SELECT * FROM crons WHERE id > ? ORDER BY id", (last,))
+                return await cur.fetchall()
+
+            new = await self.db.transaction(insert)
+            created.extend(new)
+            result.inserted += len(new)
+            result.skipped += len(rows) - len(new)
+        return result, created
+
+    async def export_crons(self, guild_id:int) -> AsyncIterator[dict]:
+        async for r in iter_all(lambda **kw: self.page_crons(guild_id, **kw)):
+            yield {
+                "preset": r["preset"],
+                "time": f"{r['time_h']:02d}:{r['time_m']:02d}",
+                "channel_id": r["channel_id"],
+                "text": r["text"],
+                "target_user": r["targetUser"],
+            }
+
+    async def add_reminder(self, guild_id:int|None, channel_id:int, text:str, run_at:datetime) -> int:
+        res = await self.db.write(
+            "INSERT INTO reminders (guild_id, channel_id, text, run_at, created_at) VALUES (?, ?, ?, ?, ?)",
+            (guild_id, channel_id, text, run_at.astimezone(timezone.utc).isoformat(),
+             datetime.now(timezone.utc).isoformat())
+        )
+        return int(res.lastrowid)
+
+    async def pending_reminders(self, shard: ShardFilter = ALL_SHARDS) -> list[aiosqlite.Row]:
+        cond, params = shard.sql()
+        async with self.db.acquire() as db:
+            cur = await db.execute(
+                "SELECT id, guild_id, channel_id, text, run_at FROM reminders "
+                "WHERE delivered_at IS NULL" + (f" AND {cond}" if cond else "") + " ORDER BY run_at",
+                params,
+            )
+            return await cur.fetchall()
+
+    async def is_pending(self, reminder_id:int) -> bool:
+        async with self.db.acquire() as db:
+            cur = await db.execute(
+                "SELECT 1 FROM reminders WHERE id = ? AND delivered_at IS NULL", (reminder_id,)
+            )
+            return await cur.fetchone() is not None
+
+    async def mark_delivered(self, ids:list[int]) -> None:
+        if not ids:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        await self.db.write_many("UPDATE reminders SET delivered_at = ? WHERE id = ?", [(now, i) for i in ids])
+
+    async def gc_delivered(self, batch:int=500) -> int:
+        """Удаляет доставленные напоминания пачками по batch, чтобы не держать долгую запись."""
+        total = 0
+        while True:
+            res = await self.db.write(
+                "DELETE FROM reminders WHERE id IN "
+                "(SELECT id FROM reminders WHERE delivered_at IS NOT NULL LIMIT ?)",
+                (batch,)
+            )
+            total += res.rowcount
+            if res.rowcount < batch:
+                return total
+
     def when_after_minutes(self, minutes:int) -> datetime:
         return datetime.now(self.tz) + timedelta(minutes=minutes)
+
+
+def plan_catchup(rows:list, now:datetime, policy:str, max_late_minutes:int) -> tuple[list, list, list]:
+    """
+    Разложить невыполненные напоминания после рестарта:
+    (запланировать на будущее, доставить сейчас, пропустить).
+    policy: "deliver" — просроченные доставляем, если опоздание не больше max_late_minutes; "skip" — пропускаем все просроченные.
+    """
+    future, now_due, skipped = [], [], []
+    for r in rows:
+        run_at = datetime.fromisoformat(r["run_at"])
+        if run_at > now:
+            future.append(r)
+        elif policy == "deliver" and now - run_at <= timedelta(minutes=max_late_minutes):
+            now_due.append(r)
+        else:
+            skipped.append(r)
+    return future, now_due, skipped
@@ -0,0 +1,44 @@
+"""
+Разбиение гильдий по шардам, как это делает Discord: shard_id = (guild_id >> 22) % shard_count.
+В многопроцессном режиме каждый процесс грузит и планирует только свои гильдии.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+@dataclass(frozen=True)
+class ShardFilter:
+    """Какие гильдии принадлежат этому процессу. shard_count=None — все (один процесс / AutoShardedBot)."""
+    shard_id: int = 0
+    shard_count: int | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.shard_count is not None and self.shard_count > 1
+
+    def owns(self, guild_id: int | None) -> bool:
+        if not self.active:
+            return True
+        # личные сообщения Discord отдаёт шарду 0
+        if guild_id is None:
+            return self.shard_id == 0
+        assert self.shard_count is not None
+        return shard_for(guild_id, self.shard_count) == self.shard_id
+
+    def sql(self, column: str = "guild_id") -> tuple[str, tuple[int, ...]]:
+        """Условие для WHERE и его параметры; пустая строка — фильтр не нужен."""
+        if not self.active:
+            return "", ()
+        assert self.shard_count is not None
+        cond = f"(({column} >> 22) % ?) = ?"
+        if self.shard_id == 0:
+            cond = f"({column} IS NULL OR {cond})"
+        return cond, (self.shard_count, self.shard_id)
+
+
+ALL_SHARDS = ShardFilter()
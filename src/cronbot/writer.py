@@ -0,0 +1,148 @@
+"""
+Единственный писатель в SQLite: запросы на запись идут через очередь в одну задачу,
+которая склеивает их в групповые коммиты. Под всплеском команд — один BEGIN IMMEDIATE
+и один fsync на пачку вместо коммита на каждый вызов, и никаких «database is locked»
+между соединениями пула: пишет только одно соединение.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, TypeVar
+
+from .metrics import DB_WRITE_BATCH
+
+log = logging.getLogger("cronbot.db.writer")
+
+T = TypeVar("T")
+WriteFn = Callable[[Any], Awaitable[T]]
+
+
+@dataclass(frozen=True)
+class WriteResult:
+    lastrowid: int | None
+    rowcount: int
+
+
+class _Request:
+    __slots__ = ("fn", "future")
+
+    def __init__(self, fn: WriteFn, future: asyncio.Future):
+        self.fn = fn
+        self.future = future
+
+
+class GroupCommitWriter:
+    """
+    submit(fn) ставит fn(conn) в очередь; фьючер резолвится результатом fn после коммита пачки.
+    Каждый запрос — в своём SAVEPOINT: ошибка одного откатывает только его, остальные коммитятся.
+    window — сколько ждать попутчиков после первого запроса; всё, что накопилось, пока шёл
+    предыдущий коммит, забирается сразу.
+    """
+
+    def __init__(self, connect: Callable[[], Awaitable[Any]], *, window: float = 0.002, max_batch: int = 256):
+        self._connect = connect
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[_Request | None] = asyncio.Queue()
+        self._conn: Any = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._conn = await self._connect()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Дописать уже поставленное и закрыть соединение."""
+        if self._task is not None:
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def submit(self, fn: WriteFn[T]) -> T:
+        if self._task is None:
+            raise RuntimeError("writer is not running")
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Request(fn, fut))
+        return await fut
+
+    async def execute(self, sql: str, params: tuple = ()) -> WriteResult:
+        async def op(conn) -> WriteResult:
+            cur = await conn.execute(sql, params)
+            return WriteResult(cur.lastrowid, cur.rowcount)
+        return await self.submit(op)
+
+    async def executemany(self, sql: str, seq: list) -> WriteResult:
+        async def op(conn) -> WriteResult:
+            cur = await conn.executemany(sql, seq)
+            return WriteResult(cur.lastrowid, cur.rowcount)
+        return await self.submit(op)
+
+    async def _collect(self, first: _Request) -> tuple[list[_Request], bool]:
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                req = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    req = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if req is None:
+                return batch, True
+            batch.append(req)
+        return batch, False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch, stopping = await self._collect(first)
+            DB_WRITE_BATCH.observe(len(batch))
+            await self._commit(batch)
+
+    async def _commit(self, batch: list[_Request]) -> None:
+        conn = self._conn
+        results: list[tuple[bool, Any]] = []
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for req in batch:
+                await conn.execute("SAVEPOINT w")
+                try:
+                    res = await req.fn(conn)
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO w")
+                    await conn.execute("RELEASE w")
+                    results.append((False, e))
+                else:
+                    await conn.execute("RELEASE w")
+                    results.append((True, res))
+            await conn.commit()
+        except Exception as e:
+            log.exception("Group commit of %d writes failed", len(batch))
+            try:
+                await conn.rollback()
+            except Exception:
+                pass
+            results = [(False, e)] * len(batch)
+        for req, (ok, value) in zip(batch, results):
+            # вызывающий мог отмениться — запись всё равно уже сделана
+            if req.future.done():
+                continue
+            if ok:
+                req.future.set_result(value)
+            else:
+                req.future.set_exception(value)
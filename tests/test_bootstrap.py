@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+from cronbot.bot import RANDOM_MARKER, _bootstrap_default_phrase_crons
+from cronbot.config import Settings
+from cronbot.db import Database
+from cronbot.scheduler import Scheduler
+from cronbot.services.phrases import PhraseService
+
+pytestmark = pytest.mark.asyncio
+
+def _guild(gid, system_channel_id=None):
+    perms = SimpleNamespace(permissions_for=lambda me: SimpleNamespace(send_messages=True))
+    system = SimpleNamespace(id=system_channel_id, **vars(perms)) if system_channel_id else None
+    return SimpleNamespace(id=gid, me=None, system_channel=system, text_channels=[])
+
+async def _send(**kwargs):
+    pass
+
+@pytest.fixture
+async def db(tmp_path):
+    async with Database(str(tmp_path / "test.db")) as db:
+        yield db
+
+async def test_bootstrap_many_guilds(db):
+    cfg = Settings(DISCORD_TOKEN="x", DEFAULT_PHRASE_TIME="10:30", DEFAULT_PHRASES=["a", "b"])
+    bot = SimpleNamespace(user=SimpleNamespace(id=1))
+    scheduler = Scheduler("Europe/Tallinn")
+    phrases = PhraseService(db)
+
+    async with db.acquire() as conn:
+        # гильдия 2: уже есть дефолтный крон, но на старое время и без сида фраз
+        await conn.execute(
+            "INSERT INTO crons (guild_id, channel_id, user_id, preset, time_h, time_m, tz, text, created_at) "
+            "VALUES (2, 22, 1, 'everyday', 9, 0, 'Europe/Tallinn', ?, 'now')",
+            (RANDOM_MARKER,),
+        )
+        # гильдия 3: основной канал задан явно
+        await conn.execute("INSERT INTO guild_settings (guild_id, default_channel_id) VALUES (3, 33)")
+        await conn.commit()
+
+    guilds = [_guild(1, system_channel_id=11), _guild(2), _guild(3), _guild(4)]
+    await _bootstrap_default_phrase_crons(bot, guilds, cfg, db, scheduler, phrases, _send)
+
+    async with db.acquire() as conn:
+        cur = await conn.execute(
+            "SELECT guild_id, channel_id, time_h, time_m FROM crons WHERE text = ? ORDER BY guild_id",
+            (RANDOM_MARKER,),
+        )
+        rows = [tuple(r) for r in await cur.fetchall()]
+    # гильдия 4 без доступных каналов — пропущена
+    assert rows == [(1, 11, 10, 30), (2, 22, 10, 30), (3, 33, 10, 30)]
+    assert scheduler.cron_count() == 3
+    for gid in (1, 2, 3, 4):
+        assert len(await phrases.list_phrases(gid)) == 2
+
+    # повторный бутстрап ничего не дублирует
+    await _bootstrap_default_phrase_crons(bot, guilds, cfg, db, scheduler, phrases, _send)
+    async with db.acquire() as conn:
+        cur = await conn.execute("SELECT COUNT(*) FROM crons")
+        assert (await cur.fetchone())[0] == 3
+    assert len(await phrases.list_phrases(1)) == 2
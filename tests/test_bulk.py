@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from cronbot.bulk import BulkFormatError, detect_format, iter_records, write_records, open_export
+from cronbot.db import Database
+from cronbot.scheduler import CronSpec, Scheduler
+from cronbot.services.confronts import ConfrontService
+from cronbot.services.phrases import PhraseService
+from cronbot.services.reminders import ReminderService
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def db(tmp_path):
+    async with Database(str(tmp_path / "test.db")) as db:
+        yield db
+
+
+async def _lines(*lines):
+    for line in lines:
+        yield line
+
+
+async def _collect(agen):
+    return [x async for x in agen]
+
+
+async def test_detect_format():
+    assert detect_format("a.TXT") == "txt"
+    assert detect_format("a.ndjson") == "jsonl"
+    assert detect_format("a.csv") == "csv"
+    with pytest.raises(BulkFormatError):
+        detect_format("a.xlsx")
+
+
+async def test_iter_records_formats():
+    assert await _collect(iter_records(_lines("one", "", " two "), "txt")) == [{"text": "one"}, {"text": "two"}]
+    assert await _collect(iter_records(_lines('{"text": "a"}', "nope", "[1]"), "jsonl")) == [{"text": "a"}, None, None]
+    rows = await _collect(iter_records(_lines("preset,time,text", 'everyday,10:30,"a, b"', "broken"), "csv"))
+    assert rows == [{"preset": "everyday", "time": "10:30", "text": "a, b"}, None]
+
+
+async def test_phrase_import_dedups_across_chunks(db):
+    svc = PhraseService(db)
+    await svc.add_phrase(1, "p0")
+    # 1200 строк: три пачки по CHUNK, каждая фраза дважды, одна уже в БД
+    lines = [f"p{i % 600}" for i in range(1200)] + [""]
+    result = await svc.import_phrases(1, iter_records(_lines(*lines), "txt"))
+    assert (result.inserted, result.skipped, result.invalid) == (599, 601, 0)
+    assert len(await svc.list_phrases(1)) == 600
+    # кэш сброшен
+    assert await svc.get_random(1) is not None
+
+
+async def test_phrase_export_roundtrip(db):
+    svc = PhraseService(db)
+    for i in range(3):
+        await svc.add_phrase(1, f"фраза {i}")
+    for fmt in ("txt", "jsonl", "csv"):
+        out = open_export()
+        assert await write_records(out, svc.export_phrases(1), fmt, ["text"]) == 3
+        lines = out.read().decode().splitlines()
+        again = await _collect(iter_records(_lines(*lines), fmt))
+        assert [r["text"] for r in again] == ["фраза 0", "фраза 1", "фраза 2"]
+
+
+async def test_cron_import_returns_new_rows_and_registers(db):
+    svc = ReminderService(db, "Europe/Tallinn")
+    await svc.add_cron(1, 10, 5, "everyday", "10:30", "hello")
+    records = [
+        {"preset": "everyday", "time": "10:30", "channel_id": 10, "text": "hello"},  # уже есть
+        {"preset": "weekdays", "time": "09:00", "channel_id": 10, "text": "standup", "target_user": 7},
+        {"preset": "weekdays", "time": "09:00", "channel_id": 10, "text": "standup"},  # повтор в файле
+        {"preset": "never", "time": "09:00", "channel_id": 10, "text": "x"},
+        {"preset": "everyday", "time": "09:00", "channel_id": 99, "text": "чужой канал"},
+        None,
+    ]
+    result, created = await svc.import_crons(1, 5, _lines(*records), allowed_channels={10})
+    assert (result.inserted, result.skipped, result.invalid) == (1, 2, 3)
+    assert [(r["text"], r["targetUser"], r["user_id"]) for r in created] == [("standup", 7, 5)]
+
+    exported = await _collect(svc.export_crons(1))
+    assert [e["time"] for e in exported] == ["10:30", "09:00"]
+
+    async def noop(**kw):
+        pass
+
+    s = Scheduler("Europe/Tallinn")
+    specs = {f"cron:{r['id']}": CronSpec(noop, r["time_h"], r["time_m"], {"day_of_week": "mon-fri"}, {}) for r in created}
+    assert s.add_crons(specs) == 1 and s.cron_count() == 1
+    assert s.add_crons(specs) == 0
+
+
+async def test_confront_import_updates_index(db):
+    svc = ConfrontService(db)
+    await svc.load()
+    lines = [
+        json.dumps({"target_user_id": 11, "counter_reaction": "🔥"}),
+        json.dumps({"target_user_id": 11, "counter_reaction": "🔥"}),
+        json.dumps({"target_user_id": 12, "counter_reaction": "🤡", "trigger_reaction": "👍"}),
+        json.dumps({"target_user_id": "x", "counter_reaction": "🤡"}),
+    ]
+    result = await svc.import_rules(1, 5, iter_records(_lines(*lines), "jsonl"))
+    assert (result.inserted, result.skipped, result.invalid) == (2, 1, 1)
+    assert svc.message_rules(1, 11) and svc.is_watched(1, "👍")
+    assert [r["target_user_id"] for r in await _collect(svc.export_rules(1))] == [11, 12]
@@ -0,0 +1,16 @@
+from cronbot.cache import LRUCache
+
+def test_lru_evicts_least_recently_used():
+    c = LRUCache(2)
+    c.put(1, "a")
+    c.put(2, "b")
+    assert c.get(1) == "a"  # 1 становится свежим
+    c.put(3, "c")
+    assert 2 not in c
+    assert c.get(1) == "a" and c.get(3) == "c"
+    assert len(c) == 2
+
+def test_lru_missing_key_default():
+    c = LRUCache(1)
+    assert c.get(42) is None
+    assert c.get(42, 0) == 0
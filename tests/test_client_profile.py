@@ -0,0 +1,34 @@
+import pytest
+from discord.ext import commands
+
+from cronbot.bot import client_options
+
+
+def test_default_profile_keeps_discord_defaults():
+    bot = commands.Bot(command_prefix="!", **client_options("default"))
+    state = bot._connection
+    assert state.max_messages == 1000
+    assert state.member_cache_flags.voice
+
+
+def test_lean_profile_trims_caches_and_intents():
+    bot = commands.Bot(command_prefix="!", **client_options("lean"))
+    state = bot._connection
+    assert state.max_messages is None
+    assert state.member_cache_flags.value == 0
+    assert not state._chunk_guilds
+    assert not state.cache_guild_expressions
+    intents = state._intents
+    assert intents.guilds and intents.guild_messages and intents.guild_reactions
+    assert not (intents.voice_states or intents.typing or intents.emojis_and_stickers or intents.dm_messages)
+
+
+@pytest.mark.parametrize("override, expected", [(500, 500), (0, None)])
+def test_max_messages_override(override, expected):
+    opts = client_options("lean", max_messages=override)
+    assert commands.Bot(command_prefix="!", **opts)._connection.max_messages == expected
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        client_options("tiny")
@@ -0,0 +1,84 @@
+import asyncio
+
+import discord
+import pytest
+from discord import app_commands
+from discord.ext import commands
+
+from cronbot.command_sync import stored_hashes, sync_commands, tree_hash
+from cronbot.db import Database
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def db(tmp_path):
+    async with Database(str(tmp_path / "test.db")) as db:
+        yield db
+
+
+def _bot(app_id: int = 1) -> commands.Bot:
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none(), application_id=app_id)
+
+    @app_commands.command(name="ping", description="pong")
+    async def ping(itx):
+        pass
+
+    bot.tree.add_command(ping)
+    return bot
+
+
+def _track_sync(bot: commands.Bot, delay: float = 0.0, fail: set | None = None) -> dict:
+    calls = {"scopes": [], "active": 0, "peak": 0}
+
+    async def sync(*, guild=None):
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+        try:
+            await asyncio.sleep(delay)
+            gid = None if guild is None else guild.id
+            if fail and gid in fail:
+                raise RuntimeError("429")
+            calls["scopes"].append(gid)
+            return []
+        finally:
+            calls["active"] -= 1
+
+    bot.tree.sync = sync  # type: ignore[method-assign]
+    return calls
+
+
+async def test_sync_skipped_when_tree_unchanged(db):
+    bot = _bot()
+    calls = _track_sync(bot)
+    assert await sync_commands(bot.tree, db, [None]) == {"global": True}
+    assert await sync_commands(bot.tree, db, [None]) == {"global": False}
+    assert calls["scopes"] == [None]
+
+    @app_commands.command(name="pong", description="ping")
+    async def pong(itx):
+        pass
+
+    bot.tree.add_command(pong)
+    assert await sync_commands(bot.tree, db, [None]) == {"global": True}
+    assert await sync_commands(bot.tree, db, [None], force=True) == {"global": True}
+    assert calls["scopes"] == [None, None, None]
+
+
+async def test_hash_is_stable_and_depends_on_application():
+    a, b = _bot(1), _bot(1)
+    assert tree_hash(a.tree) == tree_hash(b.tree)
+    assert tree_hash(a.tree) != tree_hash(_bot(2).tree)
+
+
+async def test_guild_scopes_synced_concurrently_failures_retried(db):
+    bot = _bot()
+    calls = _track_sync(bot, delay=0.02, fail={3})
+    res = await sync_commands(bot.tree, db, [1, 2, 3, 4, 5], concurrency=3)
+    assert res == {"guild:1": True, "guild:2": True, "guild:3": False, "guild:4": True, "guild:5": True}
+    assert calls["peak"] == 3
+    assert set(await stored_hashes(db)) == {"guild:1", "guild:2", "guild:4", "guild:5"}
+
+    calls = _track_sync(bot)
+    await sync_commands(bot.tree, db, [1, 2, 3, 4, 5])
+    assert calls["scopes"] == [3]
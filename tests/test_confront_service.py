@@ -10,7 +10,8 @@ def db_path(tmp_path):
 
 @pytest.fixture
 async def svc(db_path):
-    return ConfrontService(Database(db_path))
+    async with Database(db_path) as db:
+        yield ConfrontService(db)
 
 async def test_confront_crud(svc):
     gid = 10
@@ -34,3 +35,38 @@ async def test_confront_crud(svc):
     ok = await svc.remove(gid, cid)
     assert ok is True
     assert await svc.list(gid) == []
+
+async def test_index_write_through(svc):
+    gid = 20
+    msg_id = await svc.add(guild_id=gid, target_user_id=1, counter_reaction="🤡", created_by=2)
+    react_id = await svc.add(
+        guild_id=gid, target_user_id=1, counter_reaction="🔥", created_by=2, trigger_reaction="👍"
+    )
+
+    assert [r.id for r in svc.message_rules(gid, 1)] == [msg_id]
+    assert [r.id for r in svc.reaction_rules(gid, 1, "👍")] == [react_id]
+    assert svc.reaction_rules(gid, 1, "👎") == []
+    assert svc.message_rules(gid, 999) == []
+
+    await svc.remove(gid, msg_id)
+    assert svc.message_rules(gid, 1) == []
+    assert [r.id for r in svc.reaction_rules(gid, 1, "👍")] == [react_id]
+
+async def test_index_load_from_db(svc, db_path):
+    cid = await svc.add(guild_id=30, target_user_id=5, counter_reaction="🔫", created_by=5)
+    fresh = ConfrontService(svc.db)
+    assert fresh.message_rules(30, 5) == []
+    assert await fresh.load() == 1
+    assert [r.id for r in fresh.message_rules(30, 5)] == [cid]
+
+async def test_watched_emoji_prefilter(svc):
+    a = await svc.add(guild_id=40, target_user_id=1, counter_reaction="🔥", created_by=2, trigger_reaction="👍")
+    b = await svc.add(guild_id=40, target_user_id=3, counter_reaction="🔥", created_by=2, trigger_reaction="👍")
+    assert svc.is_watched(40, "👍")
+    assert not svc.is_watched(40, "👎")
+    assert not svc.is_watched(41, "👍")
+
+    await svc.remove(40, a)
+    assert svc.is_watched(40, "👍")
+    await svc.remove(40, b)
+    assert not svc.is_watched(40, "👍")
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+from cronbot.cron_send import NO_PHRASES, RANDOM_MARKER, CronSender
+from cronbot.heap_scheduler import HeapScheduler
+from cronbot.metrics import CRON_SEND_SECONDS
+from cronbot.services.reminders import PRESETS
+
+pytestmark = pytest.mark.asyncio
+
+TZ = "Europe/Tallinn"
+
+
+class FakePhrases:
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.calls = 0
+
+    async def get_random(self, guild_id):
+        self.calls += 1
+        return self.texts.pop(0) if self.texts else None
+
+
+class FakeDelivery:
+    def __init__(self):
+        self.sent: list[tuple[int, str]] = []
+
+    async def send(self, channel_id, content):
+        self.sent.append((channel_id, content))
+        return True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _sender(texts=(), channels=(10,), clock=None):
+    channels = {c: SimpleNamespace(id=c, guild=SimpleNamespace(id=1)) for c in channels}
+    phrases, delivery = FakePhrases(texts), FakeDelivery()
+    sender = CronSender(channels.get, phrases, delivery, ttl=30, **({"clock": clock} if clock else {}))
+    return sender, phrases, delivery
+
+
+async def test_prefetched_phrase_is_sent_without_lookup():
+    sender, phrases, delivery = _sender(["a", "b"])
+    before = CRON_SEND_SECONDS.count(source="prefetched")
+    await sender.prepare(10, RANDOM_MARKER, 1)
+    await sender.prepare(10, RANDOM_MARKER, 1)
+    assert phrases.calls == 2 and sender.prepared == 2
+    await sender(10, RANDOM_MARKER, 1)
+    await sender(10, RANDOM_MARKER, 1)
+    assert phrases.calls == 2
+    assert delivery.sent == [(10, "a"), (10, "b")]
+    assert sender.prepared == 0
+    assert CRON_SEND_SECONDS.count(source="prefetched") - before == 2
+
+
+async def test_inline_fallback_stale_and_missing_channel():
+    clock = FakeClock()
+    sender, phrases, delivery = _sender(["old", "fresh"], clock=clock)
+    await sender.prepare(10, RANDOM_MARKER, 1)
+    clock.now += 31
+    await sender(10, RANDOM_MARKER, 1)
+    await sender(10, "plain text", 1)
+    await sender(10, RANDOM_MARKER, 1)  # фразы кончились
+    await sender(99, "nowhere", 1)
+    assert delivery.sent == [(10, "fresh"), (10, "plain text"), (10, NO_PHRASES)]
+
+
+async def test_scheduler_schedules_prefetch_before_group():
+    s = HeapScheduler(TZ, prefetch_lead=5)
+    sender, _, _ = _sender()
+
+    async def plain(**kwargs):
+        pass
+
+    s.add_cron("cron:1", plain, hour=10, minute=0, expr=PRESETS["everyday"], payload={})
+    sig = s._member_sig["cron:1"]
+    assert not s._has_job(s._prefetch_id(sig))
+    s.add_cron("cron:2", sender, hour=10, minute=0, expr=PRESETS["everyday"],
+               payload={"channel_id": 10, "text": "x", "guild_id": 1})
+    pre = s._jobs[s._prefetch_id(sig)]
+    assert (pre.hour, pre.minute, pre.second) == (9, 59, 55)
+
+    await pre.fn()
+    assert sender.prepared == 1
+
+    s.remove("cron:1")
+    s.remove("cron:2")
+    assert s.job_count() == 0
+
+    # у полуночи заготовка уехала бы в прошлые сутки — не планируем
+    s.add_cron("cron:3", sender, hour=0, minute=0, expr=PRESETS["weekdays"], payload={"channel_id": 10, "text": "x"})
+    assert not s._has_job(s._prefetch_id(s._member_sig["cron:3"]))
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from cronbot.db import Database
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "test.db")
+
+async def test_open_creates_schema_once(db_path):
+    async with Database(db_path, pool_size=2) as db:
+        async with db.acquire() as conn:
+            cur = await conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'crons'")
+            assert await cur.fetchone() is not None
+        # повторный open не пересоздаёт пул
+        pool = db._pool
+        await db.open()
+        assert db._pool is pool
+
+async def test_acquire_returns_connection_to_pool(db_path):
+    async with Database(db_path, pool_size=2) as db:
+        assert db._pool.qsize() == 2
+        async with db.acquire() as conn:
+            assert db._pool.qsize() == 1
+        assert db._pool.qsize() == 2
+        async with db.acquire() as conn2:
+            assert conn2 in db._conns
+
+async def test_uncommitted_write_rolled_back_on_release(db_path):
+    async with Database(db_path, pool_size=1) as db:
+        async with db.acquire() as conn:
+            await conn.execute(
+                "INSERT INTO phrases (guild_id, text, created_at) VALUES (1, 'x', 'now')"
+            )
+            assert conn.in_transaction
+        async with db.acquire() as conn:
+            assert not conn.in_transaction
+            cur = await conn.execute("SELECT COUNT(*) FROM phrases")
+            assert (await cur.fetchone())[0] == 0
+
+async def test_close_is_idempotent(db_path):
+    db = Database(db_path)
+    await db.open()
+    await db.close()
+    await db.close()
+
+async def test_second_borrower_waits(db_path):
+    async with Database(db_path, pool_size=1) as db:
+        order = []
+
+        async def second():
+            async with db.acquire():
+                order.append("second")
+
+        async with db.acquire():
+            task = asyncio.create_task(second())
+            await asyncio.sleep(0.05)
+            assert order == []
+            order.append("first")
+        await asyncio.wait_for(task, 5)
+        assert order == ["first", "second"]
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+from cronbot.delivery import DeliveryQueue, TokenBucket
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeChannel:
+    """Оффлайн-канал: пишет отправленное, умеет падать заданными ошибками."""
+
+    def __init__(self, cid, errors=(), delay=0.0, shared=None):
+        self.id = cid
+        self.shared = shared if shared is not None else SimpleNamespace(in_flight=0, peak=0)
+        self.sent = []
+        self.errors = list(errors)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, content):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.shared.in_flight += 1
+        self.shared.peak = max(self.shared.peak, self.shared.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            self.sent.append(content)
+        finally:
+            self.in_flight -= 1
+            self.shared.in_flight -= 1
+
+
+def _http(status):
+    return discord.HTTPException(SimpleNamespace(status=status, reason="x"), "boom")
+
+
+def _queue(channels, **kw):
+    kw.setdefault("base_backoff", 0.001)
+    return DeliveryQueue(channels.get, **kw)
+
+
+async def test_per_channel_order_and_counters():
+    chans = {1: FakeChannel(1), 2: FakeChannel(2)}
+    q = _queue(chans, rate=1000, burst=1000)
+    results = await asyncio.gather(*(q.send(cid, f"{cid}:{i}") for i in range(5) for cid in (1, 2)))
+    assert all(results)
+    assert chans[1].sent == [f"1:{i}" for i in range(5)]
+    assert chans[2].sent == [f"2:{i}" for i in range(5)]
+    snap = q.snapshot()
+    assert snap["sent"] == 10 and snap["failed"] == 0 and snap["queue_depth"] == 0
+
+
+async def test_retries_transient_errors_then_gives_up():
+    chans = {1: FakeChannel(1, errors=[_http(503), discord.RateLimited(0.001)]), 2: FakeChannel(2, errors=[_http(500)] * 5)}
+    q = _queue(chans, rate=1000, burst=1000, max_retries=2)
+    assert await q.send(1, "ok") is True
+    assert await q.send(2, "never") is False
+    assert chans[1].sent == ["ok"]
+    assert q.stats.retried == 4 and q.stats.failed == 1
+
+
+async def test_non_retryable_and_missing_channel():
+    chans = {1: FakeChannel(1, errors=[discord.Forbidden(SimpleNamespace(status=403, reason="x"), "no")])}
+    q = _queue(chans, rate=1000, burst=1000)
+    assert await q.send(1, "x") is False
+    assert await q.send(999, "x") is False
+    assert q.stats.retried == 0 and q.stats.failed == 2
+
+
+async def test_bounded_concurrency():
+    shared = SimpleNamespace(in_flight=0, peak=0)
+    chans = {i: FakeChannel(i, delay=0.01, shared=shared) for i in range(10)}
+    q = _queue(chans, rate=1000, burst=1000, concurrency=3)
+    await asyncio.gather(*(q.send(i, "x") for i in range(10)))
+    assert shared.peak == 3
+    assert sum(len(c.sent) for c in chans.values()) == 10
+
+
+async def test_token_bucket_limits_rate():
+    t = [0.0]
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: t[0])
+    await bucket.acquire()
+    await bucket.acquire()
+    waiter = asyncio.create_task(bucket.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    t[0] = 0.2
+    await asyncio.wait_for(waiter, 1)
+
+
+async def test_queue_overflow_drops():
+    chans = {1: FakeChannel(1, delay=0.01)}
+    q = _queue(chans, rate=1000, burst=1000, max_queue_per_channel=2)
+    futs = [q.submit(1, str(i)) for i in range(4)]
+    results = await asyncio.gather(*futs)
+    assert results.count(False) == 2 and q.stats.dropped == 2
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from cronbot.events import EventPool
+from cronbot.metrics import EVENT_QUEUE_WAIT_SECONDS, EVENTS
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_slow_handler_does_not_block_submit():
+    pool = EventPool("t-slow", workers=2)
+    gate = asyncio.Event()
+    done: list[int] = []
+
+    async def handler(i):
+        if i == 0:
+            await gate.wait()
+        done.append(i)
+
+    for i in range(5):
+        assert await pool.submit("ev", handler, i)
+    await asyncio.sleep(0.01)
+    # первый висит, второй воркер разобрал остальные
+    assert done == [1, 2, 3, 4]
+    gate.set()
+    await pool.drain()
+    assert sorted(done) == [0, 1, 2, 3, 4]
+    assert EVENT_QUEUE_WAIT_SECONDS.count(cog="t-slow", event="ev") == 5
+    await pool.close()
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_oldest", [0, 2, 3]), ("drop_new", [0, 1, 2])])
+async def test_overflow_policies(policy, kept):
+    pool = EventPool(f"t-{policy}", workers=1, max_queue=2, overflow=policy)
+    gate = asyncio.Event()
+    seen: list[int] = []
+
+    async def handler(i):
+        await gate.wait()
+        seen.append(i)
+
+    assert await pool.submit("ev", handler, 0)
+    await asyncio.sleep(0)  # воркер забрал первое и ждёт
+    assert await pool.submit("ev", handler, 1)
+    assert await pool.submit("ev", handler, 2)
+    assert not await pool.submit("ev", handler, 3)
+    assert pool.queue_depth == 2
+    gate.set()
+    await pool.drain()
+    assert seen == kept
+    assert EVENTS.value(cog=f"t-{policy}", event="ev", result="dropped") == 1
+    await pool.close()
+
+
+async def test_block_policy_waits_and_failures_are_counted():
+    pool = EventPool("t-block", workers=1, max_queue=1, overflow="block")
+
+    async def handler(i):
+        await asyncio.sleep(0.01)
+        if i == 1:
+            raise RuntimeError("boom")
+
+    await asyncio.gather(*(pool.submit("ev", handler, i) for i in range(4)))
+    await pool.drain()
+    assert EVENTS.value(cog="t-block", event="ev", result="handled") == 3
+    assert EVENTS.value(cog="t-block", event="ev", result="failed") == 1
+    assert EVENTS.value(cog="t-block", event="ev", result="dropped") == 0
+    await pool.close()
+
+
+async def test_unknown_policy():
+    with pytest.raises(ValueError):
+        EventPool("t-bad", overflow="random")  # type: ignore[arg-type]
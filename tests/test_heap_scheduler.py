@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from cronbot.heap_scheduler import HeapScheduler, parse_day_of_week
+from cronbot.scheduler import make_scheduler, Scheduler
+from cronbot.services.reminders import PRESETS
+
+pytestmark = pytest.mark.asyncio
+
+TZ = "Europe/Tallinn"
+
+async def test_parse_presets():
+    assert parse_day_of_week(PRESETS["everyday"]["day_of_week"]) == set(range(7))
+    assert parse_day_of_week(PRESETS["weekdays"]["day_of_week"]) == {0, 1, 2, 3, 4}
+    assert parse_day_of_week(PRESETS["weekend"]["day_of_week"]) == {5, 6}
+    assert parse_day_of_week("fri-mon") == {4, 5, 6, 0}
+
+async def test_next_fire_respects_days():
+    s = HeapScheduler(TZ)
+    s.add_cron("cron:1", _noop, hour=10, minute=0, expr=PRESETS["weekdays"], payload={})
+    job = s._jobs[s._group_id(s._member_sig["cron:1"])]
+    # суббота 2024-06-01 12:00 -> понедельник 10:00
+    after = datetime(2024, 6, 1, 12, 0, tzinfo=s.tz)
+    assert s.next_fire(job, after) == datetime(2024, 6, 3, 10, 0, tzinfo=s.tz)
+    # строго после: ровно в момент срабатывания -> следующий день
+    mon = datetime(2024, 6, 3, 10, 0, tzinfo=s.tz)
+    assert s.next_fire(job, mon) == datetime(2024, 6, 4, 10, 0, tzinfo=s.tz)
+
+async def _noop(**kwargs):
+    pass
+
+async def test_once_fires_and_remove_cancels():
+    s = HeapScheduler(TZ)
+    fired = []
+
+    async def cb(tag):
+        fired.append(tag)
+
+    now = datetime.now(s.tz)
+    s.add_once(cb, now + timedelta(milliseconds=50), {"tag": "a"}, job_id="once:a")
+    s.add_once(cb, now + timedelta(milliseconds=60), {"tag": "b"}, job_id="once:b")
+    s.add_once(cb, now + timedelta(milliseconds=10), {"tag": "c"})
+    s.remove("once:b")
+    s.start()
+    await asyncio.sleep(0.2)
+    s.stop()
+    assert fired == ["c", "a"]
+    assert s.job_count() == 0
+
+async def test_earlier_job_wakes_sleeping_loop():
+    s = HeapScheduler(TZ)
+    fired = asyncio.Event()
+
+    async def cb():
+        fired.set()
+
+    s.start()
+    s.add_once(cb, datetime.now(s.tz) + timedelta(hours=1), {}, job_id="once:late")
+    await asyncio.sleep(0.01)
+    s.add_once(cb, datetime.now(s.tz) + timedelta(milliseconds=20), {}, job_id="once:soon")
+    await asyncio.wait_for(fired.wait(), 1)
+    s.stop()
+
+async def test_make_scheduler():
+    assert isinstance(make_scheduler("apscheduler", TZ), Scheduler)
+    assert isinstance(make_scheduler("heap", TZ, jitter_window=60), HeapScheduler)
+    with pytest.raises(ValueError):
+        make_scheduler("nope", TZ)
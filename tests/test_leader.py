@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from cronbot.db import Database
+from cronbot.heap_scheduler import HeapScheduler
+from cronbot.leader import LeaderLease
+from cronbot.scheduler import Scheduler
+
+pytestmark = pytest.mark.asyncio
+
+TZ = "Europe/Tallinn"
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 1_000_000.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+async def db(tmp_path):
+    async with Database(str(tmp_path / "test.db")) as db:
+        yield db
+
+
+def _lease(db, holder, clock, **kw):
+    return LeaderLease(db, holder=holder, ttl=15, clock=clock, monotonic=clock, **kw)
+
+
+async def test_single_holder_and_takeover_after_expiry(db):
+    clock = FakeClock()
+    a, b = _lease(db, "a", clock), _lease(db, "b", clock)
+    assert await a.try_acquire()
+    assert not await b.try_acquire()
+    token = a.token
+    clock.t += 10
+    assert await a.try_acquire() and a.token == token  # продление не меняет эпоху
+    assert not await b.try_acquire()
+
+    clock.t += 16  # a перестал продлеваться
+    assert not a.is_leader()  # фенсинг раньше, чем аренду заберут
+    assert await b.try_acquire() and b.token == token + 1
+    assert not await a.try_acquire()
+
+
+async def test_fence_kicks_in_before_db_expiry(db):
+    clock = FakeClock()
+    a = _lease(db, "a", clock)
+    await a.try_acquire()
+    clock.t += 15 - 3 + 0.1  # ttl - skew
+    assert not a.is_leader()
+
+
+async def test_release_hands_over_immediately(db):
+    clock = FakeClock()
+    a, b = _lease(db, "a", clock), _lease(db, "b", clock)
+    await a.try_acquire()
+    await a.release()
+    assert await b.try_acquire()
+
+
+async def test_tick_callbacks(db):
+    clock = FakeClock()
+    events = []
+
+    async def acquired():
+        events.append("acquire")
+
+    async def lost():
+        events.append("lose")
+
+    a = _lease(db, "a", clock, on_acquire=acquired, on_lose=lost)
+    b = _lease(db, "b", clock)
+    await a.tick()
+    await a.tick()
+    clock.t += 20
+    await b.try_acquire()
+    await a.tick()
+    assert events == ["acquire", "lose"]
+
+
+async def test_fenced_scheduler_skips_fires():
+    s = HeapScheduler(TZ)
+    leader = False
+    s.fence = lambda: leader
+    fired = []
+
+    async def cb(tag):
+        fired.append(tag)
+
+    s.add_once(cb, datetime.now(s.tz) - timedelta(seconds=1), {"tag": "stale"})
+    s.start()
+    await asyncio.sleep(0.05)
+    leader = True
+    s.add_once(cb, datetime.now(s.tz), {"tag": "ok"})
+    await asyncio.sleep(0.05)
+    s.stop()
+    assert fired == ["ok"]
+
+
+@pytest.mark.parametrize("engine", [Scheduler, HeapScheduler])
+async def test_pause_keeps_jobs(engine):
+    async def noop(**kw):
+        pass
+
+    s = engine(TZ)
+    s.add_cron("cron:1", noop, hour=10, minute=0, expr={"day_of_week": "*"}, payload={})
+    s.pause()
+    assert s.running
+    s.resume()
+    assert s.running and s._has_job(s._group_id(s._member_sig["cron:1"]))
+    s.stop()
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from cronbot.db import Database
+from cronbot.health import HealthServer
+from cronbot.metrics import Counter, Gauge, Histogram, Registry
+
+pytestmark = pytest.mark.asyncio
+
+async def test_prometheus_text_format():
+    reg = Registry()
+    c = reg.register(Counter("x_total", "help", ("result",)))
+    g = reg.register(Gauge("x_depth", "help"))
+    h = reg.register(Histogram("x_seconds", "help", buckets=(0.1, 1.0)))
+    c.inc(result="sent")
+    c.inc(2, result="sent")
+    g.set_function(lambda: 7)
+    h.observe(0.05)
+    h.observe(0.5)
+    h.observe(5)
+    text = reg.render()
+    assert '# TYPE x_total counter' in text
+    assert 'x_total{result="sent"} 3.0' in text
+    assert 'x_depth 7.0' in text
+    assert 'x_seconds_bucket{le="0.1"} 1' in text
+    assert 'x_seconds_bucket{le="1.0"} 2' in text
+    assert 'x_seconds_bucket{le="+Inf"} 3' in text
+    assert 'x_seconds_count 3' in text
+
+async def test_healthz_and_metrics(tmp_path):
+    async with Database(str(tmp_path / "test.db")) as db:
+        ready = {"v": True}
+        bot = SimpleNamespace(is_ready=lambda: ready["v"], is_closed=lambda: False)
+        scheduler = SimpleNamespace(running=True)
+        srv = HealthServer(bot, db, scheduler, "127.0.0.1", 0)
+        async with TestClient(TestServer(srv.app())) as client:
+            resp = await client.get("/healthz")
+            assert resp.status == 200
+            assert await resp.json() == {"gateway": True, "scheduler": True, "db": True}
+
+            ready["v"] = False
+            resp = await client.get("/healthz")
+            assert resp.status == 503
+
+            resp = await client.get("/metrics")
+            assert resp.status == 200
+            assert "cronbot_db_query_seconds_count" in await resp.text()
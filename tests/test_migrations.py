@@ -0,0 +1,50 @@
+import pytest
+from cronbot.db import Database
+from cronbot.migrations import MIGRATIONS, current_version, migrate
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+async def db(tmp_path):
+    async with Database(str(tmp_path / "test.db"), pool_size=1) as db:
+        yield db
+
+async def _plan(db, sql, params):
+    async with db.acquire() as conn:
+        cur = await conn.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return " | ".join(r["detail"] for r in await cur.fetchall())
+
+async def test_migrations_applied_once(db):
+    async with db.acquire() as conn:
+        assert await current_version(conn) == MIGRATIONS[-1][0]
+        # повторный прогон — no-op
+        assert await migrate(conn) == MIGRATIONS[-1][0]
+        cur = await conn.execute("SELECT COUNT(*) FROM schema_version")
+        assert (await cur.fetchone())[0] == len(MIGRATIONS)
+
+@pytest.mark.parametrize("sql,params,index", [
+    # ReminderService.list_crons / Database.iter_crons
+    ("SELECT * FROM crons WHERE guild_id = ?", (1,), "idx_crons_guild_id"),
+    # поиск дефолтного крона
+    ("SELECT * FROM crons WHERE guild_id = ? AND text = ? LIMIT 1", (1, "x"), "idx_crons_guild_text"),
+    # PhraseService
+    ("SELECT text FROM phrases WHERE guild_id = ? ORDER BY id", (1,), "idx_phrases_guild_id_text"),
+    ("SELECT id, text FROM phrases WHERE guild_id = ? ORDER BY id", (1,), "idx_phrases_guild_id_text"),
+    ("SELECT COUNT(*) FROM phrases WHERE guild_id = ?", (1,), "idx_phrases_guild_id_text"),
+    # keyset-страницы /listcrons, /phrase_list, /confront_list
+    ("SELECT id, text FROM crons WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?", (1, 0, 11), "idx_crons_guild_id"),
+    ("SELECT id, text FROM crons WHERE guild_id = ? AND id < ? ORDER BY id DESC LIMIT ?", (1, 9, 11), "idx_crons_guild_id"),
+    ("SELECT id, text FROM phrases WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?", (1, 0, 11), "idx_phrases_guild_id_text"),
+    ("SELECT id FROM confronts WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?", (1, 0, 11), "idx_confronts_guild"),
+    # ConfrontService.list
+    (
+        "SELECT id, guild_id, target_user_id, trigger_reaction, counter_reaction, created_by, created_at "
+        "FROM confronts WHERE guild_id = ? ORDER BY id ASC",
+        (1,),
+        "idx_confronts_guild",
+    ),
+])
+async def test_service_queries_use_index(db, sql, params, index):
+    plan = await _plan(db, sql, params)
+    assert index in plan, plan
+    assert "USE TEMP B-TREE" not in plan, plan
@@ -0,0 +1,68 @@
+import pytest
+from types import SimpleNamespace
+from cronbot.db import Database
+from cronbot.pagination import MESSAGE_BUDGET, PageView, render_lines
+from cronbot.services.phrases import PhraseService
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def svc(tmp_path):
+    async with Database(str(tmp_path / "test.db")) as db:
+        svc = PhraseService(db)
+        for i in range(25):
+            await svc.add_phrase(1, f"p{i}")
+        await svc.add_phrase(2, "other guild")
+        yield svc
+
+
+def _texts(page):
+    return [r["text"] for r in page.rows]
+
+
+async def test_forward_and_back(svc):
+    p1 = await svc.page_phrases(1, limit=10)
+    assert _texts(p1) == [f"p{i}" for i in range(10)]
+    assert not p1.has_prev and p1.has_next
+    p2 = await svc.page_phrases(1, after=p1.last_id, limit=10)
+    p3 = await svc.page_phrases(1, after=p2.last_id, limit=10)
+    assert _texts(p3) == [f"p{i}" for i in range(20, 25)]
+    assert p3.has_prev and not p3.has_next
+    back = await svc.page_phrases(1, before=p3.first_id, limit=10)
+    assert _texts(back) == _texts(p2) and back.has_prev and back.has_next
+    first = await svc.page_phrases(1, before=back.first_id, limit=10)
+    assert _texts(first) == _texts(p1) and not first.has_prev
+
+
+async def test_render_fits_one_message():
+    text = render_lines([f"`{i}`: " + "x" * 1000 for i in range(10)])
+    assert len(text) <= MESSAGE_BUDGET
+    assert text.count("\n") == 9
+    assert render_lines(["short"]) == "short"
+
+
+class _Response:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_message(self, **kw):
+        self.edits.append(kw)
+
+
+async def test_view_buttons_page_through(svc):
+    fetch = lambda **kw: svc.page_phrases(1, limit=10, **kw)  # noqa: E731
+    render = lambda rows: [r["text"] for r in rows]  # noqa: E731
+    view = PageView(42, await fetch(), fetch, render)
+    assert view.prev_page.disabled and not view.next_page.disabled
+
+    itx = SimpleNamespace(user=SimpleNamespace(id=42), response=_Response())
+    assert await view.interaction_check(itx)
+    assert not await view.interaction_check(SimpleNamespace(user=SimpleNamespace(id=7)))
+
+    await view.next_page.callback(itx)
+    await view.next_page.callback(itx)
+    assert itx.response.edits[-1]["content"].splitlines() == [f"p{i}" for i in range(20, 25)]
+    assert view.next_page.disabled and not view.prev_page.disabled
+    await view.prev_page.callback(itx)
+    assert itx.response.edits[-1]["content"].splitlines()[0] == "p10"
@@ -10,7 +10,8 @@ def db_path(tmp_path):
 
 @pytest.fixture
 async def svc(db_path):
-    return PhraseService(Database(db_path))
+    async with Database(db_path) as db:
+        yield PhraseService(db)
 
 async def test_add_list_delete_phrase(svc):
     gid = 111
@@ -42,3 +43,23 @@ async def test_seed_if_empty(svc):
     # second call should be no-op
     again = await svc.seed_if_empty(gid, ["1", "2"])
     assert again == 0
+
+async def test_cache_invalidated_on_write(svc):
+    gid = 444
+    await svc.add_phrase(gid, "only")
+    assert await svc.get_random(gid) == "only"
+    pid = (await svc.list_phrases(gid))[0]["id"]
+    await svc.delete_phrase(gid, pid)
+    assert await svc.get_random(gid) is None
+
+async def test_shuffle_bag_no_repeats_and_persisted(svc):
+    gid = 555
+    svc.shuffle_bag = True
+    for t in "abcd":
+        await svc.add_phrase(gid, t)
+    first = [await svc.get_random(gid), await svc.get_random(gid)]
+
+    # «рестарт»: новый сервис продолжает тот же цикл из phrase_bags
+    again = PhraseService(svc.db, shuffle_bag=True)
+    rest = [await again.get_random(gid), await again.get_random(gid)]
+    assert sorted(first + rest) == ["a", "b", "c", "d"]
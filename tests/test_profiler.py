@@ -0,0 +1,33 @@
+import logging
+
+import pytest
+from cronbot.db import Database
+from cronbot.profiler import QueryProfiler, normalize_sql
+
+pytestmark = pytest.mark.asyncio
+
+async def test_normalize_sql():
+    assert normalize_sql("SELECT *\n  FROM t WHERE a = 5 AND b = 'x''y'") == "SELECT * FROM t WHERE a = ? AND b = ?"
+    assert normalize_sql("SELECT 1 FROM t WHERE id IN (?, ?,?)") == "SELECT ? FROM t WHERE id IN (...)"
+
+async def test_profiler_counts_statements(tmp_path):
+    async with Database(str(tmp_path / "test.db"), pool_size=1) as db:
+        db.profiler.reset()
+        async with db.acquire() as conn:
+            for _ in range(3):
+                await conn.execute("SELECT text FROM phrases WHERE guild_id = ?", (1,))
+            await conn.executemany("INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, ?)", [(1, "a", "t")])
+            await conn.commit()
+        top = db.profiler.top()
+        by_sql = {s.sql: s for s in top}
+        assert by_sql["SELECT text FROM phrases WHERE guild_id = ?"].calls == 3
+        assert "calls" in db.profiler.dump()
+
+async def test_slow_query_logged_with_caller(caplog):
+    prof = QueryProfiler(slow_ms=10)
+    with caplog.at_level(logging.WARNING, logger="cronbot.db.slow"):
+        prof.record("SELECT 1", 0.001)
+        prof.record("SELECT * FROM t WHERE id = 7", 0.5)
+    assert len(caplog.records) == 1
+    msg = caplog.records[0].getMessage()
+    assert "SELECT * FROM t WHERE id = ?" in msg and "500.0 ms" in msg
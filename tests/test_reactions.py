@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from cronbot.metrics import REACTIONS
+from cronbot.reactions import ReactionDispatcher
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeMessage:
+    def __init__(self, mid, delay=0.0, fail=()):
+        self.id = mid
+        self.delay = delay
+        self.fail = set(fail)
+        self.reactions: list[str] = []
+        self.active = 0
+        self.peak = 0
+
+    async def add_reaction(self, emoji):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if emoji in self.fail:
+                raise RuntimeError("forbidden")
+            self.reactions.append(emoji)
+        finally:
+            self.active -= 1
+
+
+async def test_debounce_reacts_once_to_latest_message():
+    d = ReactionDispatcher(debounce=0.05, user_cooldown=0, channel_cooldown=0)
+    before = REACTIONS.value(result="coalesced")
+    msgs = [FakeMessage(i) for i in range(5)]
+    for m in msgs:
+        assert d.submit(1, 10, 100, m, ["👍"])
+    assert d.queue_depth == 1
+    await asyncio.sleep(0.1)
+    await d.drain()
+    assert [m.reactions for m in msgs] == [[], [], [], [], ["👍"]]
+    assert REACTIONS.value(result="coalesced") - before == 4
+    await d.close()
+
+
+async def test_user_and_channel_cooldowns_suppress():
+    clock = FakeClock()
+    d = ReactionDispatcher(debounce=0, user_cooldown=5, channel_cooldown=1, clock=clock)
+    first = FakeMessage(1)
+    d.submit(1, 10, 100, first, ["👍"])
+    await d.drain()
+    assert first.reactions == ["👍"]
+
+    clock.now += 0.5
+    # другой автор в том же канале — канал ещё остывает
+    assert d.submit(1, 10, 300, FakeMessage(3), ["👍"]) is False
+    clock.now += 1.0
+    # тот же автор в другом канале — остывает автор
+    assert d.submit(1, 12, 100, FakeMessage(4), ["👍"]) is False
+    clock.now += 5.0
+    late = FakeMessage(5)
+    assert d.submit(1, 12, 100, late, ["👍"])
+    await d.drain()
+    assert late.reactions == ["👍"]
+    await d.close()
+
+
+async def test_fan_out_is_concurrent_and_bounded():
+    d = ReactionDispatcher(debounce=0, user_cooldown=0, channel_cooldown=0, concurrency=2)
+    msg = FakeMessage(1, delay=0.02, fail={"❌"})
+    before = REACTIONS.value(result="failed")
+    d.submit(1, 10, 100, msg, ["a", "b", "c", "❌", "a"])
+    await d.drain()
+    assert sorted(msg.reactions) == ["a", "b", "c"]
+    assert msg.peak == 2
+    assert REACTIONS.value(result="failed") - before == 1
+    await d.close()
+
+
+async def test_full_queue_drops():
+    d = ReactionDispatcher(debounce=10, user_cooldown=0, channel_cooldown=0, max_queue=2)
+    before = REACTIONS.value(result="dropped")
+    assert d.submit(1, 10, 1, FakeMessage(1), ["👍"])
+    assert d.submit(1, 10, 2, FakeMessage(2), ["👍"])
+    assert not d.submit(1, 10, 3, FakeMessage(3), ["👍"])
+    # уже ждущий ключ склеивается даже при полной очереди
+    assert d.submit(1, 10, 1, FakeMessage(4), ["👍"])
+    assert REACTIONS.value(result="dropped") - before == 1
+    await d.close()
@@ -16,8 +16,8 @@ def db_path(tmp_path):
 
 @pytest.fixture
 async def svc(db_path, tz_str):
-    db = Database(db_path)
-    return ReminderService(db, tz_str)
+    async with Database(db_path) as db:
+        yield ReminderService(db, tz_str)
 
 async def test_when_after_minutes(svc, tz_str):
     t0 = svc.when_after_minutes(1)
@@ -56,3 +56,33 @@ async def test_add_list_delete_cron_roundtrip(svc, db_path, tz_str):
     assert deleted is True
     rows2 = await svc.list_crons(123)
     assert rows2 == []
+
+async def test_reminders_persist_and_gc(svc):
+    from datetime import datetime, timezone
+    run_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    rid = await svc.add_reminder(1, 2, "hi", run_at)
+    pending = await svc.pending_reminders()
+    assert [r["id"] for r in pending] == [rid]
+    assert datetime.fromisoformat(pending[0]["run_at"]) == run_at
+
+    await svc.mark_delivered([rid])
+    assert await svc.pending_reminders() == []
+    assert await svc.gc_delivered(batch=1) == 1
+    assert await svc.gc_delivered() == 0
+
+async def test_plan_catchup():
+    from datetime import datetime, timezone
+    from cronbot.services.reminders import plan_catchup
+    now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    rows = [
+        {"id": 1, "run_at": (now + timedelta(minutes=1)).isoformat()},
+        {"id": 2, "run_at": (now - timedelta(minutes=10)).isoformat()},
+        {"id": 3, "run_at": (now - timedelta(days=2)).isoformat()},
+    ]
+    future, due, skipped = plan_catchup(rows, now, "deliver", 60)
+    assert [r["id"] for r in future] == [1]
+    assert [r["id"] for r in due] == [2]
+    assert [r["id"] for r in skipped] == [3]
+
+    _, due, skipped = plan_catchup(rows, now, "skip", 60)
+    assert due == [] and [r["id"] for r in skipped] == [2, 3]
@@ -0,0 +1,86 @@
+import pytest
+from cronbot.scheduler import Scheduler, CronSpec
+from cronbot.services.reminders import PRESETS
+
+pytestmark = pytest.mark.asyncio
+
+async def _noop(**kwargs):
+    pass
+
+def _spec(hour=10, minute=0, text="x"):
+    return CronSpec(_noop, hour, minute, PRESETS["everyday"], {"channel_id": 1, "text": text})
+
+def _group_job(s, job_id):
+    return s._sch.get_job(s._group_id(s._member_sig[job_id]))
+
+async def test_add_cron_is_idempotent():
+    s = Scheduler("Europe/Tallinn")
+    spec = _spec()
+    assert s.add_cron("cron:1", _noop, hour=10, minute=0, expr=spec.expr, payload=spec.payload) is True
+    job = _group_job(s, "cron:1")
+    assert s.add_cron("cron:1", _noop, hour=10, minute=0, expr=spec.expr, payload=spec.payload) is False
+    assert _group_job(s, "cron:1") is job
+
+async def test_reconcile_applies_only_diff():
+    s = Scheduler("Europe/Tallinn")
+    s.reconcile({"cron:1": _spec(), "cron:2": _spec(hour=11)})
+    s.add_once(_noop, "2099-01-01 00:00:00", {}, job_id="once:1")
+    job1 = _group_job(s, "cron:1")
+
+    added, updated, removed = s.reconcile({"cron:1": _spec(), "cron:3": _spec(hour=9)})
+    assert (added, updated, removed) == (1, 0, 1)
+    assert _group_job(s, "cron:1") is job1  # неизменённая джоба сохранила identity
+    assert "cron:2" not in s._member_sig
+    assert s._sch.get_job("once:1") is not None  # чужой префикс не трогаем
+
+    assert s.reconcile({"cron:1": _spec(minute=5), "cron:3": _spec(hour=9)}) == (0, 1, 0)
+    assert s.cron_count() == 2
+
+async def test_same_trigger_coalesced_into_one_job():
+    s = Scheduler("Europe/Tallinn")
+    calls = []
+
+    async def send(**payload):
+        calls.append(payload["text"])
+
+    for i in range(5):
+        s.add_cron(f"cron:{i}", send, hour=10, minute=30, expr=PRESETS["everyday"], payload={"text": str(i)})
+    s.add_cron("cron:9", send, hour=10, minute=30, expr=PRESETS["weekdays"], payload={"text": "9"})
+    assert s.cron_count() == 6
+    assert s.group_count() == 2
+    assert len(s._sch.get_jobs()) == 2
+
+    # fan-out вызывает всех участников группы
+    await _group_job(s, "cron:0").func()
+    assert sorted(calls) == ["0", "1", "2", "3", "4"]
+
+    # членство меняется инкрементально; пустая группа снимает джобу
+    s.remove("cron:9")
+    assert s.group_count() == 1 and len(s._sch.get_jobs()) == 1
+    s.add_cron("cron:0", send, hour=11, minute=0, expr=PRESETS["everyday"], payload={"text": "0"})
+    assert s.group_count() == 2
+    calls.clear()
+    await _group_job(s, "cron:1").func()
+    assert sorted(calls) == ["1", "2", "3", "4"]
+
+async def test_jitter_is_deterministic_and_bounded():
+    from cronbot.scheduler import spread_time
+    a = spread_time("cron:1", 10, 30, 300)
+    assert a == spread_time("cron:1", 10, 30, 300)
+    h, m, sec = a
+    assert 0 <= (h * 3600 + m * 60 + sec) - (10 * 3600 + 30 * 60) < 300
+    # окна нет — точное время
+    assert spread_time("cron:1", 10, 30, 0) == (10, 30, 0)
+    # в конце суток сдвиг не переходит через полночь
+    h, m, sec = spread_time("cron:1", 23, 59, 3600)
+    assert (h, m) <= (23, 59)
+
+async def test_jitter_opt_out_and_fire_time():
+    s = Scheduler("Europe/Tallinn", jitter_window=600)
+    spec = _spec()
+    s.add_cron("cron:1", _noop, hour=10, minute=0, expr=spec.expr, payload=spec.payload, jitter=False)
+    assert s.fire_time("cron:1") == (10, 0, 0)
+    s.add_cron("cron:2", _noop, hour=10, minute=0, expr=spec.expr, payload=spec.payload)
+    h, m, sec = s.fire_time("cron:2")
+    assert 0 <= (h * 3600 + m * 60 + sec) - 36000 < 600
+    assert s.fire_time("cron:404") is None
@@ -0,0 +1,63 @@
+import pytest
+from datetime import datetime, timezone
+from cronbot.db import Database
+from cronbot.services.confronts import ConfrontService
+from cronbot.services.reminders import ReminderService
+from cronbot.sharding import ALL_SHARDS, ShardFilter, shard_for
+
+pytestmark = pytest.mark.asyncio
+
+# guild_id с разными шардами при shard_count=2
+G0 = 0 << 22
+G1 = 1 << 22
+G2 = 2 << 22
+
+
+@pytest.fixture
+async def db(tmp_path):
+    async with Database(str(tmp_path / "test.db")) as db:
+        yield db
+
+
+async def test_shard_for_matches_discord_formula():
+    gid = 81384788765712384
+    assert shard_for(gid, 4) == (gid >> 22) % 4
+    assert [shard_for(g, 2) for g in (G0, G1, G2)] == [0, 1, 0]
+
+
+async def test_owns():
+    assert ALL_SHARDS.owns(G1) and ALL_SHARDS.owns(None)
+    s0, s1 = ShardFilter(0, 2), ShardFilter(1, 2)
+    assert s0.owns(G0) and s0.owns(G2) and not s0.owns(G1)
+    assert s1.owns(G1) and not s1.owns(G0)
+    # ЛС — на шарде 0
+    assert s0.owns(None) and not s1.owns(None)
+    assert ShardFilter(0, 1).sql() == ("", ())
+
+
+async def test_iter_crons_filtered_by_shard(db):
+    svc = ReminderService(db, "Europe/Tallinn")
+    for gid in (G0, G1, G2):
+        await svc.add_cron(gid, 1, 1, "everyday", "10:30", f"g{gid}")
+    async def guilds(shard):
+        return sorted([r["guild_id"] async for r in db.iter_crons(shard=shard)])
+    assert await guilds(ALL_SHARDS) == [G0, G1, G2]
+    assert await guilds(ShardFilter(0, 2)) == [G0, G2]
+    assert await guilds(ShardFilter(1, 2)) == [G1]
+    assert [r["guild_id"] async for r in db.iter_crons(G2, shard=ShardFilter(0, 2))] == [G2]
+
+
+async def test_pending_reminders_and_confronts_filtered(db):
+    svc = ReminderService(db, "Europe/Tallinn")
+    at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    for gid in (G0, G1, None):
+        await svc.add_reminder(gid, 1, "x", at)
+    assert {r["guild_id"] for r in await svc.pending_reminders(ShardFilter(0, 2))} == {G0, None}
+    assert {r["guild_id"] for r in await svc.pending_reminders(ShardFilter(1, 2))} == {G1}
+
+    confronts = ConfrontService(db)
+    await confronts.add(G0, 10, "🔥", 1)
+    await confronts.add(G1, 11, "🔥", 1)
+    other = ConfrontService(db)
+    assert await other.load(ShardFilter(1, 2)) == 1
+    assert other.message_rules(G1, 11) and not other.message_rules(G0, 10)
@@ -0,0 +1,73 @@
+import asyncio
+import sqlite3
+
+import pytest
+from cronbot.db import Database
+from cronbot.metrics import DB_WRITE_BATCH
+
+pytestmark = pytest.mark.asyncio
+
+INSERT = "INSERT INTO phrases (guild_id, text, created_at) VALUES (?, ?, 'now')"
+
+
+@pytest.fixture
+async def db(tmp_path):
+    async with Database(str(tmp_path / "test.db"), write_window_ms=20) as db:
+        yield db
+
+
+async def _texts(db):
+    async with db.acquire() as conn:
+        cur = await conn.execute("SELECT id, text FROM phrases ORDER BY id")
+        return {r["id"]: r["text"] for r in await cur.fetchall()}
+
+
+async def test_burst_is_group_committed_with_rowids(db):
+    before = DB_WRITE_BATCH.count()
+    results = await asyncio.gather(*(db.write(INSERT, (1, f"p{i}")) for i in range(50)))
+    assert DB_WRITE_BATCH.count() - before < 50
+    stored = await _texts(db)
+    assert {r.lastrowid: f"p{i}" for i, r in enumerate(results)} == stored
+
+
+async def test_failed_write_does_not_poison_batch(db):
+    ok1, bad, ok2 = await asyncio.gather(
+        db.write(INSERT, (1, "a")),
+        db.write("INSERT INTO nope VALUES (1)"),
+        db.write(INSERT, (1, "b")),
+        return_exceptions=True,
+    )
+    assert isinstance(bad, sqlite3.OperationalError)
+    assert sorted((await _texts(db)).values()) == ["a", "b"]
+    assert ok1.rowcount == ok2.rowcount == 1
+
+
+async def test_transaction_is_atomic(db):
+    async def fn(conn):
+        await conn.execute(INSERT, (1, "half"))
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await db.transaction(fn)
+    assert await _texts(db) == {}
+
+    async def read_then_write(conn):
+        cur = await conn.execute("SELECT COUNT(*) FROM phrases")
+        (n,) = await cur.fetchone()
+        await conn.execute(INSERT, (1, f"n={n}"))
+        return n
+
+    assert await db.transaction(read_then_write) == 0
+    assert list((await _texts(db)).values()) == ["n=0"]
+
+
+async def test_close_drains_pending_writes(tmp_path):
+    path = str(tmp_path / "drain.db")
+    db = Database(path)
+    await db.open()
+    pending = [asyncio.ensure_future(db.write(INSERT, (1, f"p{i}"))) for i in range(10)]
+    await asyncio.sleep(0)
+    await db.close()
+    assert all(p.done() and not p.exception() for p in pending)
+    async with Database(path) as again:
+        assert len(await _texts(again)) == 10